@@ -1,10 +1,13 @@
 import sys
+import time
 import asyncio
+import itertools
 import logging
 import json
+from collections import defaultdict, deque
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from dataclasses import dataclass
 from dotenv import load_dotenv
 
@@ -16,6 +19,8 @@ logger = logging.getLogger(__name__)
 from mcp.client.stdio import stdio_client, StdioServerParameters
 from mcp.types import (
     JSONRPCRequest,
+    JSONRPCNotification,
+    JSONRPCError,
     InitializeRequestParams,
     ClientCapabilities,
     CallToolRequestParams,
@@ -24,22 +29,219 @@ from mcp.types import (
 # Envelope type the stdio writer expects
 @dataclass
 class Outbound:
-    message: JSONRPCRequest
+    message: Any
 
 
 def extract_text_content(resp):
     """Extract text content from a tool call response."""
     root = resp.message.root
+    if isinstance(root, JSONRPCError):
+        raise RuntimeError(f"MCP error {root.error.code}: {root.error.message}")
     result = getattr(root, "result", {})
     content = result.get("content", [])
     text_blocks = [c for c in content if c.get("type") == "text"]
     if not text_blocks:
         return None
-    return text_blocks[0].get("text", "")
+    # Tools normally answer with one block; join any extra blocks rather than dropping them
+    return "\n".join(c.get("text", "") for c in text_blocks)
+
+
+class MCPCassette:
+    """
+    Record/replay of call_tool traffic in an append-only JSON-lines file.
+    Each line holds server, tool, arguments, the text response (or error), the wall-clock
+    start and the duration; a call the caller cancelled (timed out) is recorded with the
+    time it ran and replays as asyncio.TimeoutError after that long. Replay serves recorded
+    responses for identical calls in recorded order, falling back to the next unused
+    response for the same server/tool when the arguments differ (timestamps, alert ids);
+    latency_scale 0 answers immediately, 1 at the recorded latency, 2 twice as slow.
+    """
+
+    def __init__(self, path: str, mode: str, latency_scale: float = 0.0):
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.stats = {"recorded": 0, "exact": 0, "fallback": 0, "missing": 0}
+        self._exact: Dict[tuple, deque] = defaultdict(deque)
+        self._by_tool: Dict[tuple, deque] = defaultdict(deque)
+        if mode == "replay":
+            self._load()
+
+    @staticmethod
+    def _args_key(arguments: Dict[str, Any]) -> str:
+        return json.dumps(arguments, sort_keys=True, separators=(",", ":"), default=str)
+
+    def _load(self):
+        if not self.path.exists():
+            raise FileNotFoundError(f"MCP cassette not found: {self.path}")
+        count = 0
+        with self.path.open() as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Partial last line from an interrupted recording
+                entry["used"] = False
+                self._exact[(entry["server"], entry["tool"], self._args_key(entry["args"]))].append(entry)
+                self._by_tool[(entry["server"], entry["tool"])].append(entry)
+                count += 1
+        logger.info(f"Replaying {count} MCP calls from {self.path} (latency x{self.latency_scale})")
+
+    def record(self, server_name: str, tool_name: str, arguments: Dict[str, Any], started: float,
+               duration: float, response: Optional[str] = None, error: Optional[str] = None,
+               cancelled: bool = False):
+        """Append one call; written and flushed immediately so a crash loses at most that line"""
+        entry = {"server": server_name, "tool": tool_name, "args": arguments, "t": round(started, 3),
+                 "ms": round(duration * 1000, 1)}
+        if cancelled:
+            entry["cancelled"] = True
+        elif error is not None:
+            entry["error"] = error
+        else:
+            entry["response"] = response
+        with self.path.open("a") as f:
+            f.write(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+        self.stats["recorded"] += 1
+
+    def _take(self, queue: deque) -> Optional[Dict[str, Any]]:
+        while queue and queue[0]["used"]:
+            queue.popleft()
+        if not queue:
+            return None
+        entry = queue.popleft()
+        entry["used"] = True
+        return entry
+
+    async def replay(self, server_name: str, tool_name: str, arguments: Dict[str, Any]):
+        """Serve the recorded response for a call, raising if the cassette has none left"""
+        entry = self._take(self._exact[(server_name, tool_name, self._args_key(arguments))])
+        if entry is not None:
+            self.stats["exact"] += 1
+        else:
+            entry = self._take(self._by_tool[(server_name, tool_name)])
+            if entry is None:
+                self.stats["missing"] += 1
+                raise LookupError(f"No recorded {server_name}.{tool_name} call left in {self.path}")
+            self.stats["fallback"] += 1
+        if self.latency_scale > 0:
+            await asyncio.sleep(entry["ms"] / 1000 * self.latency_scale)
+        if entry.get("cancelled"):
+            raise asyncio.TimeoutError(f"Recorded call was cancelled after {entry['ms']}ms")
+        if "error" in entry:
+            raise RuntimeError(f"Recorded error: {entry['error']}")
+        return entry.get("response")
+
+
+class MCPServerSession:
+    """
+    One long-lived stdio connection to an MCP server. A background task owns the subprocess
+    and routes responses to callers by JSON-RPC id, so concurrent calls share the process and
+    server-side state (caches, connection pools, buffers, metrics) survives between calls.
+    The process is restarted on the next call if it exits.
+    """
+
+    def __init__(self, name: str, params: StdioServerParameters):
+        self.name = name
+        self.params = params
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._write_stream = None
+        self._task: Optional[asyncio.Task] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    async def _ensure_started(self):
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._write_stream is not None and self._task is not None and not self._task.done():
+                return
+            ready = asyncio.get_running_loop().create_future()
+            self._task = asyncio.create_task(self._run(ready))
+            await ready
+
+    async def _run(self, ready: asyncio.Future):
+        try:
+            async with stdio_client(self.params) as (read_stream, write_stream):
+                init_params = InitializeRequestParams(
+                    protocolVersion="2024-11-05",
+                    clientInfo={"name": "AITTA Client", "version": "0.1"},
+                    capabilities=ClientCapabilities(),
+                )
+                await write_stream.send(Outbound(message=JSONRPCRequest(
+                    jsonrpc="2.0", id=0, method="initialize", params=init_params.model_dump()
+                )))
+                while isinstance(await read_stream.receive(), Exception):
+                    pass  # Stray stdout lines printed before the handshake
+                await write_stream.send(Outbound(message=JSONRPCNotification(
+                    jsonrpc="2.0", method="notifications/initialized"
+                )))
+                self._write_stream = write_stream
+                ready.set_result(None)
+                logger.info(f"MCP session to {self.name} started")
+
+                async for message in read_stream:
+                    if isinstance(message, Exception):
+                        logger.warning(f"Unreadable message from {self.name}: {message}")
+                        continue
+                    future = self._pending.pop(getattr(message.message.root, "id", None), None)
+                    if future is not None and not future.done():
+                        future.set_result(message)
+            logger.warning(f"MCP server {self.name} exited; it is restarted on the next call")
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.error(f"MCP session to {self.name} failed: {type(e).__name__} - {e}")
+        finally:
+            self._write_stream = None
+            if not ready.done():
+                ready.set_exception(ConnectionError(f"MCP server {self.name} did not start"))
+            pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"MCP server {self.name} exited"))
+
+    async def request(self, method: str, params: Dict[str, Any]):
+        """Send one request and wait for its response message"""
+        await self._ensure_started()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self._write_stream.send(Outbound(message=JSONRPCRequest(
+                jsonrpc="2.0", id=request_id, method=method, params=params
+            )))
+            return await future
+        except asyncio.CancelledError:
+            # Caller timed out or was cancelled: tell the server to stop working on it
+            asyncio.create_task(self._notify_cancelled(request_id))
+            raise
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _notify_cancelled(self, request_id: int):
+        if self._write_stream is None:
+            return
+        try:
+            await self._write_stream.send(Outbound(message=JSONRPCNotification(
+                jsonrpc="2.0", method="notifications/cancelled",
+                params={"requestId": request_id, "reason": "Client cancelled"},
+            )))
+        except Exception:
+            pass
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
 
 
 class MCPClientManager:
-    """Manages connections to multiple MCP servers using low-level JSON-RPC."""
+    """Manages persistent sessions to multiple MCP servers using low-level JSON-RPC."""
 
     def __init__(self, config):
         self.config = config
@@ -73,45 +275,54 @@ class MCPClientManager:
 
             ),
         }
+        self.sessions: Dict[str, MCPServerSession] = {}
+        mode = getattr(self.config, "MCP_CASSETTE_MODE", "off")
+        self.cassette: Optional[MCPCassette] = None
+        if mode in ("record", "replay"):
+            self.cassette = MCPCassette(
+                self.config.MCP_CASSETTE_PATH, mode, getattr(self.config, "MCP_CASSETTE_LATENCY_SCALE", 0.0)
+            )
+            logger.info(f"MCP cassette {mode} mode: {self.config.MCP_CASSETTE_PATH}")
 
-    async def _initialize(self, read_stream, write_stream):
-        """Send initialize message to server."""
-        init_params = InitializeRequestParams(
-            protocolVersion="2024-11-05",
-            clientInfo={"name": "AITTA Client", "version": "0.1"},
-            capabilities=ClientCapabilities(),
-        )
-        init_msg = JSONRPCRequest(
-            jsonrpc="2.0", id=1, method="initialize", params=init_params.model_dump()
-        )
-        await write_stream.send(Outbound(message=init_msg))
-        return await read_stream.receive()
+    def _session(self, server_name: str) -> MCPServerSession:
+        if server_name not in self.sessions:
+            self.sessions[server_name] = MCPServerSession(server_name, self.servers[server_name])
+        return self.sessions[server_name]
 
     async def list_tools(self, server_name: str):
         """List tools available on a server."""
-        server_params = self.servers[server_name]
-        async with stdio_client(server_params) as (read_stream, write_stream):
-            await self._initialize(read_stream, write_stream)
-
-            list_msg = JSONRPCRequest(jsonrpc="2.0", id=2, method="tools/list", params={})
-            await write_stream.send(Outbound(message=list_msg))
-            resp = await read_stream.receive()
-            return extract_text_content(resp)
+        resp = await self._session(server_name).request("tools/list", {})
+        return extract_text_content(resp)
 
     async def call_tool(self, server_name: str, tool_name: str, arguments: Dict[str, Any]):
-        """Call a tool on a server."""
-        server_params = self.servers[server_name]
-        async with stdio_client(server_params) as (read_stream, write_stream):
-            await self._initialize(read_stream, write_stream)
-
-            call_params = CallToolRequestParams(name=tool_name, arguments=arguments)
-            call_msg = JSONRPCRequest(
-                jsonrpc="2.0", id=3, method="tools/call", params=call_params.model_dump()
-            )
-            await write_stream.send(Outbound(message=call_msg))
-            resp = await read_stream.receive()
-            return extract_text_content(resp)
+        """Call a tool on a server, or serve it from the cassette in replay mode."""
+        if self.cassette is None:
+            return await self._call_tool(server_name, tool_name, arguments)
+        if self.cassette.mode == "replay":
+            return await self.cassette.replay(server_name, tool_name, arguments)
+
+        started, clock = time.time(), time.monotonic()
+        try:
+            result = await self._call_tool(server_name, tool_name, arguments)
+        except asyncio.CancelledError:
+            # The caller's wait_for timed out (or it was cancelled); keep how long it waited
+            self.cassette.record(server_name, tool_name, arguments, started, time.monotonic() - clock, cancelled=True)
+            raise
+        except Exception as e:
+            self.cassette.record(server_name, tool_name, arguments, started, time.monotonic() - clock,
+                                 error=f"{type(e).__name__}: {e}")
+            raise
+        self.cassette.record(server_name, tool_name, arguments, started, time.monotonic() - clock, response=result)
+        return result
+
+    async def _call_tool(self, server_name: str, tool_name: str, arguments: Dict[str, Any]):
+        call_params = CallToolRequestParams(name=tool_name, arguments=arguments)
+        resp = await self._session(server_name).request("tools/call", call_params.model_dump())
+        return extract_text_content(resp)
 
     async def cleanup(self):
-        """No persistent sessions in low-level mode, so nothing to clean up."""
-        logger.info("Cleanup not required in low-level mode")
\ No newline at end of file
+        """Stop the MCP server processes."""
+        sessions, self.sessions = self.sessions, {}
+        for session in sessions.values():
+            await session.close()
+        logger.info(f"Closed {len(sessions)} MCP sessions")
@@ -4,10 +4,16 @@ Provides tools to query asset information, ownership, dependencies, and create i
 """
 
 import asyncio
+import base64
+import ipaddress
 import json
 from dotenv import load_dotenv
 import os
 import logging
+import sqlite3
+import time
+from collections import Counter, OrderedDict, deque
+from datetime import date, datetime
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
@@ -22,18 +28,894 @@ CMDB_USERNAME = os.getenv("CMDB_USERNAME", "")
 CMDB_PASSWORD = os.getenv("CMDB_PASSWORD", "")
 USE_MOCK_CMDB = os.getenv("USE_MOCK_CMDB", "true").lower() == "true"
 
+# Asset cache
+CMDB_CACHE_TTL = float(os.getenv("CMDB_CACHE_TTL", "3600"))  # Seconds a found asset is fresh
+CMDB_CACHE_NEGATIVE_TTL = float(os.getenv("CMDB_CACHE_NEGATIVE_TTL", "300"))  # Seconds a "Not found" is remembered
+CMDB_CACHE_STALE_TTL = float(os.getenv("CMDB_CACHE_STALE_TTL", "86400"))  # Extra seconds a stale entry may be served while refreshing
+CMDB_CACHE_MAX_ENTRIES = int(os.getenv("CMDB_CACHE_MAX_ENTRIES", "10000"))
+
+# Bulk lookups: keep each nameIN query comfortably under URL length limits
+CMDB_BULK_QUERY_MAX_CHARS = int(os.getenv("CMDB_BULK_QUERY_MAX_CHARS", "1500"))
+CMDB_BATCH_MAX_REQUESTS = int(os.getenv("CMDB_BATCH_MAX_REQUESTS", "50"))  # Requests per /api/now/v1/batch call
+BATCH_FALLBACK_STATUSES = {400, 403, 404}  # Batch API unavailable (plugin inactive, missing role); nothing was created
+
+# Local snapshot of cmdb_ci_server / cmdb_rel_ci
+CMDB_SNAPSHOT_ENABLED = os.getenv("CMDB_SNAPSHOT_ENABLED", "false").lower() == "true"
+CMDB_SNAPSHOT_PATH = os.getenv("CMDB_SNAPSHOT_PATH", "cmdb_snapshot.db")
+CMDB_SNAPSHOT_FULL_RELOAD_HOURS = float(os.getenv("CMDB_SNAPSHOT_FULL_RELOAD_HOURS", "24"))  # Full reloads drop deleted CIs
+CMDB_SNAPSHOT_PAGE_SIZE = int(os.getenv("CMDB_SNAPSHOT_PAGE_SIZE", "1000"))
+CMDB_SNAPSHOT_LEASE_SECONDS = float(os.getenv("CMDB_SNAPSHOT_LEASE_SECONDS", "300"))  # Renewed per page; a crashed holder's lease lapses
+
+# Dependency graph traversal
+CMDB_GRAPH_MAX_DEPTH = int(os.getenv("CMDB_GRAPH_MAX_DEPTH", "10"))  # Hard cap on requested traversal depth
+
+# Incident history (ServiceNow path)
+CMDB_INCIDENT_RECENT_LIMIT = int(os.getenv("CMDB_INCIDENT_RECENT_LIMIT", "10"))  # Recent rows returned alongside the aggregates
+CMDB_INCIDENT_CACHE_MAX_ENTRIES = int(os.getenv("CMDB_INCIDENT_CACHE_MAX_ENTRIES", "2000"))
+
+# Host routing (alias -> CI): the snapshot's alias table when loaded, else an in-memory table paged
+# from cmdb_ci_server at startup and rebuilt every CMDB_ROUTING_REFRESH_INTERVAL seconds
+CMDB_ROUTING_ENABLED = os.getenv("CMDB_ROUTING_ENABLED", "true").lower() == "true"
+CMDB_ROUTING_REFRESH_INTERVAL = float(os.getenv("CMDB_ROUTING_REFRESH_INTERVAL", "300"))
+
+# search_by_service pagination
+CMDB_SEARCH_PAGE_SIZE = int(os.getenv("CMDB_SEARCH_PAGE_SIZE", "50"))
+CMDB_SEARCH_MAX_PAGE_SIZE = int(os.getenv("CMDB_SEARCH_MAX_PAGE_SIZE", "500"))
+
+# cmdb_ci_server columns read for each asset field (see _normalize_asset); drives sysparm_fields
+ASSET_FIELD_COLUMNS = {
+    "hostname": ["name"],
+    "ip": ["ip_address"],
+    "owner_team": ["u_owner_team", "managed_by_group", "owned_by"],
+    "environment": ["u_environment", "classification"],
+    "location": ["location"],
+    "criticality": ["u_criticality"],
+    "status": ["operational_status"],
+    "os_domain": ["os_domain"],
+    "os_version": ["os_version"],
+    "internet_facing": ["internet_facing"],
+    "virtual": ["virtual"],
+    "serial_number": ["serial_number"],
+    "asset_tag": ["asset_tag"],
+    "disk_space": ["disk_space"],
+    "ram": ["ram"],
+    "manufacturer": ["manufacturer"],
+    "model": ["model_id"],
+    "support_group": ["support_group"],
+    "assignment_group": ["assignment_group"],
+    "managed_by_group": ["managed_by_group"],
+    "location_region": ["location"],
+    "created_on": ["sys_created_on"],
+    "updated_on": ["sys_updated_on"],
+    "attestation_status": ["attestation_status"],
+    "fault_count": ["fault_count"],
+    "service": ["business_service", "service_offering", "u_service"],
+}
+
+FIELDS_SCHEMA = {
+    "type": "array",
+    "items": {"type": "string"},
+    "description": "Only return these fields (hostname is always kept); omit for all fields",
+}
+
 # HTTP defaults for ServiceNow
 HTTP_TIMEOUT = aiohttp.ClientTimeout(total=60)
+CMDB_POOL_SIZE = int(os.getenv("CMDB_POOL_SIZE", "50"))  # Total pooled connections
+CMDB_POOL_PER_HOST = int(os.getenv("CMDB_POOL_PER_HOST", "20"))  # Connections per ServiceNow host
+CMDB_KEEPALIVE_TIMEOUT = float(os.getenv("CMDB_KEEPALIVE_TIMEOUT", "60"))  # Idle keep-alive seconds
+CMDB_DNS_CACHE_TTL = int(os.getenv("CMDB_DNS_CACHE_TTL", "300"))
 HEADERS = {"Content-Type": "application/json", "Accept": "application/json"}
+COMPACT_JSON = (",", ":")  # Separators for asset responses, which the agent parses rather than reads
 
 # Logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class ServiceNowError(RuntimeError):
+    """Non-2xx answer from the ServiceNow REST API"""
+
+    def __init__(self, method: str, url: str, status: int, text: str):
+        super().__init__(f"{method} {url} failed {status}: {text}")
+        self.status = status
+
+
+class AssetCache:
+    """
+    LRU cache of normalized CMDB asset records keyed by hostname.
+    Entries hold the asset and its CI sys_id; a None asset is a cached "Not found".
+    Found entries are fresh for CMDB_CACHE_TTL and may then be served stale for
+    CMDB_CACHE_STALE_TTL while a background refresh runs. Relationship results derived
+    from CIs (transitive dependencies, paths) are memoized alongside for CMDB_CACHE_TTL
+    and dropped on any invalidation.
+    """
+
+    def __init__(self, ttl: float = CMDB_CACHE_TTL, negative_ttl: float = CMDB_CACHE_NEGATIVE_TTL,
+                 stale_ttl: float = CMDB_CACHE_STALE_TTL, max_entries: int = CMDB_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self._related: "OrderedDict[tuple, tuple[float, Any]]" = OrderedDict()
+        self.stats = {"hits": 0, "stale_hits": 0, "negative_hits": 0, "misses": 0, "evictions": 0, "refreshes": 0, "refresh_failures": 0,
+                      "related_hits": 0, "related_misses": 0}
+
+    @staticmethod
+    def key(hostname: str) -> str:
+        return hostname.strip().lower()
+
+    def get(self, hostname: str) -> tuple[Optional[dict], str]:
+        """Return (entry, state) where state is fresh, stale or miss"""
+        key = self.key(hostname)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None, "miss"
+        age = time.monotonic() - entry["stored_at"]
+        if entry["asset"] is None:
+            if age < self.negative_ttl:
+                self._entries.move_to_end(key)
+                self.stats["negative_hits"] += 1
+                return entry, "fresh"
+        elif age < self.ttl:
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry, "fresh"
+        elif age < self.ttl + self.stale_ttl:
+            self._entries.move_to_end(key)
+            self.stats["stale_hits"] += 1
+            return entry, "stale"
+        del self._entries[key]
+        self.stats["misses"] += 1
+        return None, "miss"
+
+    def put(self, hostname: str, asset: Optional[dict], sys_id: Optional[str] = None) -> dict:
+        key = self.key(hostname)
+        entry = {"asset": asset, "sys_id": sys_id, "stored_at": time.monotonic()}
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+        return entry
+
+    def invalidate(self, hostname: Optional[str] = None):
+        # Relationship results can pass through any CI, so every invalidation drops them all
+        self._related.clear()
+        if hostname is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(self.key(hostname), None)
+
+    def get_related(self, key: tuple) -> Optional[Any]:
+        """Memoized relationship result for key, e.g. ("traverse", sys_id, direction, depth); None when absent or expired"""
+        item = self._related.get(key)
+        if item is None or time.monotonic() - item[0] >= self.ttl:
+            self._related.pop(key, None)
+            self.stats["related_misses"] += 1
+            return None
+        self._related.move_to_end(key)
+        self.stats["related_hits"] += 1
+        return item[1]
+
+    def put_related(self, key: tuple, value: Any) -> Any:
+        self._related[key] = (time.monotonic(), value)
+        self._related.move_to_end(key)
+        while len(self._related) > self.max_entries:
+            self._related.popitem(last=False)
+        return value
+
+    def refresh_in_background(self, hostname: str, loader):
+        """Start one background reload per host; concurrent stale reads share it"""
+        key = self.key(hostname)
+        if key in self._refreshing:
+            return
+
+        async def _refresh():
+            try:
+                await loader(hostname)
+                self.stats["refreshes"] += 1
+            except Exception as e:
+                self.stats["refresh_failures"] += 1
+                logger.warning(f"Background refresh of {hostname} failed: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(_refresh())
+
+    def snapshot_stats(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["stale_hits"] + self.stats["negative_hits"] + self.stats["misses"]
+        served = lookups - self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "related_entries": len(self._related),
+            "negative_entries": sum(1 for e in self._entries.values() if e["asset"] is None),
+            "max_entries": self.max_entries,
+            "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+            "refreshing": len(self._refreshing),
+            "ttl_seconds": self.ttl,
+            "negative_ttl_seconds": self.negative_ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+        }
+
+
+ALIAS_KINDS = ("name", "fqdn", "short_name", "ip")
+
+
+def _normalize_alias(name: str) -> str:
+    return (name or "").strip().lower().rstrip(".")
+
+
+def _is_ip(value: str) -> bool:
+    try:
+        ipaddress.ip_address(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _route_aliases(name: str, fqdn: Optional[str], ip: Optional[str]) -> list:
+    """(alias, kind) pairs a CI is reachable by: its normalized name, FQDN, short names and IP address"""
+    name = _normalize_alias(name)
+    if not name:
+        return []
+    aliases = [(name, "name")]
+    if fqdn:
+        aliases.append((_normalize_alias(fqdn), "fqdn"))
+    for full in (name, _normalize_alias(fqdn)):
+        if full and "." in full and not _is_ip(full):
+            aliases.append((full.split(".", 1)[0], "short_name"))
+    if ip:
+        aliases.append((_normalize_alias(ip), "ip"))
+    return aliases
+
+
+def _ci_service(ci: dict) -> str:
+    """Business service display name of a cmdb_ci_server row (display values)"""
+    for field in ("business_service", "service_offering", "u_service"):
+        value = ci.get(field)
+        if isinstance(value, dict):
+            value = value.get("display_value")
+        if value:
+            return value
+    return "Unknown"
+
+
+def _normalize_service(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+SERVICE_NGRAM = 3
+
+
+def _service_ngrams(service: str) -> set:
+    """Every 1-3 character n-gram of a normalized service name"""
+    return {service[i:i + n] for n in range(1, SERVICE_NGRAM + 1) for i in range(len(service) - n + 1)}
+
+
+class CMDBSnapshot:
+    """
+    Embedded SQLite copy of cmdb_ci_server and cmdb_rel_ci.
+    CI rows are stored with display values (so they normalize like live rows) next to their
+    raw sys_updated_on; relationships store raw parent/child sys_ids. Each table keeps its
+    own (sys_updated_on, sys_id) watermark for delta syncs, and every sync stamps rows with
+    a generation so a full reload can drop CIs deleted in ServiceNow. The alias table routes
+    alert hostnames to CIs and is written with the CI rows. CIs carry their normalized
+    service name in an indexed column, and service_ngram holds the 1-3 character n-grams
+    of every service for search_by_service; both are written and pruned with the CI rows.
+    """
+
+    def __init__(self, path: str = CMDB_SNAPSHOT_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS ci (
+                sys_id TEXT PRIMARY KEY, name TEXT, name_key TEXT, ip TEXT,
+                row TEXT, sys_updated_on TEXT, sync_gen INTEGER, service_key TEXT
+            );
+            CREATE INDEX IF NOT EXISTS ci_name_key ON ci(name_key);
+            CREATE TABLE IF NOT EXISTS rel (
+                sys_id TEXT PRIMARY KEY, parent TEXT, child TEXT, type TEXT,
+                sys_updated_on TEXT, sync_gen INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS rel_child ON rel(child);
+            CREATE INDEX IF NOT EXISTS rel_parent ON rel(parent);
+            CREATE TABLE IF NOT EXISTS alias (alias TEXT, kind TEXT, sys_id TEXT, PRIMARY KEY (alias, sys_id));
+            CREATE INDEX IF NOT EXISTS alias_sys_id ON alias(sys_id);
+            CREATE TABLE IF NOT EXISTS service_ngram (
+                ngram TEXT, service_key TEXT, PRIMARY KEY (ngram, service_key)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        if "service_key" not in {col[1] for col in self.conn.execute("PRAGMA table_info(ci)")}:
+            # Snapshot written before service search moved into SQLite
+            self.conn.execute("ALTER TABLE ci ADD COLUMN service_key TEXT")
+            self.conn.executemany(
+                "UPDATE ci SET service_key = ? WHERE sys_id = ?",
+                [(_normalize_service(_ci_service(json.loads(row))), sys_id) for sys_id, row in self.conn.execute("SELECT sys_id, row FROM ci")],
+            )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ci_service_key ON ci(service_key, name_key)")
+        self.alias_hits = {kind: 0 for kind in ALIAS_KINDS}
+        self.alias_misses = 0
+        if self.conn.execute("SELECT NOT EXISTS (SELECT 1 FROM alias) AND EXISTS (SELECT 1 FROM ci)").fetchone()[0]:
+            # Snapshot written before the alias table existed
+            self._index_aliases([(sys_id, json.loads(row)) for sys_id, row in self.conn.execute("SELECT sys_id, row FROM ci")])
+        if self.conn.execute("SELECT NOT EXISTS (SELECT 1 FROM service_ngram) AND EXISTS (SELECT 1 FROM ci)").fetchone()[0]:
+            self._index_services({key for key, in self.conn.execute("SELECT DISTINCT service_key FROM ci")})
+        self.conn.commit()
+
+    # ---- metadata ----
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def delete_meta(self, key: str):
+        self.conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+
+    def acquire_lease(self, holder: str, ttl: float) -> bool:
+        """Take or renew the sync lease shared by every process using this file; False while another holder's is live"""
+        self.conn.commit()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            lease = self.get_meta("sync_lease")
+            if lease:
+                owner, expires = lease.rsplit("|", 1)
+                if owner != holder and float(expires) > time.time():
+                    self.conn.rollback()
+                    return False
+            self.set_meta("sync_lease", f"{holder}|{time.time() + ttl}")
+            self.conn.commit()
+            return True
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def release_lease(self, holder: str):
+        lease = self.get_meta("sync_lease")
+        if lease and lease.rsplit("|", 1)[0] == holder:
+            self.delete_meta("sync_lease")
+            self.conn.commit()
+
+    @property
+    def loaded(self) -> bool:
+        return self.get_meta("last_full_load") is not None
+
+    def age_seconds(self) -> Optional[float]:
+        last_sync = self.get_meta("last_sync")
+        return round(time.time() - float(last_sync), 3) if last_sync else None
+
+    def full_load_age_hours(self) -> Optional[float]:
+        last_full = self.get_meta("last_full_load")
+        return (time.time() - float(last_full)) / 3600 if last_full else None
+
+    # ---- writes ----
+    def upsert_cis(self, rows: list, generation: int):
+        """rows: fetched with sysparm_display_value=all; stored with display values and the raw sys_updated_on"""
+        records = []
+        previous = self._services_of([self._ref(raw.get("sys_id")) for raw in rows if raw.get("sys_id")])
+        for raw in rows:
+            r = {k: self._display(v) for k, v in raw.items()}
+            if r.get("sys_id"):
+                records.append((r["sys_id"], r.get("name"), (r.get("name") or "").lower(), r.get("ip_address"),
+                                json.dumps(r), self._ref(raw.get("sys_updated_on")), generation,
+                                _normalize_service(_ci_service(r))))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO ci (sys_id, name, name_key, ip, row, sys_updated_on, sync_gen, service_key) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            records,
+        )
+        self._index_aliases([(record[0], json.loads(record[4])) for record in records])
+        services = {record[7] for record in records}
+        self._index_services(services)
+        self._prune_services(previous - services)
+
+    def _services_of(self, sys_ids: list) -> set:
+        services = set()
+        for start in range(0, len(sys_ids), 500):
+            chunk = sys_ids[start:start + 500]
+            services.update(key for key, in self.conn.execute(
+                f"SELECT DISTINCT service_key FROM ci WHERE sys_id IN ({','.join('?' * len(chunk))})", chunk
+            ))
+        return services
+
+    def _index_services(self, services: set):
+        """Add the n-gram postings of services"""
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO service_ngram (ngram, service_key) VALUES (?, ?)",
+            [(ngram, service) for service in services if service for ngram in _service_ngrams(service)],
+        )
+
+    def _prune_services(self, services: set):
+        """Drop the postings of services no CI carries any more"""
+        gone = [
+            (service,) for service in services
+            if not self.conn.execute("SELECT 1 FROM ci WHERE service_key = ? LIMIT 1", (service,)).fetchone()
+        ]
+        self.conn.executemany("DELETE FROM service_ngram WHERE service_key = ?", gone)
+
+    def _index_aliases(self, cis: list):
+        """Replace the aliases of (sys_id, row) CIs"""
+        self.conn.executemany("DELETE FROM alias WHERE sys_id = ?", [(sys_id,) for sys_id, _ in cis])
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO alias (alias, kind, sys_id) VALUES (?, ?, ?)",
+            [
+                (alias, kind, sys_id)
+                for sys_id, ci in cis
+                for alias, kind in _route_aliases(ci.get("name"), ci.get("fqdn"), ci.get("ip_address"))
+            ],
+        )
+
+    def upsert_rels(self, rows: list, generation: int):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO rel (sys_id, parent, child, type, sys_updated_on, sync_gen) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (r.get("sys_id"), self._ref(r.get("parent")), self._ref(r.get("child")), self._ref(r.get("type")),
+                 r.get("sys_updated_on"), generation)
+                for r in rows if r.get("sys_id")
+            ],
+        )
+
+    def drop_older_than(self, generation: int):
+        dropped = {key for key, in self.conn.execute("SELECT DISTINCT service_key FROM ci WHERE sync_gen < ?", (generation,))}
+        self.conn.execute("DELETE FROM ci WHERE sync_gen < ?", (generation,))
+        self.conn.execute("DELETE FROM rel WHERE sync_gen < ?", (generation,))
+        self.conn.execute("DELETE FROM alias WHERE sys_id NOT IN (SELECT sys_id FROM ci)")
+        self._prune_services(dropped)
+
+    def commit(self):
+        self.conn.commit()
+
+    @staticmethod
+    def _ref(value):
+        return value.get("value") if isinstance(value, dict) else value
+
+    @staticmethod
+    def _display(value):
+        """display_value=all field -> what display_value=true returns (references keep their link object)"""
+        if not isinstance(value, dict):
+            return value
+        if "link" in value:
+            return {"display_value": value.get("display_value"), "link": value["link"]}
+        return value.get("display_value")
+
+    # ---- reads ----
+    def get_ci_by_name(self, hostname: str) -> Optional[dict]:
+        row = self.conn.execute("SELECT row FROM ci WHERE name_key = ? LIMIT 1", (hostname.strip().lower(),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def resolve_alias(self, hostname: str) -> Optional[dict]:
+        """
+        CI row an alert hostname routes to. Exact aliases (name, FQDN, IP) win over short names,
+        the first CI keeps a duplicate, and a short name shared by several CIs is ambiguous and
+        left unrouted. An unknown FQDN is retried by its short name.
+        """
+        key = _normalize_alias(hostname)
+        match = self._match_alias(key)
+        if match is None and "." in key and not _is_ip(key):
+            match = self._match_alias(key.split(".", 1)[0])
+            if match is not None:
+                match = ("short_name", match[1])
+        if match is None:
+            self.alias_misses += 1
+            return None
+        self.alias_hits[match[0]] += 1
+        return match[1]
+
+    def _match_alias(self, key: str) -> Optional[tuple]:
+        rows = self.conn.execute(
+            "SELECT a.kind, c.row FROM alias a JOIN ci c ON c.sys_id = a.sys_id WHERE a.alias = ? "
+            "ORDER BY a.kind = 'short_name', c.rowid LIMIT 2",
+            (key,),
+        ).fetchall()
+        if not rows or (rows[0][0] == "short_name" and len(rows) > 1):
+            return None
+        return rows[0][0], json.loads(rows[0][1])
+
+    def alias_stats(self) -> dict:
+        lookups = sum(self.alias_hits.values()) + self.alias_misses
+        return {
+            "source": "snapshot",
+            "cis": self.conn.execute("SELECT COUNT(DISTINCT sys_id) FROM alias").fetchone()[0],
+            "aliases": self.conn.execute("SELECT COUNT(DISTINCT alias) FROM alias").fetchone()[0],
+            "ambiguous_aliases": self.conn.execute(
+                "SELECT COUNT(*) FROM (SELECT alias FROM alias GROUP BY alias "
+                "HAVING COUNT(*) > 1 AND MIN(kind = 'short_name') = 1)"
+            ).fetchone()[0],
+            "hits_by_alias": dict(self.alias_hits),
+            "misses": self.alias_misses,
+            "hit_rate": round(sum(self.alias_hits.values()) / lookups, 3) if lookups else 0.0,
+        }
+
+    def names_for(self, sys_ids: list) -> dict:
+        if not sys_ids:
+            return {}
+        placeholders = ",".join("?" * len(sys_ids))
+        rows = self.conn.execute(f"SELECT sys_id, name FROM ci WHERE sys_id IN ({placeholders})", sys_ids).fetchall()
+        return dict(rows)
+
+    def parents_of(self, sys_id: str) -> list:
+        return [r[0] for r in self.conn.execute("SELECT parent FROM rel WHERE child = ? AND parent IS NOT NULL", (sys_id,))]
+
+    def match_services(self, query: str) -> list:
+        """
+        Normalized services containing the query, sorted: short queries are one posting
+        lookup, longer ones intersect the postings of their trigrams and verify the candidates.
+        """
+        q = _normalize_service(query)
+        if not q:
+            return []
+        if len(q) <= SERVICE_NGRAM:
+            return [key for key, in self.conn.execute(
+                "SELECT service_key FROM service_ngram WHERE ngram = ? ORDER BY service_key", (q,)
+            )]
+        trigrams = sorted({q[i:i + SERVICE_NGRAM] for i in range(len(q) - SERVICE_NGRAM + 1)})
+        candidates = self.conn.execute(
+            f"SELECT service_key FROM service_ngram WHERE ngram IN ({','.join('?' * len(trigrams))}) "
+            "GROUP BY service_key HAVING COUNT(*) = ? ORDER BY service_key",
+            [*trigrams, len(trigrams)],
+        )
+        return [key for key, in candidates if q in key]
+
+    def search_service(self, query: str, offset: int, limit: int) -> tuple[int, list]:
+        """
+        Total count and one page of CI rows whose normalized service contains the query,
+        ordered by service then name. Matching services come from the n-gram postings; CIs
+        are counted and paged per service through the (service_key, name_key) index.
+        """
+        total = 0
+        page = []
+        for service in self.match_services(query):
+            count = self.conn.execute("SELECT COUNT(*) FROM ci WHERE service_key = ?", (service,)).fetchone()[0]
+            start, total = total, total + count
+            if total <= offset or len(page) >= limit:
+                continue
+            page.extend(json.loads(row) for row, in self.conn.execute(
+                "SELECT row FROM ci WHERE service_key = ? ORDER BY name_key LIMIT ? OFFSET ?",
+                (service, limit - len(page), max(0, offset - start)),
+            ))
+        return total, page
+
+    def service_stats(self) -> dict:
+        return {
+            "source": "snapshot",
+            "assets": self.conn.execute("SELECT COUNT(*) FROM ci").fetchone()[0],
+            "services": self.conn.execute("SELECT COUNT(DISTINCT service_key) FROM ci").fetchone()[0],
+            "ngrams": self.conn.execute("SELECT COUNT(DISTINCT ngram) FROM service_ngram").fetchone()[0],
+        }
+
+    # "upstream" follows what a CI depends on (rel parents), "downstream" what depends on it
+    _EDGE_COLUMNS = {"upstream": ("child", "parent", "depends_on"), "downstream": ("parent", "child", "used_by")}
+
+    def traverse(self, sys_id: str, direction: str, max_depth: int) -> list:
+        """
+        Transitive closure over rel with a recursive CTE, limited to CIs in the snapshot:
+        [{"hostname", "depth", "via"}] nearest first. Each CI is reported at its shortest depth,
+        via a CI one level closer.
+        """
+        near, far, _ = self._EDGE_COLUMNS[direction]
+        rows = self.conn.execute(f"""
+            WITH RECURSIVE walk(sys_id, depth) AS (
+                SELECT ?, 0
+                UNION
+                SELECT r.{far}, w.depth + 1
+                FROM walk w JOIN rel r ON r.{near} = w.sys_id JOIN ci ON ci.sys_id = r.{far}
+                WHERE w.depth < ?
+            ),
+            nearest AS (SELECT sys_id, MIN(depth) AS depth FROM walk GROUP BY sys_id)
+            SELECT c.name, n.depth, MIN(vc.name)
+            FROM nearest n
+            JOIN ci c ON c.sys_id = n.sys_id
+            JOIN rel r ON r.{far} = n.sys_id
+            JOIN nearest v ON v.sys_id = r.{near} AND v.depth = n.depth - 1
+            JOIN ci vc ON vc.sys_id = v.sys_id
+            WHERE n.depth > 0
+            GROUP BY n.sys_id
+            ORDER BY n.depth, c.name
+        """, (sys_id, max_depth)).fetchall()
+        return [{"hostname": name, "depth": depth, "via": via} for name, depth, via in rows]
+
+    def neighbors(self, sys_ids: list, direction: str) -> list:
+        """(sys_id, neighbor sys_id, neighbor name, relation) for rel edges leaving sys_ids between snapshot CIs"""
+        directions = self._EDGE_COLUMNS if direction == "both" else [direction]
+        edges = []
+        for d in directions:
+            near, far, relation = self._EDGE_COLUMNS[d]
+            for start in range(0, len(sys_ids), 500):
+                chunk = sys_ids[start:start + 500]
+                edges.extend(self.conn.execute(
+                    f"SELECT r.{near}, r.{far}, ci.name, '{relation}' FROM rel r JOIN ci ON ci.sys_id = r.{far} "
+                    f"WHERE r.{near} IN ({','.join('?' * len(chunk))}) AND r.{near} != r.{far} ORDER BY ci.name",
+                    chunk,
+                ))
+        return edges
+
+    def counts(self) -> dict:
+        return {
+            "cis": self.conn.execute("SELECT COUNT(*) FROM ci").fetchone()[0],
+            "relationships": self.conn.execute("SELECT COUNT(*) FROM rel").fetchone()[0],
+        }
+
+
+class DependencyGraph:
+    """
+    In-memory CI relationship graph for the mock CMDB, with adjacency lists in both directions.
+    "upstream" follows what a CI depends on (cmdb_rel_ci parents, mock "dependencies");
+    "downstream" follows what depends on it. Nodes are keyed by lowercased CI name.
+    Traversals and paths are memoized; a rebuilt graph starts with an empty memo.
+    """
+
+    DIRECTIONS = ("upstream", "downstream")
+
+    def __init__(self):
+        self.names: dict[str, str] = {}
+        self.upstream: dict[str, set] = {}
+        self.downstream: dict[str, set] = {}
+        self.built_at = time.time()
+        self._memo: dict[tuple, Any] = {}
+        self.memo_hits = 0
+        self.memo_misses = 0
+
+    @staticmethod
+    def key(name: str) -> str:
+        return name.strip().lower()
+
+    def add_node(self, name: str) -> Optional[str]:
+        if not name:
+            return None
+        k = self.key(name)
+        self.names.setdefault(k, name)
+        self.upstream.setdefault(k, set())
+        self.downstream.setdefault(k, set())
+        return k
+
+    def add_dependency(self, ci: str, depends_on: str):
+        a, b = self.add_node(ci), self.add_node(depends_on)
+        if a and b and a != b:
+            self.upstream[a].add(b)
+            self.downstream[b].add(a)
+
+    def __contains__(self, name: str) -> bool:
+        return self.key(name) in self.names
+
+    def traverse(self, name: str, direction: str, max_depth: int) -> list:
+        """Breadth-first transitive closure: [{"hostname", "depth", "via"}] nearest first"""
+        start = self.key(name)
+        memo_key = ("traverse", start, direction, max_depth)
+        if memo_key in self._memo:
+            self.memo_hits += 1
+            return self._memo[memo_key]
+        self.memo_misses += 1
+
+        adjacency = self.upstream if direction == "upstream" else self.downstream
+        seen = {start}
+        queue = deque([(start, 0)])
+        found = []
+        while queue:
+            node, depth = queue.popleft()
+            if depth >= max_depth:
+                continue
+            for nxt in sorted(adjacency.get(node, ())):
+                if nxt in seen:
+                    continue
+                seen.add(nxt)
+                found.append({"hostname": self.names[nxt], "depth": depth + 1, "via": self.names[node]})
+                queue.append((nxt, depth + 1))
+        self._memo[memo_key] = found
+        return found
+
+    def shortest_path(self, source: str, target: str) -> Optional[list]:
+        """
+        Shortest relationship path between two CIs, following edges in either direction.
+        Returns [{"hostname", "relation"}] hops (relation of each hop to the previous CI) or None.
+        """
+        src, dst = self.key(source), self.key(target)
+        memo_key = ("path", src, dst)
+        if memo_key in self._memo:
+            self.memo_hits += 1
+            return self._memo[memo_key]
+        self.memo_misses += 1
+
+        path = None
+        if src in self.names and dst in self.names:
+            previous = {src: None}
+            queue = deque([src])
+            while queue and dst not in previous:
+                node = queue.popleft()
+                for relation, adjacency in (("depends_on", self.upstream), ("used_by", self.downstream)):
+                    for nxt in sorted(adjacency[node]):
+                        if nxt not in previous:
+                            previous[nxt] = (node, relation)
+                            queue.append(nxt)
+            if dst in previous:
+                path = []
+                node = dst
+                while previous[node] is not None:
+                    prev, relation = previous[node]
+                    path.append({"hostname": self.names[node], "relation": relation})
+                    node = prev
+                path.append({"hostname": self.names[src], "relation": "source"})
+                path.reverse()
+        self._memo[memo_key] = path
+        return path
+
+    def stats(self) -> dict:
+        return {
+            "nodes": len(self.names),
+            "edges": sum(len(v) for v in self.upstream.values()),
+            "built_at": datetime.fromtimestamp(self.built_at).isoformat(),
+            "memo_entries": len(self._memo),
+            "memo_hits": self.memo_hits,
+            "memo_misses": self.memo_misses,
+        }
+
+
+class RoutingTable:
+    """
+    In-memory alias -> CI routing for the mock CMDB, or for ServiceNow when no snapshot is
+    loaded, with the same rules as the snapshot's alias table: exact aliases win over short
+    names, and a short name shared by several CIs is ambiguous and left unrouted.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.routes: dict[str, dict] = {}
+        self.kinds: dict[str, str] = {}
+        self.ambiguous: set = set()
+        self.loaded_at = time.time()
+        self.hits = {kind: 0 for kind in ALIAS_KINDS}
+        self.misses = 0
+
+    def add(self, route: dict, fqdn: Optional[str] = None):
+        """Index a CI route ({"hostname", "owner_team", ...}) under all of its aliases"""
+        for alias, kind in _route_aliases(route.get("hostname"), fqdn, route.get("ip")):
+            existing = self.routes.get(alias)
+            if existing is route:
+                continue
+            if kind != "short_name":
+                # Exact aliases (name, FQDN, IP) win over short names; the first CI keeps a duplicate
+                if existing is None or self.kinds[alias] == "short_name":
+                    self.routes[alias] = route
+                    self.kinds[alias] = kind
+            elif existing is None and alias not in self.ambiguous:
+                self.routes[alias] = route
+                self.kinds[alias] = kind
+            elif existing is not None and self.kinds[alias] == "short_name":
+                del self.routes[alias]
+                del self.kinds[alias]
+                self.ambiguous.add(alias)
+
+    def resolve(self, name: str) -> Optional[dict]:
+        key = _normalize_alias(name)
+        route = self.routes.get(key)
+        kind = self.kinds.get(key)
+        if route is None and "." in key and not _is_ip(key):
+            short = key.split(".", 1)[0]
+            route, kind = self.routes.get(short), "short_name"
+        if route is None:
+            self.misses += 1
+            return None
+        self.hits[kind] += 1
+        return route
+
+    def stats(self) -> dict:
+        lookups = sum(self.hits.values()) + self.misses
+        return {
+            "source": self.source,
+            "cis": len({id(r) for r in self.routes.values()}),
+            "aliases": len(self.routes),
+            "ambiguous_aliases": len(self.ambiguous),
+            "loaded_at": datetime.fromtimestamp(self.loaded_at).isoformat(),
+            "hits_by_alias": dict(self.hits),
+            "misses": self.misses,
+            "hit_rate": round(sum(self.hits.values()) / lookups, 3) if lookups else 0.0,
+        }
+
+
+class ServiceIndex:
+    """
+    Service name -> asset index for search_by_service over the mock CMDB.
+    Service names are normalized (lowercase, single spaces) and indexed by every
+    1-3 character n-gram: short queries are a single posting lookup, longer ones
+    intersect their trigrams and verify the candidates. Each service maps to the
+    set of hosts running it.
+    """
+
+    NGRAM = SERVICE_NGRAM
+
+    def __init__(self):
+        self.assets: dict[str, dict] = {}
+        self.hosts_by_service: dict[str, set] = {}
+        self.display_names: dict[str, str] = {}
+        self.ngrams: dict[str, set] = {}
+        self.built_at = time.time()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return _normalize_service(text)
+
+    def add(self, asset: dict):
+        hostname = asset.get("hostname")
+        service = self.normalize(asset.get("service"))
+        if not hostname or not service:
+            return
+        host_key = hostname.lower()
+        self.assets[host_key] = {
+            "hostname": hostname,
+            "service": asset.get("service"),
+            "owner_team": asset.get("owner_team"),
+            "environment": asset.get("environment"),
+            "criticality": asset.get("criticality"),
+        }
+        if service not in self.hosts_by_service:
+            self.hosts_by_service[service] = set()
+            self.display_names[service] = asset.get("service")
+            for ngram in _service_ngrams(service):
+                self.ngrams.setdefault(ngram, set()).add(service)
+        self.hosts_by_service[service].add(host_key)
+
+    def match_services(self, query: str) -> list:
+        """Normalized service names containing the query, sorted"""
+        q = self.normalize(query)
+        if not q:
+            return []
+        if len(q) <= self.NGRAM:
+            return sorted(self.ngrams.get(q, ()))
+
+        candidates = None
+        for i in range(len(q) - self.NGRAM + 1):
+            postings = self.ngrams.get(q[i:i + self.NGRAM])
+            if not postings:
+                return []
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates:
+                return []
+        return sorted(svc for svc in candidates if q in svc)
+
+    def search(self, query: str, offset: int, limit: int) -> tuple[int, list]:
+        """Total match count and one page of assets, ordered by service then hostname"""
+        total = 0
+        page = []
+        for service in self.match_services(query):
+            hosts = self.hosts_by_service[service]
+            start, total = total, total + len(hosts)
+            # Only services overlapping the requested page are sorted and materialized
+            if total <= offset or len(page) >= limit:
+                continue
+            skip = max(0, offset - start)
+            for host in sorted(hosts)[skip:skip + limit - len(page)]:
+                page.append(self.assets[host])
+        return total, page
+
+    def stats(self) -> dict:
+        return {
+            "assets": len(self.assets),
+            "services": len(self.hosts_by_service),
+            "ngrams": len(self.ngrams),
+            "built_at": datetime.fromtimestamp(self.built_at).isoformat(),
+        }
+
+
 class CMDBMCPServer:
     def __init__(self):
         self.server = Server("cmdb-server")
+        self.asset_cache = AssetCache()
+        self._http: Optional[aiohttp.ClientSession] = None
+        self.snapshot = CMDBSnapshot() if CMDB_SNAPSHOT_ENABLED and not USE_MOCK_CMDB else None
+        self._snapshot_lock = asyncio.Lock()
+        self._lease_holder = f"{os.getpid()}:{id(self):x}"
+        self.dep_graph: Optional[DependencyGraph] = None
+        self.service_index: Optional[ServiceIndex] = None
+        # (sys_id, days, date) -> incident history; the date in the key expires entries daily
+        self.incident_history_cache: OrderedDict = OrderedDict()
+        self.routing: Optional[RoutingTable] = None
+        self._routing_task: Optional[asyncio.Task] = None
         self.setup_tools()
 
         # Mock CMDB database
@@ -80,37 +962,355 @@ class CMDBMCPServer:
 
 
     def _session(self) -> aiohttp.ClientSession:
-        auth = aiohttp.BasicAuth(CMDB_USERNAME, CMDB_PASSWORD) if CMDB_USERNAME or CMDB_PASSWORD else None
-        return aiohttp.ClientSession(auth=auth, timeout=HTTP_TIMEOUT, headers=HEADERS)
+        """Return the process-wide ServiceNow session, creating it on first use"""
+        if self._http is None or self._http.closed:
+            auth = aiohttp.BasicAuth(CMDB_USERNAME, CMDB_PASSWORD) if CMDB_USERNAME or CMDB_PASSWORD else None
+            connector = aiohttp.TCPConnector(
+                limit=CMDB_POOL_SIZE,
+                limit_per_host=CMDB_POOL_PER_HOST,
+                keepalive_timeout=CMDB_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=CMDB_DNS_CACHE_TTL,
+                enable_cleanup_closed=True,
+            )
+            self._http = aiohttp.ClientSession(auth=auth, timeout=HTTP_TIMEOUT, headers=HEADERS, connector=connector)
+        return self._http
+
+    async def close(self):
+        """Stop the routing refresh and close the pooled ServiceNow session"""
+        if self._routing_task is not None:
+            self._routing_task.cancel()
+            self._routing_task = None
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+        self._http = None
 
     async def _sn_get(self, path: str, params: Optional[dict] = None) -> dict:
         if not CMDB_API_URL:
             raise RuntimeError("CMDB_API_URL is not set")        
                 
-        async with self._session() as session:
-            url = f"{CMDB_API_URL}{path}"
-            async with session.get(url, params=params) as r:
-                try:
-                    text = await r.text()                 
-                    if r.status >= 400:
-                        raise RuntimeError(f"GET {url} failed {r.status}: {text}")
-                    return json.loads(text)
-                except Exception as e:
-                    raise RuntimeError(f"Error parsing JSON from {url}: {e}")
+        url = f"{CMDB_API_URL}{path}"
+        async with self._session().get(url, params=params) as r:
+            try:
+                text = await r.text()                 
+                if r.status >= 400:
+                    raise RuntimeError(f"GET {url} failed {r.status}: {text}")
+                return json.loads(text)
+            except Exception as e:
+                raise RuntimeError(f"Error parsing JSON from {url}: {e}")
 
     async def _sn_post(self, path: str, payload: dict) -> dict:
         if not CMDB_API_URL:
             raise RuntimeError("CMDB_API_URL is not set")
-        async with self._session() as session:
-            url = f"{CMDB_API_URL}{path}"
-            async with session.post(url, json=payload) as r:
-                text = await r.text()
-                if r.status >= 400:
-                    raise RuntimeError(f"POST {url} failed {r.status}: {text}")
-                return json.loads(text)
+        url = f"{CMDB_API_URL}{path}"
+        async with self._session().post(url, json=payload) as r:
+            text = await r.text()
+            if r.status >= 400:
+                raise ServiceNowError("POST", url, r.status, text)
+            return json.loads(text)
 
    
 
+    # ---------------- Snapshot sync ----------------
+
+    def _snapshot_ready(self) -> bool:
+        return self.snapshot is not None and self.snapshot.loaded
+
+    def _snapshot_age(self) -> Optional[float]:
+        return self.snapshot.age_seconds() if self.snapshot is not None else None
+
+    async def sync_snapshot(self, full: bool = False) -> dict:
+        """
+        Refresh the local snapshot: a paginated full load on first use, when forced, or once the
+        last full load is older than CMDB_SNAPSHOT_FULL_RELOAD_HOURS; otherwise a delta sync of
+        rows updated since each table's watermark. Only the holder of the snapshot file's sync
+        lease runs, so several server processes sharing the file do not repeat the same load.
+        """
+        if self.snapshot is None:
+            raise RuntimeError("CMDB snapshot is not enabled")
+        async with self._snapshot_lock:
+            if not self.snapshot.acquire_lease(self._lease_holder, CMDB_SNAPSHOT_LEASE_SECONDS):
+                return {"mode": "skipped", "reason": "sync running in another process", **self.snapshot.counts()}
+            try:
+                return await self._sync_snapshot_pages(full)
+            finally:
+                self.snapshot.release_lease(self._lease_holder)
+
+    async def _sync_snapshot_pages(self, full: bool) -> dict:
+        """
+        A full load stamps rows with a new generation and drops older ones at the end. Pages are
+        committed as they arrive, and an interrupted full load resumes with its generation from
+        the table watermarks on the next run.
+        """
+        resuming = self.snapshot.get_meta("full_generation")
+        full_age = self.snapshot.full_load_age_hours()
+        if full or (resuming is None and (full_age is None or full_age >= CMDB_SNAPSHOT_FULL_RELOAD_HOURS)):
+            generation = int(self.snapshot.get_meta("generation") or 0) + 1
+            self.snapshot.set_meta("full_generation", generation)
+            self.snapshot.delete_meta("ci_watermark")
+            self.snapshot.delete_meta("rel_watermark")
+            self.snapshot.commit()
+            full = True
+        elif resuming is not None:
+            generation = int(resuming)
+            full = True
+        else:
+            generation = int(self.snapshot.get_meta("generation") or 0)
+        started = time.monotonic()
+
+        ci_rows = await self._sync_table(
+            "cmdb_ci_server", "ci_watermark", generation,
+            {"sysparm_display_value": "all"}, self.snapshot.upsert_cis,
+        )
+        rel_rows = await self._sync_table(
+            "cmdb_rel_ci", "rel_watermark", generation,
+            {"sysparm_fields": "sys_id,parent,child,type,sys_updated_on", "sysparm_exclude_reference_link": "true"},
+            self.snapshot.upsert_rels,
+        )
+
+        now = time.time()
+        if full:
+            self.snapshot.drop_older_than(generation)
+            self.snapshot.set_meta("last_full_load", now)
+            self.snapshot.set_meta("generation", generation)
+            self.snapshot.delete_meta("full_generation")
+        self.snapshot.set_meta("last_sync", now)
+        self.snapshot.commit()
+        self.asset_cache.invalidate()
+
+        result = {
+            "mode": ("resumed full" if resuming is not None else "full") if full else "delta",
+            "ci_rows": ci_rows,
+            "relationship_rows": rel_rows,
+            "duration_seconds": round(time.monotonic() - started, 3),
+            **self.snapshot.counts(),
+        }
+        logger.info(f"CMDB snapshot sync: {result}")
+        return result
+
+    async def _sync_table(self, table: str, watermark_key: str, generation: int, extra_params: dict, upsert) -> int:
+        """
+        Page through one table in (sys_updated_on, sys_id) order from the watermark into the
+        snapshot, committing each page with the watermark. Rows at the watermark's own second
+        are matched with >= and de-duplicated by sys_id, so rows sharing a timestamp are neither
+        lost nor read twice, and no offset is needed while rows change underneath.
+        """
+        stored = self.snapshot.get_meta(watermark_key)
+        watermark, last_id = stored.split("|", 1) if stored and "|" in stored else (stored, "")
+        total = 0
+        while True:
+            query = "ORDERBYsys_updated_on^ORDERBYsys_id"
+            if watermark and last_id:
+                query = f"sys_updated_on>={watermark}^sys_id>{last_id}^NQsys_updated_on>{watermark}^{query}"
+            elif watermark:
+                query = f"sys_updated_on>={watermark}^{query}"
+            data = await self._sn_get(
+                f"/api/now/table/{table}",
+                {"sysparm_query": query, "sysparm_limit": str(CMDB_SNAPSHOT_PAGE_SIZE), **extra_params},
+            )
+            rows = data.get("result", [])
+            if rows:
+                upsert(rows, generation)
+                total += len(rows)
+                watermark = CMDBSnapshot._ref(rows[-1].get("sys_updated_on"))
+                last_id = CMDBSnapshot._ref(rows[-1].get("sys_id"))
+                self.snapshot.set_meta(watermark_key, f"{watermark}|{last_id}")
+            self.snapshot.commit()
+            if len(rows) < CMDB_SNAPSHOT_PAGE_SIZE:
+                return total
+            if not self.snapshot.acquire_lease(self._lease_holder, CMDB_SNAPSHOT_LEASE_SECONDS):
+                raise RuntimeError("CMDB snapshot sync lease was taken over by another process")
+
+    # ---------------- Dependency graph ----------------
+
+    def _dependency_graph(self) -> DependencyGraph:
+        """The mock relationship graph, built on first use"""
+        if self.dep_graph is None:
+            graph = DependencyGraph()
+            for hostname, asset in self.cmdb_data.items():
+                graph.add_node(hostname)
+                for dep in asset.get("dependencies", []):
+                    graph.add_dependency(hostname, dep)
+            self.dep_graph = graph
+        return self.dep_graph
+
+    async def _neighbors(self, sys_ids: list, direction: str) -> list:
+        """
+        (sys_id, neighbor sys_id, neighbor name, relation) for the relationships of sys_ids:
+        indexed snapshot queries when loaded, else one cmdb_rel_ci query per chunk and direction.
+        """
+        if self._snapshot_ready():
+            return self.snapshot.neighbors(sys_ids, direction)
+        directions = CMDBSnapshot._EDGE_COLUMNS if direction == "both" else [direction]
+        requests = [
+            (CMDBSnapshot._EDGE_COLUMNS[d], chunk)
+            for d in directions
+            for chunk in self._chunk_names(sys_ids)
+        ]
+        results = await asyncio.gather(
+            *(
+                self._sn_get(
+                    "/api/now/table/cmdb_rel_ci",
+                    {
+                        "sysparm_query": f"{near}IN" + ",".join(chunk),
+                        "sysparm_fields": "parent,child",
+                        "sysparm_display_value": "all",
+                        "sysparm_exclude_reference_link": "true",
+                    },
+                )
+                for (near, _, _), chunk in requests
+            )
+        )
+        edges = []
+        for ((near, far, relation), _), data in zip(requests, results):
+            for row in data.get("result", []):
+                a, b = row.get(near) or {}, row.get(far) or {}
+                if a.get("value") and b.get("value") and a["value"] != b["value"]:
+                    edges.append((a["value"], b["value"], b.get("display_value"), relation))
+        edges.sort(key=lambda edge: edge[2] or "")
+        return edges
+
+    async def _traverse(self, sys_id: str, hostname: str, direction: str, max_depth: int) -> list:
+        """Transitive closure from one CI: a recursive CTE on the snapshot, else one live query round per level"""
+        if self._snapshot_ready():
+            return self.snapshot.traverse(sys_id, direction, max_depth)
+        names = {sys_id: hostname}
+        frontier = [sys_id]
+        found = []
+        for depth in range(1, max_depth + 1):
+            if not frontier:
+                break
+            next_frontier = []
+            for source, target, name, _ in await self._neighbors(frontier, direction):
+                if target in names:
+                    continue
+                names[target] = name
+                next_frontier.append(target)
+                found.append({"hostname": name, "depth": depth, "via": names[source]})
+            frontier = next_frontier
+        return found
+
+    async def _shortest_path(self, source_id: str, source: str, target_id: str) -> Optional[list]:
+        """
+        Shortest relationship path (edges in either direction, at most CMDB_GRAPH_MAX_DEPTH hops),
+        expanding one level per neighbor query. Returns [{"hostname", "relation"}] hops or None.
+        """
+        previous = {source_id: None}
+        names = {source_id: source}
+        frontier = [source_id]
+        for _ in range(CMDB_GRAPH_MAX_DEPTH):
+            if not frontier or target_id in previous:
+                break
+            next_frontier = []
+            for node, neighbor, name, relation in await self._neighbors(frontier, "both"):
+                if neighbor not in previous:
+                    previous[neighbor] = (node, relation)
+                    names[neighbor] = name
+                    next_frontier.append(neighbor)
+            frontier = next_frontier
+        if target_id not in previous:
+            return None
+        path = []
+        node = target_id
+        while previous[node] is not None:
+            prev, relation = previous[node]
+            path.append({"hostname": names[node], "relation": relation})
+            node = prev
+        path.append({"hostname": source, "relation": "source"})
+        path.reverse()
+        return path
+
+    # ---------------- Routing table ----------------
+
+    def _canonical_hostname(self, hostname: str) -> str:
+        """Map an alias (FQDN, short name, IP, any case) to the mock CI name it routes to; unchanged on a miss"""
+        routing = self._routing()
+        if routing is None:
+            return hostname
+        route = routing.resolve(hostname)
+        return route["hostname"] if route else hostname
+
+    def _snapshot_route(self, hostname: str) -> Optional[dict]:
+        """CI row an alias routes to through the snapshot's alias table; None on a miss or without a snapshot"""
+        if not (CMDB_ROUTING_ENABLED and self._snapshot_ready()):
+            return None
+        return self.snapshot.resolve_alias(hostname)
+
+    def _resolve_alias(self, hostname: str) -> Optional[str]:
+        """
+        Canonical CI name for a live lookup, through the snapshot's alias table or else the live
+        routing table. None when either (a full copy of the CI table) has no route, so the caller
+        can skip a ServiceNow round trip that would miss. Before the live table has loaded the
+        name is only normalized (case, trailing dot).
+        """
+        if not CMDB_ROUTING_ENABLED:
+            return hostname
+        if self._snapshot_ready():
+            ci = self.snapshot.resolve_alias(hostname)
+            return ci.get("name") if ci else None
+        if self.routing is not None:
+            route = self.routing.resolve(hostname)
+            return route["hostname"] if route else None
+        return _normalize_alias(hostname) or hostname
+
+    def _routing(self) -> Optional[RoutingTable]:
+        """The routing table: the mock one is built on first use, the live one by the refresh loop"""
+        if self.routing is None and CMDB_ROUTING_ENABLED and USE_MOCK_CMDB:
+            routing = RoutingTable("mock")
+            for hostname, asset in self.cmdb_data.items():
+                routing.add({"hostname": hostname, "ip": asset.get("ip"), "owner_team": asset.get("owner_team")})
+            self.routing = routing
+        return self.routing
+
+    async def _load_routing_live(self) -> RoutingTable:
+        """Page through cmdb_ci_server by sys_id, fetching only the routing columns"""
+        routing = RoutingTable("servicenow")
+        last_sys_id = None
+        while True:
+            data = await self._sn_get(
+                "/api/now/table/cmdb_ci_server",
+                {
+                    "sysparm_query": (f"sys_id>{last_sys_id}^" if last_sys_id else "") + "ORDERBYsys_id",
+                    "sysparm_fields": "sys_id,name,fqdn,ip_address",
+                    "sysparm_exclude_reference_link": "true",
+                    "sysparm_limit": str(CMDB_SNAPSHOT_PAGE_SIZE),
+                },
+            )
+            rows = data.get("result", [])
+            for ci in rows:
+                routing.add({"hostname": ci.get("name"), "sys_id": ci.get("sys_id"), "ip": ci.get("ip_address")}, ci.get("fqdn"))
+            if len(rows) < CMDB_SNAPSHOT_PAGE_SIZE:
+                return routing
+            last_sys_id = rows[-1].get("sys_id")
+
+    async def _routing_refresh_loop(self):
+        """
+        Load the live routing table at startup and rebuild it periodically, swapping the new table
+        in whole. Skipped while a snapshot is loaded, since its alias table routes instead.
+        """
+        while True:
+            try:
+                if self._snapshot_ready():
+                    self.routing = None
+                else:
+                    routing = await self._load_routing_live()
+                    self.routing = routing
+                    logger.info(f"Routing table loaded: {routing.stats()}")
+            except Exception as e:
+                logger.error(f"Routing table refresh failed: {e}")
+            await asyncio.sleep(CMDB_ROUTING_REFRESH_INTERVAL)
+
+    # ---------------- Service index ----------------
+
+    def _service_index(self) -> ServiceIndex:
+        """The mock service index, built on first use"""
+        if self.service_index is None:
+            index = ServiceIndex()
+            for asset in self.cmdb_data.values():
+                index.add(asset)
+            self.service_index = index
+            logger.info(f"Service index built: {self.service_index.stats()}")
+        return self.service_index
+
     def setup_tools(self):
         """Register available tools"""
 
@@ -126,7 +1326,8 @@ class CMDBMCPServer:
                             "hostname": {
                                 "type": "string",
                                 "description": "Hostname of the asset",
-                            }
+                            },
+                            "fields": FIELDS_SCHEMA,
                         },
                         "required": ["hostname"],
                     },
@@ -140,7 +1341,8 @@ class CMDBMCPServer:
                             "hostname": {
                                 "type": "string",
                                 "description": "Hostname of the asset",
-                            }
+                            },
+                            "fields": FIELDS_SCHEMA,
                         },
                         "required": ["hostname"],
                     },
@@ -154,7 +1356,8 @@ class CMDBMCPServer:
                             "hostname": {
                                 "type": "string",
                                 "description": "Hostname of the asset",
-                            }
+                            },
+                            "fields": FIELDS_SCHEMA,
                         },
                         "required": ["hostname"],
                     },
@@ -174,6 +1377,7 @@ class CMDBMCPServer:
                                 "description": "Number of days to look back",
                                 "default": 30,
                             },
+                            "fields": FIELDS_SCHEMA,
                         },
                         "required": ["hostname"],
                     },
@@ -186,8 +1390,15 @@ class CMDBMCPServer:
                         "properties": {
                             "service_name": {
                                 "type": "string",
-                                "description": "Service name to search for",
-                            }
+                                "description": "Service name (or part of it) to search for",
+                            },
+                            "offset": {"type": "integer", "description": "Results to skip", "default": 0},
+                            "limit": {
+                                "type": "integer",
+                                "description": "Page size",
+                                "default": CMDB_SEARCH_PAGE_SIZE,
+                            },
+                            "fields": FIELDS_SCHEMA,
                         },
                         "required": ["service_name"],
                     },
@@ -207,6 +1418,92 @@ class CMDBMCPServer:
                         "required": ["hostname", "short_description"],
                     },
                 ),
+                Tool(
+                    name="create_incidents_bulk",
+                    description="Create many ServiceNow incidents in one batch; results are returned in input order with per-item errors",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "incidents": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "hostname": {"type": "string"},
+                                        "short_description": {"type": "string"},
+                                        "description": {"type": "string"},
+                                        "urgency": {"type": "string", "enum": ["1", "2", "3"]},
+                                        "impact": {"type": "string", "enum": ["1", "2", "3"]},
+                                        "correlation_id": {"type": "string", "description": "Idempotency key; an existing incident with it is returned instead of creating another"},
+                                    },
+                                    "required": ["hostname", "short_description"],
+                                },
+                            }
+                        },
+                        "required": ["incidents"],
+                    },
+                ),
+                Tool(
+                    name="get_assets_bulk",
+                    description="Get asset information for many hosts at once; missing hosts are marked explicitly",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "hostnames": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Hostnames of the assets",
+                            },
+                            "fields": FIELDS_SCHEMA,
+                        },
+                        "required": ["hostnames"],
+                    },
+                ),
+                Tool(
+                    name="get_transitive_dependencies",
+                    description="Walk the CI relationship graph transitively: upstream (what the asset depends on) or downstream (blast radius)",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "hostname": {"type": "string", "description": "Hostname of the asset"},
+                            "direction": {
+                                "type": "string",
+                                "enum": ["upstream", "downstream"],
+                                "default": "downstream",
+                            },
+                            "max_depth": {"type": "integer", "description": "Maximum hops to follow", "default": 3},
+                            "fields": FIELDS_SCHEMA,
+                        },
+                        "required": ["hostname"],
+                    },
+                ),
+                Tool(
+                    name="get_dependency_path",
+                    description="Find the shortest relationship path between two CIs (up to CMDB_GRAPH_MAX_DEPTH hops)",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "source": {"type": "string", "description": "Hostname of the first asset"},
+                            "target": {"type": "string", "description": "Hostname of the second asset"},
+                        },
+                        "required": ["source", "target"],
+                    },
+                ),
+                Tool(
+                    name="sync_snapshot",
+                    description="Synchronize the local CMDB snapshot (delta by default, full on request)",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "full": {"type": "boolean", "description": "Force a full reload", "default": False}
+                        },
+                    },
+                ),
+                Tool(
+                    name="get_cache_stats",
+                    description="Get CMDB asset cache statistics (hits, misses, negative entries, evictions)",
+                    inputSchema={"type": "object", "properties": {}},
+                ),
             ]
 
         @self.server.call_tool()
@@ -224,6 +1521,19 @@ class CMDBMCPServer:
                     return await self.search_by_service(arguments)
                 elif name == "create_incident":
                     return await self.create_incident(arguments)
+                elif name == "create_incidents_bulk":
+                    return await self.create_incidents_bulk(arguments)
+                elif name == "get_assets_bulk":
+                    return await self.get_assets_bulk(arguments)
+                elif name == "get_transitive_dependencies":
+                    return await self.get_transitive_dependencies(arguments)
+                elif name == "get_dependency_path":
+                    return await self.get_dependency_path(arguments)
+                elif name == "sync_snapshot":
+                    result = await self.sync_snapshot(bool(arguments.get("full", False)))
+                    return [TextContent(type="text", text=json.dumps(result, indent=2))]
+                elif name == "get_cache_stats":
+                    return await self.get_cache_stats(arguments)
                 else:
                     raise ValueError(f"Unknown tool: {name}")
             except Exception as e:
@@ -237,10 +1547,11 @@ class CMDBMCPServer:
             hostname = args.get("hostname")
             if not hostname:
                 return [TextContent(type="text", text=json.dumps({"error": "hostname is required"}))]
+            fields = self._parse_fields(args)
 
             # MOCK path
             if USE_MOCK_CMDB:
-                asset = self.cmdb_data.get(hostname)
+                asset = self.cmdb_data.get(self._canonical_hostname(hostname))
                 if not asset:
                     asset = {
                         "hostname": hostname,
@@ -252,59 +1563,290 @@ class CMDBMCPServer:
                         "status": "Not found in CMDB",
                         "incident_history": [],
                     }
-                return [TextContent(type="text", text=json.dumps(asset, indent=2))]
-            
-            # ServiceNow path
-            data = await self._sn_get("/api/now/table/cmdb_ci_server", {"name": hostname, "sysparm_limit": "1","sysparm_display_value": "true"})
+                return [TextContent(type="text", text=json.dumps(self._project(asset, fields), separators=COMPACT_JSON))]
             
-            rows = data.get("result", [])
-            if not rows:
+            # ServiceNow path (cached)
+            entry = await self._lookup_ci(hostname)
+            if entry["asset"] is None:
                 asset = {"hostname": hostname, "status": "Not found"}
             else:
-                ci = rows[0]               
-                    
-                asset = {
-                            "hostname": ci.get("name"),
-                            "ip": ci.get("ip_address"),
-                            "owner_team": ci.get("u_owner_team") or ci.get("managed_by_group", {}).get("display_value") or ci.get("owned_by") or "Unassigned",
-                            "environment": ci.get("u_environment") or ci.get("classification") or "Production",
-                            "location": ci.get("location", {}).get("display_value") if isinstance(ci.get("location"), dict) else ci.get("location"),
-                            "criticality": ci.get("u_criticality") or "Medium",
-                            "status": ci.get("operational_status") or "Unknown",
-                            "os_domain": ci.get("os_domain"),
-                            "os_version": ci.get("os_version"),
-                            "internet_facing": ci.get("internet_facing") == "true",
-                            "virtual": ci.get("virtual") == "true",
-                            "serial_number": ci.get("serial_number"),
-                            "asset_tag": ci.get("asset_tag"),
-                            "disk_space": ci.get("disk_space"),
-                            "ram": ci.get("ram"),
-                            "manufacturer": ci.get("manufacturer"),
-                            "model": ci.get("model_id", {}).get("display_value") if isinstance(ci.get("model_id"), dict) else ci.get("model_id"),
-                            "support_group": ci.get("support_group"),
-                            "assignment_group": ci.get("assignment_group"),
-                            "managed_by_group": ci.get("managed_by_group", {}).get("display_value") if isinstance(ci.get("managed_by_group"), dict) else ci.get("managed_by_group"),
-                            "location_region": ci.get("location", {}).get("display_value") if isinstance(ci.get("location"), dict) else None,
-                            "created_on": ci.get("sys_created_on"),
-                            "updated_on": ci.get("sys_updated_on"),
-                            "attestation_status": ci.get("attestation_status"),
-                            "fault_count": ci.get("fault_count"),
-                            "service": (  ci.get("business_service", {}).get("display_value")  if isinstance(ci.get("business_service"), dict)
-                                        else ci.get("business_service")
-                                    )
-                                    or (
-                                        ci.get("service_offering", {}).get("display_value")
-                                        if isinstance(ci.get("service_offering"), dict)
-                                        else ci.get("service_offering")
-                                    )
-                                    or ci.get("u_service")
-                                    or "Unknown",
-                        }  
-            return [TextContent(type="text", text=json.dumps(asset, indent=2))]
+                asset = self._project(entry["asset"], fields)
+                if fields and "dependencies" in fields:
+                    asset = dict(asset, dependencies=(await self._entry_dependencies([entry]))[0])
+            if self.snapshot is not None:
+                asset = dict(asset, snapshot_age_seconds=self._snapshot_age())
+            return [TextContent(type="text", text=json.dumps(asset, separators=COMPACT_JSON))]
         except Exception as e:
             logger.error(f"asset: {e}")            
             return [TextContent(type="text", text=json.dumps({"error": "Error retrieving asset info"}))]
         
+    def _normalize_asset(self, ci: dict) -> dict:
+        """Map a cmdb_ci_server row (display values) to the asset record returned by the tools"""
+        return {
+            "hostname": ci.get("name"),
+            "ip": ci.get("ip_address"),
+            "owner_team": ci.get("u_owner_team") or ci.get("managed_by_group", {}).get("display_value") or ci.get("owned_by") or "Unassigned",
+            "environment": ci.get("u_environment") or ci.get("classification") or "Production",
+            "location": ci.get("location", {}).get("display_value") if isinstance(ci.get("location"), dict) else ci.get("location"),
+            "criticality": ci.get("u_criticality") or "Medium",
+            "status": ci.get("operational_status") or "Unknown",
+            "os_domain": ci.get("os_domain"),
+            "os_version": ci.get("os_version"),
+            "internet_facing": ci.get("internet_facing") == "true",
+            "virtual": ci.get("virtual") == "true",
+            "serial_number": ci.get("serial_number"),
+            "asset_tag": ci.get("asset_tag"),
+            "disk_space": ci.get("disk_space"),
+            "ram": ci.get("ram"),
+            "manufacturer": ci.get("manufacturer"),
+            "model": ci.get("model_id", {}).get("display_value") if isinstance(ci.get("model_id"), dict) else ci.get("model_id"),
+            "support_group": ci.get("support_group"),
+            "assignment_group": ci.get("assignment_group"),
+            "managed_by_group": ci.get("managed_by_group", {}).get("display_value") if isinstance(ci.get("managed_by_group"), dict) else ci.get("managed_by_group"),
+            "location_region": ci.get("location", {}).get("display_value") if isinstance(ci.get("location"), dict) else None,
+            "created_on": ci.get("sys_created_on"),
+            "updated_on": ci.get("sys_updated_on"),
+            "attestation_status": ci.get("attestation_status"),
+            "fault_count": ci.get("fault_count"),
+            "service": _ci_service(ci),
+        }
+
+    @staticmethod
+    def _parse_fields(args: dict) -> Optional[list]:
+        """Read the optional `fields` argument (list or comma-separated string)"""
+        fields = args.get("fields")
+        if isinstance(fields, str):
+            fields = fields.split(",")
+        fields = [f.strip() for f in fields or [] if f and f.strip()]
+        return fields or None
+
+    @staticmethod
+    def _project(record: dict, fields: Optional[list]) -> dict:
+        """Keep only the requested fields of a record (plus its hostname)"""
+        if not fields or not isinstance(record, dict):
+            return record
+        return {k: v for k, v in record.items() if k in fields or k == "hostname"}
+
+    @staticmethod
+    def _sysparm_fields(fields: Optional[list]) -> str:
+        """cmdb_ci_server columns needed to build the requested asset fields"""
+        wanted = fields or ASSET_FIELD_COLUMNS
+        columns = {"sys_id", "name"}
+        for field in wanted:
+            columns.update(ASSET_FIELD_COLUMNS.get(field, []))
+        return ",".join(sorted(columns))
+
+    async def _lookup_ci(self, hostname: str) -> dict:
+        """
+        Resolve a hostname to {"asset", "sys_id"} from the local snapshot when loaded,
+        else through the asset cache. Stale cache entries are served immediately and
+        refreshed in the background; snapshot misses fall through to ServiceNow. Cache
+        misses always load the full asset, so later lookups with any `fields` projection
+        are served from the cache. Aliases are mapped to the CI name through the snapshot
+        alias table first.
+        """
+        name = self._resolve_alias(hostname)
+        if name is None:
+            return {"asset": None, "sys_id": None}
+        hostname = name
+        if self._snapshot_ready():
+            ci = self.snapshot.get_ci_by_name(hostname)
+            if ci is not None:
+                return {"asset": self._normalize_asset(ci), "sys_id": ci.get("sys_id")}
+        entry, state = self.asset_cache.get(hostname)
+        if state == "stale":
+            self.asset_cache.refresh_in_background(hostname, self._load_ci)
+        if entry is not None:
+            return entry
+        return await self._load_ci(hostname)
+
+    async def _load_ci(self, hostname: str) -> dict:
+        """Fetch one CI from ServiceNow and store it (or its absence) in the cache"""
+        data = await self._sn_get(
+            "/api/now/table/cmdb_ci_server",
+            {
+                "name": hostname,
+                "sysparm_limit": "1",
+                "sysparm_display_value": "true",
+                "sysparm_fields": self._sysparm_fields(None),
+            },
+        )
+        rows = data.get("result", [])
+        if not rows:
+            return self.asset_cache.put(hostname, None)
+        return self.asset_cache.put(hostname, self._normalize_asset(rows[0]), rows[0].get("sys_id"))
+
+    async def _entry_dependencies(self, entries: list) -> list:
+        """
+        Dependency names per {"asset", "sys_id"} entry. Entries that do not carry them yet are
+        resolved with one _dependencies_for call and keep the result, so cached CIs answer
+        repeat lookups until the entry itself expires.
+        """
+        pending = [entry for entry in entries if entry.get("dependencies") is None]
+        if pending:
+            deps = await self._dependencies_for([entry["sys_id"] for entry in pending])
+            for entry in pending:
+                entry["dependencies"] = deps.get(entry["sys_id"], [])
+        return [entry["dependencies"] for entry in entries]
+
+    async def _dependencies_for(self, sys_ids: list) -> dict:
+        """Direct dependency (parent CI) names per child sys_id, from the snapshot or one cmdb_rel_ci query per chunk"""
+        deps = {sys_id: [] for sys_id in sys_ids if sys_id}
+        if not deps:
+            return deps
+        if self._snapshot_ready():
+            for sys_id in deps:
+                parent_ids = self.snapshot.parents_of(sys_id)
+                names = self.snapshot.names_for(parent_ids)
+                deps[sys_id] = [names.get(p, p) for p in parent_ids]
+            return deps
+
+        chunks = self._chunk_names(list(deps))
+        results = await asyncio.gather(
+            *(
+                self._sn_get(
+                    "/api/now/table/cmdb_rel_ci",
+                    {
+                        "sysparm_query": "childIN" + ",".join(chunk),
+                        "sysparm_fields": "parent,child",
+                        "sysparm_display_value": "all",
+                        "sysparm_exclude_reference_link": "true",
+                    },
+                )
+                for chunk in chunks
+            )
+        )
+        for data in results:
+            for row in data.get("result", []):
+                child = (row.get("child") or {}).get("value")
+                parent = (row.get("parent") or {}).get("display_value")
+                if child in deps and parent:
+                    deps[child].append(parent)
+        return deps
+
+    async def get_assets_bulk(self, args: dict) -> Sequence[TextContent]:
+        hostnames = list(dict.fromkeys(h for h in args.get("hostnames", []) if h))
+        if not hostnames:
+            return [TextContent(type="text", text=json.dumps({"error": "hostnames is required"}))]
+
+        fields = self._parse_fields(args)
+        assets = {}
+        missing = []
+        queries = 0
+        found_entries = {}
+
+        # MOCK path
+        if USE_MOCK_CMDB:
+            for hostname in hostnames:
+                asset = self.cmdb_data.get(self._canonical_hostname(hostname))
+                if asset is None:
+                    missing.append(hostname)
+                    asset = {"hostname": hostname, "status": "Not found in CMDB"}
+                assets[hostname] = self._project(asset, fields)
+        else:
+            # ServiceNow path: serve what the cache can, one nameIN query per chunk for the rest
+            pending = []
+            ci_names = {}
+            for hostname in hostnames:
+                name = self._resolve_alias(hostname)
+                if name is None:
+                    missing.append(hostname)
+                    assets[hostname] = {"hostname": hostname, "status": "Not found"}
+                    continue
+                ci_names[hostname] = name
+                ci = self.snapshot.get_ci_by_name(name) if self._snapshot_ready() else None
+                if ci is not None:
+                    assets[hostname] = self._project(self._normalize_asset(ci), fields)
+                    found_entries[hostname] = {"asset": assets[hostname], "sys_id": ci.get("sys_id")}
+                    continue
+                entry, state = self.asset_cache.get(name)
+                if state == "stale":
+                    self.asset_cache.refresh_in_background(name, self._load_ci)
+                if entry is None:
+                    pending.append(hostname)
+                elif entry["asset"] is None:
+                    missing.append(hostname)
+                    assets[hostname] = {"hostname": hostname, "status": "Not found"}
+                else:
+                    assets[hostname] = self._project(entry["asset"], fields)
+                    found_entries[hostname] = entry
+
+            # Encoded queries cannot escape "," or "^", so such names are looked up one by one
+            pending_names = list(dict.fromkeys(ci_names[h] for h in pending))
+            singles = [n for n in pending_names if "," in n or "^" in n]
+            chunks = self._chunk_names([n for n in pending_names if n not in singles])
+            results = await asyncio.gather(
+                *(self._load_ci_chunk(chunk) for chunk in chunks),
+                *(self._lookup_ci(n) for n in singles),
+            )
+            queries = len(chunks) + len(singles)
+
+            found = {}
+            for result in results[:len(chunks)]:
+                found.update(result)
+            for name, entry in zip(singles, results[len(chunks):]):
+                found[name.lower()] = entry
+            for hostname in pending:
+                entry = found.get(ci_names[hostname].lower())
+                if entry is None or entry["asset"] is None:
+                    missing.append(hostname)
+                    assets[hostname] = {"hostname": hostname, "status": "Not found"}
+                else:
+                    assets[hostname] = self._project(entry["asset"], fields)
+                    found_entries[hostname] = entry
+
+            if fields and "dependencies" in fields and found_entries:
+                deps = await self._entry_dependencies(list(found_entries.values()))
+                for hostname, dependencies in zip(found_entries, deps):
+                    assets[hostname] = dict(assets[hostname], dependencies=dependencies)
+
+        result = {
+            "requested": len(hostnames),
+            "found": len(hostnames) - len(missing),
+            "missing": missing,
+            "servicenow_queries": queries,
+            "assets": assets,
+        }
+        if self.snapshot is not None:
+            result["snapshot_age_seconds"] = self._snapshot_age()
+        return [TextContent(type="text", text=json.dumps(result, separators=COMPACT_JSON))]
+
+    def _chunk_names(self, hostnames: list) -> list:
+        """Split hostnames into chunks whose comma-joined length stays under CMDB_BULK_QUERY_MAX_CHARS"""
+        chunks, current, length = [], [], 0
+        for hostname in hostnames:
+            if current and length + len(hostname) + 1 > CMDB_BULK_QUERY_MAX_CHARS:
+                chunks.append(current)
+                current, length = [], 0
+            current.append(hostname)
+            length += len(hostname) + 1
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def _load_ci_chunk(self, hostnames: list) -> dict:
+        """Fetch a chunk of CIs with one nameIN query and cache every result, including misses"""
+        data = await self._sn_get(
+            "/api/now/table/cmdb_ci_server",
+            {
+                "sysparm_query": "nameIN" + ",".join(hostnames),
+                "sysparm_display_value": "true",
+                "sysparm_fields": self._sysparm_fields(None),
+                "sysparm_limit": str(len(hostnames) * 2),
+            },
+        )
+        rows = {}
+        for ci in data.get("result", []):
+            rows.setdefault((ci.get("name") or "").lower(), ci)
+        entries = {}
+        for hostname in hostnames:
+            ci = rows.get(hostname.lower())
+            if ci is None:
+                entries[hostname.lower()] = self.asset_cache.put(hostname, None)
+            else:
+                entries[hostname.lower()] = self.asset_cache.put(hostname, self._normalize_asset(ci), ci.get("sys_id"))
+        return entries
+
     def safe_display(self,ci, field):
         val = ci.get(field)
         if isinstance(val, dict):
@@ -318,20 +1860,26 @@ class CMDBMCPServer:
 
         # MOCK path
         if USE_MOCK_CMDB:
-            asset = self.cmdb_data.get(hostname, {})
+            asset = self.cmdb_data.get(self._canonical_hostname(hostname), {})
             result = {
                 "hostname": hostname,
                 "owner_team": asset.get("owner_team", "DevOps"),
                 "service": asset.get("service", "Unknown"),
             }
-            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+            return [TextContent(type="text", text=json.dumps(self._project(result, self._parse_fields(args)), separators=COMPACT_JSON))]
 
-        # ServiceNow path
-        data = await self._sn_get("/api/now/table/cmdb_ci_server", {"name": hostname, "sysparm_limit": "1"})
-        rows = data.get("result", [])
-        owner_team = rows[0].get("u_owner_team") if rows else "Unassigned"
+        # ServiceNow path: the snapshot row the alias routes to carries the owner; otherwise cached,
+        # and a miss only needs the owner columns
+        if CMDB_ROUTING_ENABLED and self._snapshot_ready():
+            ci = self.snapshot.resolve_alias(hostname)
+            owner_team = self._normalize_asset(ci)["owner_team"] if ci else "Unassigned"
+        else:
+            entry = await self._lookup_ci(hostname)
+            owner_team = entry["asset"]["owner_team"] if entry["asset"] else "Unassigned"
         result = {"hostname": hostname, "owner_team": owner_team}
-        return [TextContent(type="text", text=json.dumps(result, indent=2))]
+        if self.snapshot is not None:
+            result["snapshot_age_seconds"] = self._snapshot_age()
+        return [TextContent(type="text", text=json.dumps(result, separators=COMPACT_JSON))]
 
     async def get_dependencies(self, args: dict) -> Sequence[TextContent]:
         hostname = args.get("hostname")
@@ -340,17 +1888,21 @@ class CMDBMCPServer:
 
         # MOCK path
         if USE_MOCK_CMDB:
-            asset = self.cmdb_data.get(hostname, {})
+            asset = self.cmdb_data.get(self._canonical_hostname(hostname), {})
             dependencies = asset.get("dependencies", [])
+            fields = self._parse_fields(args)
             dependency_details = []
             for dep in dependencies:
                 dep_asset = self.cmdb_data.get(dep, {})
                 dependency_details.append(
-                    {
-                        "hostname": dep,
-                        "service": dep_asset.get("service", "Unknown"),
-                        "criticality": dep_asset.get("criticality", "Unknown"),
-                    }
+                    self._project(
+                        {
+                            "hostname": dep,
+                            "service": dep_asset.get("service", "Unknown"),
+                            "criticality": dep_asset.get("criticality", "Unknown"),
+                        },
+                        fields,
+                    )
                 )
             result = {
                 "hostname": hostname,
@@ -360,45 +1912,193 @@ class CMDBMCPServer:
             return [TextContent(type="text", text=json.dumps(result, indent=2))]
 
         # ServiceNow path
-        srv = await self._sn_get("/api/now/table/cmdb_ci_server", {"name": hostname, "sysparm_limit": "1"})
-        rows = srv.get("result", [])
-        if not rows:
+        entry = await self._lookup_ci(hostname)
+        if not entry["sys_id"]:
             return [TextContent(type="text", text=json.dumps({"error": "CI not found"}))]
-        ci = rows[0]
-        rel = await self._sn_get("/api/now/table/cmdb_rel_ci", {"child": ci.get("sys_id"), "sysparm_fields": "parent"})
-        parents = [row["parent"] for row in rel.get("result", []) if row.get("parent")]
+        parents = (await self._dependencies_for([entry["sys_id"]]))[entry["sys_id"]]
         result = {
             "hostname": hostname,
             "total_dependencies": len(parents),
             "dependencies": parents,
         }
+        if self.snapshot is not None:
+            result["snapshot_age_seconds"] = self._snapshot_age()
         return [TextContent(type="text", text=json.dumps(result, indent=2))]
 
-    async def get_incident_history(self, args: dict) -> Sequence[TextContent]:
+    async def get_transitive_dependencies(self, args: dict) -> Sequence[TextContent]:
         hostname = args.get("hostname")
-        days = args.get("days", 30)
+        if not hostname:
+            return [TextContent(type="text", text=json.dumps({"error": "hostname is required"}))]
+        direction = args.get("direction", "downstream")
+        if direction not in DependencyGraph.DIRECTIONS:
+            return [TextContent(type="text", text=json.dumps({"error": f"direction must be one of {DependencyGraph.DIRECTIONS}"}))]
+        max_depth = max(1, min(int(args.get("max_depth", 3)), CMDB_GRAPH_MAX_DEPTH))
 
-        # For now, history stays mock whether using ServiceNow or not
-        asset = self.cmdb_data.get(hostname, {})
-        history = asset.get("incident_history", [])
+        if USE_MOCK_CMDB:
+            graph = self._dependency_graph()
+            hostname_key = self._canonical_hostname(hostname)
+            if hostname_key not in graph:
+                return [TextContent(type="text", text=json.dumps({"error": "CI not found in relationship graph", "hostname": hostname}))]
+            related = graph.traverse(hostname_key, direction, max_depth)
+        else:
+            entry = await self._lookup_ci(hostname)
+            if not entry["sys_id"]:
+                return [TextContent(type="text", text=json.dumps({"error": "CI not found", "hostname": hostname}))]
+            key = ("traverse", entry["sys_id"], direction, max_depth)
+            related = self.asset_cache.get_related(key)
+            if related is None:
+                related = self.asset_cache.put_related(
+                    key, await self._traverse(entry["sys_id"], entry["asset"]["hostname"], direction, max_depth)
+                )
+
+        fields = self._parse_fields(args)
+        related = [self._project(ci, fields) for ci in related]
         result = {
             "hostname": hostname,
-            "period_days": days,
-            "total_incidents": len(history),
-            "incidents": history,
-            "patterns": self._analyze_patterns(history),
+            "direction": direction,
+            "max_depth": max_depth,
+            "total": len(related),
+            "cis": related,
         }
         return [TextContent(type="text", text=json.dumps(result, indent=2))]
 
-    def _analyze_patterns(self, history: list) -> dict:
-        if not history:
+    async def get_dependency_path(self, args: dict) -> Sequence[TextContent]:
+        source, target = args.get("source"), args.get("target")
+        if not source or not target:
+            return [TextContent(type="text", text=json.dumps({"error": "source and target are required"}))]
+
+        if USE_MOCK_CMDB:
+            path = self._dependency_graph().shortest_path(self._canonical_hostname(source), self._canonical_hostname(target))
+        else:
+            source_entry, target_entry = await asyncio.gather(
+                self._lookup_ci(source), self._lookup_ci(target)
+            )
+            missing = [name for name, entry in ((source, source_entry), (target, target_entry)) if not entry["sys_id"]]
+            if missing:
+                return [TextContent(type="text", text=json.dumps({"error": "CI not found", "hostnames": missing}))]
+            key = ("path", source_entry["sys_id"], target_entry["sys_id"])
+            path = self.asset_cache.get_related(key)
+            if path is None:
+                # Unconnected pairs are memoized as an empty path
+                path = self.asset_cache.put_related(
+                    key, await self._shortest_path(source_entry["sys_id"], source_entry["asset"]["hostname"], target_entry["sys_id"]) or []
+                )
+            path = path or None
+        result = {
+            "source": source,
+            "target": target,
+            "connected": path is not None,
+            "hops": len(path) - 1 if path else None,
+            "path": path or [],
+        }
+        return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
+    async def get_incident_history(self, args: dict) -> Sequence[TextContent]:
+        hostname = args.get("hostname")
+        days = int(args.get("days", 30))
+        if not hostname:
+            return [TextContent(type="text", text=json.dumps({"error": "hostname is required"}))]
+
+        if USE_MOCK_CMDB:
+            asset = self.cmdb_data.get(self._canonical_hostname(hostname), {})
+            history = asset.get("incident_history", [])
+            patterns = self._analyze_patterns(Counter(inc["type"] for inc in history))
+            fields = self._parse_fields(args)
+            if fields:
+                history = [{k: v for k, v in inc.items() if k in fields} for inc in history]
+            result = {
+                "hostname": hostname,
+                "period_days": days,
+                "total_incidents": len(history),
+                "incidents": history,
+                "patterns": patterns,
+            }
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
+        # ServiceNow path
+        entry = await self._lookup_ci(hostname)
+        if not entry["sys_id"]:
+            return [TextContent(type="text", text=json.dumps({"error": "CI not found"}))]
+
+        cache_key = (entry["sys_id"], days, date.today().isoformat())
+        cached = self.incident_history_cache.get(cache_key)
+        if cached is None:
+            cached = await self._load_incident_history(entry["sys_id"], days)
+            self.incident_history_cache[cache_key] = cached
+            while len(self.incident_history_cache) > CMDB_INCIDENT_CACHE_MAX_ENTRIES:
+                self.incident_history_cache.popitem(last=False)
+        else:
+            self.incident_history_cache.move_to_end(cache_key)
+
+        result = {"hostname": hostname, "period_days": days, **cached}
+        fields = self._parse_fields(args)
+        if fields:
+            result["incidents"] = [{k: v for k, v in inc.items() if k in fields} for inc in result["incidents"]]
+        return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
+    async def _load_incident_history(self, sys_id: str, days: int) -> dict:
+        """
+        Category counts from the aggregate API plus the most recent incidents for one CI,
+        fetched concurrently; only CMDB_INCIDENT_RECENT_LIMIT rows are ever pulled.
+        """
+        query = f"cmdb_ci={sys_id}^opened_at>=javascript:gs.daysAgoStart({days})"
+        stats, recent = await asyncio.gather(
+            self._sn_get(
+                "/api/now/stats/incident",
+                {
+                    "sysparm_query": query,
+                    "sysparm_count": "true",
+                    "sysparm_group_by": "category",
+                    "sysparm_display_value": "true",
+                },
+            ),
+            self._sn_get(
+                "/api/now/table/incident",
+                {
+                    "sysparm_query": f"{query}^ORDERBYDESCopened_at",
+                    "sysparm_fields": "number,short_description,category,priority,state,opened_at,resolved_at",
+                    "sysparm_display_value": "true",
+                    "sysparm_exclude_reference_link": "true",
+                    "sysparm_limit": str(CMDB_INCIDENT_RECENT_LIMIT),
+                },
+            ),
+        )
+
+        by_category = Counter()
+        for group in stats.get("result", []):
+            fields = group.get("groupby_fields") or [{}]
+            category = fields[0].get("display_value") or fields[0].get("value") or "Uncategorized"
+            by_category[category] += int(group.get("stats", {}).get("count", 0))
+
+        incidents = [
+            {
+                "number": row.get("number"),
+                "date": row.get("opened_at"),
+                "type": row.get("category") or "Uncategorized",
+                "short_description": row.get("short_description"),
+                "priority": row.get("priority"),
+                "state": row.get("state"),
+                "resolved_at": row.get("resolved_at"),
+            }
+            for row in recent.get("result", [])
+        ]
+        return {
+            "total_incidents": sum(by_category.values()),
+            "incidents": incidents,
+            "patterns": self._analyze_patterns(by_category),
+        }
+
+    def _analyze_patterns(self, type_counts: Counter) -> dict:
+        """Recurrence stats from incident counts per type, in one pass over the distinct types"""
+        total = sum(type_counts.values())
+        if not total:
             return {"recurring": False, "common_type": None}
-        types = [inc["type"] for inc in history]
-        most_common = max(set(types), key=types.count) if types else None
+        common_type, _ = type_counts.most_common(1)[0]
         return {
-            "recurring": len(history) > 2,
-            "common_type": most_common,
-            "frequency": f"{len(history)} incidents",
+            "recurring": total > 2,
+            "common_type": common_type,
+            "frequency": f"{total} incidents",
+            "by_type": dict(type_counts),
         }
 
     async def search_by_service(self, args: dict) -> Sequence[TextContent]:
@@ -406,18 +2106,55 @@ class CMDBMCPServer:
         if not service_name:
             return [TextContent(type="text", text=json.dumps({"error": "service_name is required"}))]
 
-        # MOCK-only search (simple contains)
-        matching_assets = [
+        offset = max(0, int(args.get("offset", 0)))
+        limit = max(1, min(int(args.get("limit", CMDB_SEARCH_PAGE_SIZE)), CMDB_SEARCH_MAX_PAGE_SIZE))
+
+        fields = self._parse_fields(args)
+        if USE_MOCK_CMDB:
+            total, assets = self._service_index().search(service_name, offset, limit)
+        elif self._snapshot_ready():
+            total, rows = self.snapshot.search_service(service_name, offset, limit)
+            assets = [
+                {k: asset.get(k) for k in ("hostname", "service", "owner_team", "environment", "criticality")}
+                for asset in map(self._normalize_asset, rows)
+            ]
+        else:
+            total, assets = await self._search_service_live(service_name, offset, limit, fields)
+        assets = [self._project(asset, fields) for asset in assets]
+
+        result = {
+            "service_name": service_name,
+            "offset": offset,
+            "limit": limit,
+            "total": total,
+            "next_offset": offset + len(assets) if total is None or offset + len(assets) < total else None,
+            "assets": assets,
+        }
+        if self.snapshot is not None:
+            result["snapshot_age_seconds"] = self._snapshot_age()
+        return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
+    async def _search_service_live(self, service_name: str, offset: int, limit: int,
+                                   fields: Optional[list] = None) -> tuple[Optional[int], list]:
+        """Server-side LIKE search on business_service when no local index is available"""
+        data = await self._sn_get(
+            "/api/now/table/cmdb_ci_server",
             {
-                "hostname": host,
-                "owner_team": data["owner_team"],
-                "environment": data["environment"],
-                "criticality": data["criticality"],
-            }
-            for host, data in self.cmdb_data.items()
-            if service_name.lower() in data["service"].lower()
-        ]
-        return [TextContent(type="text", text=json.dumps(matching_assets, indent=2))]
+                "sysparm_query": f"business_service.nameLIKE{service_name}^ORDERBYname",
+                "sysparm_display_value": "true",
+                "sysparm_fields": self._sysparm_fields(fields or ["service", "owner_team", "environment", "criticality"]),
+                "sysparm_limit": str(limit + 1),
+                "sysparm_offset": str(offset),
+            },
+        )
+        rows = data.get("result", [])
+        assets = []
+        for ci in rows[:limit]:
+            asset = self._normalize_asset(ci)
+            assets.append({k: asset.get(k) for k in ("hostname", "service", "owner_team", "environment", "criticality")})
+        # Without a count query the total is only known on the last page
+        total = offset + len(rows) if len(rows) <= limit else None
+        return total, assets
 
     async def create_incident(self, args: dict) -> Sequence[TextContent]:
         hostname = args.get("hostname")
@@ -435,10 +2172,8 @@ class CMDBMCPServer:
             return [TextContent(type="text", text=json.dumps(inc, indent=2))]
 
         try:
-            # Resolve CI sys_id
-            srv = await self._sn_get("/api/now/table/cmdb_ci_server", {"name": hostname, "sysparm_limit": "1"})
-            ci_row = srv.get("result", [{}])[0]
-            ci_sys_id = ci_row.get("sys_id")
+            # Resolve CI sys_id (cached)
+            ci_sys_id = (await self._lookup_ci(hostname))["sys_id"]
 
             payload = {
                 "short_description": short_desc,
@@ -457,12 +2192,208 @@ class CMDBMCPServer:
             logger.error(f"Error creating incident: {e}")            
             return [TextContent(type="text", text=json.dumps({"error": str(e)}))]
 
+    async def create_incidents_bulk(self, args: dict) -> Sequence[TextContent]:
+        items = args.get("incidents") or []
+        if not items:
+            return [TextContent(type="text", text=json.dumps({"error": "incidents is required"}))]
+
+        results = [None] * len(items)
+        valid = []
+        for i, item in enumerate(items):
+            if not item.get("hostname") or not item.get("short_description"):
+                results[i] = {"index": i, "hostname": item.get("hostname"), "error": "hostname and short_description are required"}
+            else:
+                valid.append(i)
+
+        requests_made = 0
+        if USE_MOCK_CMDB:
+            for i in valid:
+                results[i] = {"index": i, "hostname": items[i]["hostname"], "incident_number": f"MOCK{12345 + i}", "sys_id": f"mock-sysid-{i}"}
+        elif valid:
+            existing = await self._existing_incidents([items[i]["correlation_id"] for i in valid if items[i].get("correlation_id")])
+            requests_made = 1 if existing is not None else 0
+            for i in list(valid):
+                found = (existing or {}).get(items[i].get("correlation_id"))
+                if found:
+                    results[i] = {"index": i, "hostname": items[i]["hostname"], **found, "existing": True}
+                    valid.remove(i)
+
+            sys_ids, lookups = await self._resolve_sys_ids([items[i]["hostname"] for i in valid])
+            requests_made += lookups
+            payloads = {}
+            for i in valid:
+                item = items[i]
+                payload = {
+                    "short_description": item["short_description"],
+                    "description": item.get("description", f"Incident for {item['hostname']}"),
+                    "urgency": item.get("urgency", "3"),
+                    "impact": item.get("impact", "3"),
+                }
+                if sys_ids.get(item["hostname"].lower()):
+                    payload["cmdb_ci"] = sys_ids[item["hostname"].lower()]
+                if item.get("correlation_id"):
+                    payload["correlation_id"] = item["correlation_id"]
+                payloads[i] = payload
+
+            created, posts = (await self._post_incidents_batch(payloads)) if payloads else ({}, 0)
+            requests_made += posts
+            for i in valid:
+                outcome = created[i]
+                results[i] = {"index": i, "hostname": items[i]["hostname"], **outcome}
+
+        failed = sum(1 for r in results if "error" in r)
+        out = {
+            "requested": len(items),
+            "created": len(items) - failed,
+            "failed": failed,
+            "servicenow_requests": requests_made,
+            "results": results,
+        }
+        return [TextContent(type="text", text=json.dumps(out, indent=2))]
+
+    async def _existing_incidents(self, correlation_ids: list) -> Optional[dict]:
+        """Incidents already created for these correlation ids (one query), or None when none were given"""
+        if not correlation_ids:
+            return None
+        data = await self._sn_get(
+            "/api/now/table/incident",
+            {
+                "sysparm_query": f"correlation_idIN{','.join(correlation_ids)}",
+                "sysparm_fields": "number,sys_id,correlation_id",
+                "sysparm_limit": str(len(correlation_ids)),
+            },
+        )
+        return {
+            row["correlation_id"]: {"incident_number": row.get("number"), "sys_id": row.get("sys_id")}
+            for row in data.get("result", []) if row.get("correlation_id")
+        }
+
+    async def _resolve_sys_ids(self, hostnames: list) -> tuple[dict, int]:
+        """CI sys_id per lowercased hostname: snapshot/cache first, then one nameIN query per chunk"""
+        sys_ids = {}
+        pending = []
+        for hostname in dict.fromkeys(hostnames):
+            ci = self._snapshot_route(hostname)
+            if ci is None and self._snapshot_ready():
+                ci = self.snapshot.get_ci_by_name(hostname)
+            elif ci is None and self.routing is not None:
+                route = self.routing.resolve(hostname)
+                ci = {"sys_id": route["sys_id"]} if route else None
+            if ci is not None:
+                sys_ids[hostname.lower()] = ci.get("sys_id")
+                continue
+            entry, _ = self.asset_cache.get(hostname)
+            if entry is not None:
+                sys_ids[hostname.lower()] = entry["sys_id"]
+            elif "," in hostname or "^" in hostname:
+                sys_ids[hostname.lower()] = (await self._lookup_ci(hostname))["sys_id"]
+            else:
+                pending.append(hostname)
+
+        chunks = self._chunk_names(pending)
+        for entries in await asyncio.gather(*(self._load_ci_chunk(chunk) for chunk in chunks)):
+            for key, entry in entries.items():
+                sys_ids[key] = entry["sys_id"]
+        return sys_ids, len(chunks)
+
+    async def _post_incidents_batch(self, payloads: dict) -> tuple[dict, int]:
+        """
+        Create incidents through the Batch API, CMDB_BATCH_MAX_REQUESTS per call.
+        Returns ({index: {"incident_number", "sys_id"} | {"error"}}, requests made). A chunk the
+        Batch API rejects with 400/403/404 (plugin inactive, missing role) is retried as
+        concurrent table POSTs; other failures (5xx, timeouts) may have created some incidents,
+        so they are reported per item rather than retried, to avoid duplicates.
+        """
+        indexes = list(payloads)
+        chunks = [indexes[i:i + CMDB_BATCH_MAX_REQUESTS] for i in range(0, len(indexes), CMDB_BATCH_MAX_REQUESTS)]
+        responses = await asyncio.gather(
+            *(self._sn_post("/api/now/v1/batch", self._batch_body(chunk, payloads)) for chunk in chunks),
+            return_exceptions=True,
+        )
+        requests_made = len(chunks)
+
+        created = {}
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, ServiceNowError) and response.status in BATCH_FALLBACK_STATUSES:
+                logger.warning(f"Batch API rejected {len(chunk)} incidents, creating them individually: {response}")
+                outcomes = await asyncio.gather(
+                    *(self._sn_post("/api/now/table/incident", payloads[i]) for i in chunk), return_exceptions=True
+                )
+                requests_made += len(chunk)
+                for i, outcome in zip(chunk, outcomes):
+                    if isinstance(outcome, Exception):
+                        created[i] = {"error": str(outcome)}
+                    else:
+                        inc = outcome.get("result", {})
+                        created[i] = {"incident_number": inc.get("number"), "sys_id": inc.get("sys_id")}
+                continue
+            if isinstance(response, Exception):
+                for i in chunk:
+                    created[i] = {"error": f"Batch request failed: {type(response).__name__} {response}"}
+                continue
+
+            for served in response.get("serviced_requests", []):
+                i = int(served["id"])
+                try:
+                    body = json.loads(base64.b64decode(served.get("body") or b"").decode() or "{}")
+                except ValueError:
+                    body = {}
+                if served.get("status_code", 500) >= 400:
+                    error = body.get("error")
+                    message = error.get("message") if isinstance(error, dict) else error
+                    created[i] = {"error": f"HTTP {served.get('status_code')}: {message or served.get('status_text', '')}"}
+                else:
+                    inc = body.get("result", {})
+                    created[i] = {"incident_number": inc.get("number"), "sys_id": inc.get("sys_id")}
+            for i in chunk:
+                created.setdefault(i, {"error": "Request was not serviced by the Batch API"})
+        return created, requests_made
+
+    @staticmethod
+    def _batch_body(indexes: list, payloads: dict) -> dict:
+        headers = [{"name": k, "value": v} for k, v in HEADERS.items()]
+        return {
+            "batch_request_id": f"aitta-{int(time.time() * 1000)}-{indexes[0]}",
+            "rest_requests": [
+                {
+                    "id": str(i),
+                    "method": "POST",
+                    "url": "/api/now/table/incident",
+                    "headers": headers,
+                    "body": base64.b64encode(json.dumps(payloads[i]).encode()).decode(),
+                    "exclude_response_headers": True,
+                }
+                for i in indexes
+            ],
+        }
+
+    async def get_cache_stats(self, args: dict) -> Sequence[TextContent]:
+        stats = self.asset_cache.snapshot_stats()
+        if self.dep_graph is not None:
+            stats["dependency_graph"] = self.dep_graph.stats()
+        if self.service_index is not None:
+            stats["service_index"] = self.service_index.stats()
+        elif self._snapshot_ready():
+            stats["service_index"] = self.snapshot.service_stats()
+        if CMDB_ROUTING_ENABLED and self._snapshot_ready():
+            stats["routing_table"] = self.snapshot.alias_stats()
+        elif self._routing() is not None:
+            stats["routing_table"] = self.routing.stats()
+        return [TextContent(type="text", text=json.dumps(stats, indent=2))]
+
     # ---------------- Run loop (matches your working sample) ----------------
 
     async def run(self):
         """Run the MCP server"""
-        async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(read_stream, write_stream, self.server.create_initialization_options())
+        if not USE_MOCK_CMDB and CMDB_API_URL:
+            self._session()
+            if CMDB_ROUTING_ENABLED:
+                self._routing_task = asyncio.create_task(self._routing_refresh_loop())
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await self.server.run(read_stream, write_stream, self.server.create_initialization_options())
+        finally:
+            await self.close()
 
 def main():
     
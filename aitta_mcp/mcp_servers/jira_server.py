@@ -9,12 +9,19 @@ import json
 from dotenv import load_dotenv
 import os
 import logging
-from datetime import datetime
+import random
+import re
+import sqlite3
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
-from typing import Any, Sequence
-import requests
+from typing import Any, Optional, Sequence
+import aiohttp
 
 load_dotenv() 
 # Configuration - TOKEN ONLY
@@ -23,15 +30,342 @@ JIRA_TOKEN = os.getenv("JIRA_TOKEN", "")  # Required - Personal Access Token
 JIRA_PROJECT_KEY = os.getenv("JIRA_PROJECT_KEY", "KAG")
 USE_MOCK = os.getenv("USE_MOCK_JIRA", "false").lower() == "true"
 
+# Pooled HTTP client
+JIRA_POOL_SIZE = int(os.getenv("JIRA_POOL_SIZE", "20"))
+JIRA_POOL_PER_HOST = int(os.getenv("JIRA_POOL_PER_HOST", "10"))
+JIRA_KEEPALIVE_TIMEOUT = float(os.getenv("JIRA_KEEPALIVE_TIMEOUT", "60"))
+JIRA_TIMEOUTS = {  # Total seconds per request, by endpoint class
+    "read": float(os.getenv("JIRA_READ_TIMEOUT", "10")),
+    "search": float(os.getenv("JIRA_SEARCH_TIMEOUT", "30")),
+    "write": float(os.getenv("JIRA_WRITE_TIMEOUT", "30")),
+}
+JIRA_MAX_RETRIES = int(os.getenv("JIRA_MAX_RETRIES", "3"))
+JIRA_RETRY_BACKOFF = float(os.getenv("JIRA_RETRY_BACKOFF", "0.5"))  # Base seconds; doubles per attempt, full jitter
+JIRA_RETRY_MAX_WAIT = float(os.getenv("JIRA_RETRY_MAX_WAIT", "30"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+WRITE_RETRY_STATUSES = {429, 503}  # Rejected before processing, so a write can be resent safely
+JIRA_BULK_MAX_ISSUES = int(os.getenv("JIRA_BULK_MAX_ISSUES", "50"))  # Jira's per-request limit for /issue/bulk
+
+# Metadata cache (projects, issue types, priorities, transitions)
+JIRA_METADATA_TTL = float(os.getenv("JIRA_METADATA_TTL", "86400"))  # Seconds
+JIRA_METADATA_CACHE_FILE = os.getenv("JIRA_METADATA_CACHE_FILE", "jira_metadata_cache.json")  # Empty disables persistence
+
+# Local index of open issues for duplicate detection
+JIRA_INDEX_ENABLED = os.getenv("JIRA_INDEX_ENABLED", "true").lower() == "true"
+JIRA_INDEX_PATH = os.getenv("JIRA_INDEX_PATH", "jira_issue_index.db")
+JIRA_INDEX_PROJECTS = [p.strip() for p in os.getenv("JIRA_INDEX_PROJECTS", JIRA_PROJECT_KEY).split(",") if p.strip()]
+JIRA_INDEX_PAGE_SIZE = int(os.getenv("JIRA_INDEX_PAGE_SIZE", "100"))
+JIRA_INDEX_LEASE_SECONDS = float(os.getenv("JIRA_INDEX_LEASE_SECONDS", "120"))  # Renewed per page; a crashed holder's lease lapses
+INDEX_FIELDS = ["summary", "status", "labels", "updated", "project"]
+
+# Labels carrying alert identity on AITTA-created issues
+HOST_LABEL_PREFIX = "aitta-host-"
+IDEMPOTENCY_LABEL_PREFIX = "aitta-key-"
+FINGERPRINT_LABEL_PREFIX = "aitta-fp-"
+SUMMARY_STOPWORDS = {"the", "and", "for", "with", "on", "in", "of", "to", "is", "at", "from", "alert", "detected"}
+
+# JQL search pagination
+JIRA_SEARCH_PAGE_SIZE = int(os.getenv("JIRA_SEARCH_PAGE_SIZE", "100"))  # Jira may cap this lower per request
+JIRA_SEARCH_PREFETCH = int(os.getenv("JIRA_SEARCH_PREFETCH", "4"))  # Pages requested concurrently
+SEARCH_DEFAULT_FIELDS = ["summary", "status", "priority"]
+
+# AITTA priority -> Jira priority name
+PRIORITY_MAP = {
+    "Critical": "Highest",
+    "High": "High",
+    "Medium": "Medium",
+    "Low": "Low"
+}
+
 # Logging
 logging.basicConfig(level=logging.DEBUG)
 
 
+@dataclass
+class JiraResponse:
+    """Buffered Jira response, read before the pooled connection is released"""
+    status_code: int
+    text: str
+    headers: dict = field(default_factory=dict)
+
+    def json(self) -> Any:
+        return json.loads(self.text) if self.text else {}
+
+
+class MetadataCache:
+    """
+    TTL cache for Jira metadata that rarely changes: projects, issue types per project,
+    priorities and workflow transitions. Entries are persisted to JIRA_METADATA_CACHE_FILE
+    so a restarted server starts warm; saves merge with what other processes wrote, keeping
+    the newer entry per key.
+    """
+
+    def __init__(self, ttl: float = JIRA_METADATA_TTL, path: str = JIRA_METADATA_CACHE_FILE):
+        self.ttl = ttl
+        self.path = path
+        self.entries: dict = {}
+        self.hits = 0
+        self.misses = 0
+        self._locks: dict = {}
+        self._invalidated: dict = {}  # key -> time it was dropped, so a merge does not bring it back
+        self.entries = self._read_file()
+
+    def _read_file(self) -> dict:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.getLogger(__name__).warning(f"Ignoring unreadable metadata cache {self.path}: {e}")
+            return {}
+
+    def _save_file(self):
+        if not self.path:
+            return
+        for key, entry in self._read_file().items():
+            if entry["fetched_at"] <= self._invalidated.get(key, 0):
+                continue
+            if key not in self.entries or entry["fetched_at"] > self.entries[key]["fetched_at"]:
+                self.entries[key] = entry
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=".jira-metadata-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(self.entries, f)
+                os.replace(tmp, self.path)
+            finally:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Could not persist metadata cache: {e}")
+
+    def peek(self, key: str) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry and time.time() - entry["fetched_at"] < self.ttl:
+            return entry["value"]
+        return None
+
+    async def get(self, key: str, loader) -> Any:
+        """Return a fresh cached value, or load it once (concurrent callers share the load)"""
+        value = self.peek(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            value = self.peek(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            self.misses += 1
+            value = await loader()
+            self.entries[key] = {"value": value, "fetched_at": time.time()}
+            self._save_file()
+            return value
+
+    def put(self, key: str, value: Any):
+        self.entries[key] = {"value": value, "fetched_at": time.time()}
+        self._invalidated.pop(key, None)
+        self._save_file()
+
+    def invalidate(self, prefix: str = ""):
+        now = time.time()
+        for key in set(self.entries) | set(self._read_file()):
+            if key.startswith(prefix):
+                self.entries.pop(key, None)
+                self._invalidated[key] = now
+        self._save_file()
+
+    def stats(self) -> dict:
+        now = time.time()
+        lookups = self.hits + self.misses
+        return {
+            "entries": {k: round(now - v["fetched_at"]) for k, v in self.entries.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "ttl_seconds": self.ttl,
+        }
+
+
+def _label(prefix: str, value: str) -> str:
+    """Jira labels cannot contain spaces"""
+    return prefix + re.sub(r"\s+", "_", value.strip().lower())
+
+
+def _jql_updated_since(since: str) -> str:
+    """
+    JQL clause for issues updated at or after `since` (a Jira `updated` value or an ISO-8601
+    timestamp, UTC when it has no offset). Epoch milliseconds keep the bound independent of
+    the time zone in the Jira user's profile, which date literals are interpreted in.
+    """
+    try:
+        stamp = datetime.strptime(since, "%Y-%m-%dT%H:%M:%S.%f%z")
+    except ValueError:
+        stamp = datetime.fromisoformat(since)
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    return f"updated >= {int(stamp.timestamp() * 1000)}"
+
+
+class JiraIssueIndex:
+    """
+    SQLite index of open issues in JIRA_INDEX_PROJECTS, kept current by delta syncs on the
+    issues' `updated` field. Each issue is indexed under its host label, fingerprint label and
+    summary tokens so duplicate lookups never leave the process.
+    """
+
+    def __init__(self, path: str = JIRA_INDEX_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS issue (
+                key TEXT PRIMARY KEY, project TEXT, summary TEXT, status TEXT,
+                host TEXT, fingerprint TEXT, updated TEXT
+            );
+            CREATE TABLE IF NOT EXISTS term (term TEXT, key TEXT, PRIMARY KEY (term, key));
+            CREATE INDEX IF NOT EXISTS term_key ON term(key);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        self.conn.commit()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def acquire_lease(self, holder: str, ttl: float) -> bool:
+        """Take or renew the sync lease shared by every process using this file; False while another holder's is live"""
+        self.conn.commit()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            lease = self.get_meta("sync_lease")
+            if lease:
+                owner, expires = lease.rsplit("|", 1)
+                if owner != holder and float(expires) > time.time():
+                    self.conn.rollback()
+                    return False
+            self.set_meta("sync_lease", f"{holder}|{time.time() + ttl}")
+            self.conn.commit()
+            return True
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def release_lease(self, holder: str):
+        lease = self.get_meta("sync_lease")
+        if lease and lease.rsplit("|", 1)[0] == holder:
+            self.conn.execute("DELETE FROM meta WHERE key = 'sync_lease'")
+            self.conn.commit()
+
+    def age_seconds(self) -> Optional[float]:
+        last_sync = self.get_meta("last_sync")
+        return round(time.time() - float(last_sync), 3) if last_sync else None
+
+    @staticmethod
+    def tokens(summary: str) -> set:
+        return {t for t in re.findall(r"[a-z0-9][a-z0-9._-]+", (summary or "").lower()) if t not in SUMMARY_STOPWORDS}
+
+    def upsert(self, issues: list):
+        """issues: dicts with key, project, summary, status, labels, updated"""
+        keys = [(i["key"],) for i in issues]
+        self.conn.executemany("DELETE FROM term WHERE key = ?", keys)
+        rows, terms = [], []
+        for issue in issues:
+            labels = issue.get("labels") or []
+            host = next((l[len(HOST_LABEL_PREFIX):] for l in labels if l.startswith(HOST_LABEL_PREFIX)), None)
+            fingerprint = next((l[len(FINGERPRINT_LABEL_PREFIX):] for l in labels if l.startswith(FINGERPRINT_LABEL_PREFIX)), None)
+            rows.append((issue["key"], issue.get("project"), issue.get("summary"), issue.get("status"),
+                         host, fingerprint, issue.get("updated")))
+            if host:
+                terms.append((f"host:{host}", issue["key"]))
+            if fingerprint:
+                terms.append((f"fp:{fingerprint}", issue["key"]))
+            terms.extend((f"tok:{t}", issue["key"]) for t in self.tokens(issue.get("summary")))
+        self.conn.executemany("INSERT OR REPLACE INTO issue VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        self.conn.executemany("INSERT OR IGNORE INTO term VALUES (?, ?)", terms)
+
+    def remove(self, keys: list):
+        self.conn.executemany("DELETE FROM issue WHERE key = ?", [(k,) for k in keys])
+        self.conn.executemany("DELETE FROM term WHERE key = ?", [(k,) for k in keys])
+
+    def keys(self) -> set:
+        return {k for (k,) in self.conn.execute("SELECT key FROM issue")}
+
+    def commit(self):
+        self.conn.commit()
+
+    def find(self, host: str = None, fingerprint: str = None, summary: str = None,
+             limit: int = 5, min_score: float = 0.5) -> list:
+        """
+        Score open issues: a fingerprint match is 1.0; otherwise a host match is worth 0.5 and the
+        summary's token overlap (Jaccard) fills the rest.
+        """
+        host = host.strip().lower().replace(" ", "_") if host else None
+        fingerprint = fingerprint.strip().lower() if fingerprint else None
+        query_tokens = self.tokens(summary)
+        terms = [f"tok:{t}" for t in query_tokens]
+        if host:
+            terms.append(f"host:{host}")
+        if fingerprint:
+            terms.append(f"fp:{fingerprint}")
+        if not terms:
+            return []
+
+        placeholders = ",".join("?" * len(terms))
+        candidates = [k for (k,) in self.conn.execute(
+            f"SELECT DISTINCT key FROM term WHERE term IN ({placeholders})", terms
+        )]
+        matches = []
+        for start in range(0, len(candidates), 500):
+            chunk = candidates[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT key, summary, status, host, fingerprint, updated FROM issue WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            for key, issue_summary, status, issue_host, issue_fp, updated in rows:
+                matched_on = []
+                if fingerprint and issue_fp == fingerprint:
+                    score = 1.0
+                    matched_on.append("fingerprint")
+                else:
+                    score = 0.0
+                    if host and issue_host == host:
+                        score += 0.5
+                        matched_on.append("host")
+                    issue_tokens = self.tokens(issue_summary)
+                    if query_tokens and issue_tokens:
+                        overlap = len(query_tokens & issue_tokens) / len(query_tokens | issue_tokens)
+                        if overlap:
+                            score += overlap * (0.5 if host else 1.0)
+                            matched_on.append("summary")
+                if score >= min_score:
+                    matches.append({
+                        "ticket_id": key, "summary": issue_summary, "status": status,
+                        "updated": updated, "score": round(score, 3), "matched_on": matched_on,
+                    })
+        matches.sort(key=lambda m: (m["score"], m["updated"] or ""), reverse=True)
+        return matches[:limit]
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM issue").fetchone()[0]
+
+
 class JiraMCPServer:
     def __init__(self):
         self.server = Server("jira-server")
         self.has_token = bool(JIRA_TOKEN)     
         self.logger = logging.getLogger(__name__)
+        self._http: Optional[aiohttp.ClientSession] = None
+        self.metadata = MetadataCache()
+        self.issue_index = JiraIssueIndex() if JIRA_INDEX_ENABLED else None
+        self._index_lock = asyncio.Lock()
+        self._lease_holder = f"{os.getpid()}:{id(self):x}"
         self.setup_tools()
         
         if not self.has_token:
@@ -52,6 +386,345 @@ class JiraMCPServer:
             "Accept": "application/json"
         }
     
+    def _session(self) -> aiohttp.ClientSession:
+        """Return the process-wide Jira session, creating it on first use"""
+        if self._http is None or self._http.closed:
+            connector = aiohttp.TCPConnector(
+                limit=JIRA_POOL_SIZE,
+                limit_per_host=JIRA_POOL_PER_HOST,
+                keepalive_timeout=JIRA_KEEPALIVE_TIMEOUT,
+                enable_cleanup_closed=True,
+            )
+            self._http = aiohttp.ClientSession(headers=self._get_headers(), connector=connector)
+        return self._http
+
+    async def close(self):
+        """Close the pooled Jira session"""
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+        self._http = None
+
+    @staticmethod
+    def _retry_delay(attempt: int, retry_after: Optional[str]) -> float:
+        """Seconds to wait before the next attempt: Retry-After when Jira sends it, else jittered exponential backoff"""
+        if retry_after:
+            try:
+                return min(float(retry_after), JIRA_RETRY_MAX_WAIT)
+            except ValueError:
+                try:
+                    delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                    return min(max(delay, 0.0), JIRA_RETRY_MAX_WAIT)
+                except (TypeError, ValueError):
+                    pass
+        return random.uniform(0, min(JIRA_RETRY_BACKOFF * (2 ** attempt), JIRA_RETRY_MAX_WAIT))
+
+    async def _request(self, method: str, path: str, endpoint: str = "read", **kwargs) -> JiraResponse:
+        """
+        Issue a Jira REST call on the pooled session with the endpoint class timeout.
+        Failed connects are retried with backoff for every method. GETs are also retried on
+        429/5xx and timeouts; writes only on 429/503, since after a timeout or another 5xx the
+        write may already have been applied.
+        """
+        url = f"{JIRA_URL}{path}"
+        timeout = aiohttp.ClientTimeout(total=JIRA_TIMEOUTS[endpoint])
+        retry_statuses = RETRY_STATUSES if method == "GET" else WRITE_RETRY_STATUSES
+        for attempt in range(JIRA_MAX_RETRIES + 1):
+            last_attempt = attempt == JIRA_MAX_RETRIES
+            try:
+                async with self._session().request(method, url, timeout=timeout, **kwargs) as r:
+                    response = JiraResponse(r.status, await r.text(), dict(r.headers))
+            except (aiohttp.ClientConnectorError, asyncio.TimeoutError) as e:
+                if last_attempt or (isinstance(e, asyncio.TimeoutError) and method != "GET"):
+                    raise
+                delay = self._retry_delay(attempt, None)
+                self.logger.warning(f"{method} {path} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            if response.status_code not in retry_statuses or last_attempt:
+                return response
+            delay = self._retry_delay(attempt, response.headers.get("Retry-After"))
+            self.logger.warning(f"{method} {path} returned {response.status_code}, retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    # ---------------- Metadata ----------------
+
+    async def _get_json(self, path: str, **kwargs) -> Any:
+        response = await self._request("GET", path, **kwargs)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {path} failed: {response.status_code}")
+        return response.json()
+
+    async def _projects(self) -> list:
+        async def load():
+            return [{"key": p["key"], "name": p["name"]} for p in await self._get_json("/rest/api/2/project")]
+        return await self.metadata.get("projects", load)
+
+    async def _issue_types(self, project: str) -> list:
+        async def load():
+            data = await self._get_json(f"/rest/api/2/project/{project}")
+            return [it["name"] for it in data.get("issueTypes", [])]
+        return await self.metadata.get(f"issue_types:{project}", load)
+
+    async def _priorities(self) -> list:
+        async def load():
+            return [p["name"] for p in await self._get_json("/rest/api/2/priority")]
+        return await self.metadata.get("priorities", load)
+
+    async def _transitions(self, ticket_id: str, issue_fields: dict) -> list:
+        """Transitions available from an issue's status, cached per (project, issue type, status)"""
+        key = "transitions:{}:{}:{}".format(
+            (issue_fields.get("project") or {}).get("key"),
+            (issue_fields.get("issuetype") or {}).get("name"),
+            (issue_fields.get("status") or {}).get("name"),
+        )
+
+        async def load():
+            data = await self._get_json(f"/rest/api/2/issue/{ticket_id}/transitions")
+            return [{"id": t["id"], "name": t["name"], "to": t["to"]["name"]} for t in data.get("transitions", [])]
+        return await self.metadata.get(key, load)
+
+    @staticmethod
+    def _transition_key(ticket_id: str, status: str) -> str:
+        """Cache key for the transition into `status` in the workflow of the ticket's project"""
+        return "transitions-to:{}:{}".format(ticket_id.rsplit("-", 1)[0], status.lower())
+
+    async def _lookup_transition(self, ticket_id: str, status: str, updates: list, errors: list) -> Optional[dict]:
+        """
+        Read the issue's status and find the transition into `status`, remembering it for the
+        project's workflow. Returns None (with a note in `updates` or `errors`) when the issue
+        is already there, no transition leads there, or the lookup fails.
+        """
+        try:
+            issue_fields = (await self._get_json(
+                f"/rest/api/2/issue/{ticket_id}", params={"fields": "project,issuetype,status"}
+            )).get("fields", {})
+            current = (issue_fields.get("status") or {}).get("name", "")
+            if current.lower() == status.lower():
+                updates.append(f"Status already {current}")
+                return None
+            transitions = await self._transitions(ticket_id, issue_fields)
+            transition = next(
+                (t for t in transitions if status.lower() in (t["name"].lower(), t["to"].lower())), None
+            )
+            if transition is None:
+                self.logger.warning(f"No transition to '{status}' from '{current}' for {ticket_id}")
+                errors.append(f"No transition to '{status}' from '{current}'")
+                return None
+            self.metadata.put(self._transition_key(ticket_id, status), transition)
+            return transition
+        except Exception as e:
+            # The comment and assignee do not depend on the status lookup; the caller still sends them
+            self.logger.warning(f"Status lookup failed for {ticket_id}: {e}")
+            errors.append(f"Status lookup failed: {e}")
+            return None
+
+    async def _post_transition(self, ticket_id: str, transition: dict, comment: Optional[str],
+                               assignee: Optional[str]) -> JiraResponse:
+        """One round trip: the transition carries the assignee and comment where the screen allows it"""
+        payload = {"transition": {"id": transition["id"]}}
+        if assignee:
+            payload["fields"] = {"assignee": {"name": assignee}}
+        if comment:
+            payload["update"] = {"comment": [{"add": {"body": comment}}]}
+        return await self._request(
+            "POST", f"/rest/api/2/issue/{ticket_id}/transitions", endpoint="write", json=payload
+        )
+
+    async def _validate_ticket(self, ticket: dict) -> Optional[str]:
+        """
+        Check project, issue type and priority against cached metadata and normalize the
+        issue type's case. Returns an error message, or None when valid (or metadata is unavailable).
+        """
+        project = ticket.get("project", JIRA_PROJECT_KEY)
+        try:
+            projects = {p["key"] for p in await self._projects()}
+            if project not in projects:
+                return f"Unknown project '{project}'. Valid projects: {sorted(projects)}"
+            issue_types = {name.lower(): name for name in await self._issue_types(project)}
+            issue_type = ticket.get("issue_type", "Task")
+            if issue_type.lower() not in issue_types:
+                return f"Issue type '{issue_type}' is not valid for {project}. Valid types: {sorted(issue_types.values())}"
+            ticket["issue_type"] = issue_types[issue_type.lower()]
+            priorities = set(await self._priorities())
+            jira_priority = PRIORITY_MAP.get(ticket.get("priority", "Medium"), "Medium")
+            if priorities and jira_priority not in priorities:
+                return f"Priority '{jira_priority}' does not exist. Valid priorities: {sorted(priorities)}"
+        except Exception as e:
+            self.logger.warning(f"Skipping ticket validation, metadata unavailable: {e}")
+        return None
+
+    # ---------------- Search ----------------
+
+    async def _search(self, jql: str, fields: list, start_at: int = 0, limit: Optional[int] = None,
+                      page_size: int = JIRA_SEARCH_PAGE_SIZE, project=None) -> tuple:
+        """
+        Page through /rest/api/2/search from start_at, up to limit issues (all when None).
+        The first page gives the total; the remaining pages are fetched JIRA_SEARCH_PREFETCH
+        at a time and each is reduced by `project` as it arrives, so raw issue bodies are
+        never held for more than a window of pages. Returns (total, items in result order).
+        """
+        project = project or (lambda issue: issue)
+
+        async def page(offset: int, size: int) -> dict:
+            return await self._get_json(
+                "/rest/api/2/search", endpoint="search",
+                params={"jql": jql, "startAt": offset, "maxResults": size, "fields": ",".join(fields)},
+            )
+
+        first_size = page_size if limit is None else min(page_size, limit)
+        first = await page(start_at, first_size)
+        total = first.get("total", 0)
+        issues = first.get("issues", [])
+        items = [project(issue) for issue in issues]
+        end = total if limit is None else min(total, start_at + limit)
+        # Jira silently lowers maxResults above its own cap; step by what it actually returned
+        step = len(issues) if 0 < len(issues) < first_size else page_size
+        offsets = list(range(start_at + len(issues), end, step)) if issues else []
+
+        for w in range(0, len(offsets), JIRA_SEARCH_PREFETCH):
+            window = offsets[w:w + JIRA_SEARCH_PREFETCH]
+            pages = await asyncio.gather(*(page(o, min(step, end - o)) for o in window))
+            for data in pages:
+                items.extend(project(issue) for issue in data.get("issues", []))
+        return total, items
+
+    @staticmethod
+    def _field_value(value: Any) -> Any:
+        """Flatten Jira field objects to their display value"""
+        if isinstance(value, dict):
+            for attr in ("name", "displayName", "value", "key"):
+                if attr in value:
+                    return value[attr]
+        if isinstance(value, list):
+            return [JiraMCPServer._field_value(v) for v in value]
+        return value
+
+    # ---------------- Issue index ----------------
+
+    @staticmethod
+    def _alert_labels(host: Optional[str], fingerprint: Optional[str]) -> list:
+        labels = []
+        if host:
+            labels.append(_label(HOST_LABEL_PREFIX, host))
+        if fingerprint:
+            labels.append(_label(FINGERPRINT_LABEL_PREFIX, fingerprint))
+        return labels
+
+    def _index_created(self, tickets: list):
+        """Add freshly created issues so duplicates are caught before the next sync"""
+        if self.issue_index is None or not tickets:
+            return
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+        self.issue_index.upsert([
+            {
+                "key": t["ticket_id"],
+                "project": t.get("project", JIRA_PROJECT_KEY),
+                "summary": t.get("summary"),
+                "status": "Open",
+                "labels": self._alert_labels(t.get("host"), t.get("fingerprint")),
+                "updated": now,
+            }
+            for t in tickets
+        ])
+        self.issue_index.commit()
+
+    async def sync_issue_index(self, full: bool = False) -> dict:
+        """
+        Refresh the issue index: a full load of unresolved issues on first use or when forced,
+        otherwise every issue updated since the watermark. Issues that reached a done status
+        are dropped from the index. Only the holder of the index file's sync lease runs, so
+        several server processes sharing the file do not repeat the same load.
+        """
+        if self.issue_index is None:
+            raise RuntimeError("Jira issue index is not enabled")
+        async with self._index_lock:
+            if not self.issue_index.acquire_lease(self._lease_holder, JIRA_INDEX_LEASE_SECONDS):
+                return {"mode": "skipped", "reason": "sync running in another process", "indexed": self.issue_index.count()}
+            try:
+                return await self._sync_issue_pages(full)
+            finally:
+                self.issue_index.release_lease(self._lease_holder)
+
+    async def _sync_issue_pages(self, full: bool) -> dict:
+        """
+        Read issues in `updated` order, committing each page together with the watermark so an
+        interrupted load resumes from its last page. Each page is re-queried from the last seen
+        `updated`, skipping the issues already read at that instant, so issues edited while the
+        load runs cannot shift later pages.
+        """
+        watermark = None if full else self.issue_index.get_meta("watermark")
+        projects = ", ".join(f'"{p}"' for p in JIRA_INDEX_PROJECTS)
+        base = f"project in ({projects})" if watermark else f"project in ({projects}) AND statusCategory != Done"
+        previous_keys = self.issue_index.keys() if full else None
+        seen = set()
+        since, skip = watermark, 0
+        fetched = upserted = removed = pages = 0
+        started = time.monotonic()
+
+        while True:
+            jql = f"{base} AND {_jql_updated_since(since)}" if since else base
+            data = await self._get_json(
+                "/rest/api/2/search", endpoint="search",
+                params={"jql": f"{jql} ORDER BY updated ASC", "startAt": skip,
+                        "maxResults": JIRA_INDEX_PAGE_SIZE, "fields": ",".join(INDEX_FIELDS)},
+            )
+            issues = data.get("issues", [])
+            open_issues, closed = [], []
+            for issue in issues:
+                fields = issue.get("fields", {})
+                status = fields.get("status") or {}
+                if (status.get("statusCategory") or {}).get("key") == "done":
+                    closed.append(issue["key"])
+                    continue
+                seen.add(issue["key"])
+                open_issues.append({
+                    "key": issue["key"],
+                    "project": (fields.get("project") or {}).get("key"),
+                    "summary": fields.get("summary"),
+                    "status": status.get("name"),
+                    "labels": fields.get("labels", []),
+                    "updated": fields.get("updated"),
+                })
+            self.issue_index.upsert(open_issues)
+            self.issue_index.remove(closed)
+            fetched += len(issues)
+            upserted += len(open_issues)
+            removed += len(closed)
+            pages += 1
+
+            done = not issues or skip + len(issues) >= data.get("total", 0)
+            if issues:
+                last = issues[-1]["fields"].get("updated")
+                at_last = sum(1 for i in issues if i["fields"].get("updated") == last)
+                skip = at_last + (skip if last == since else 0)
+                since = last
+                self.issue_index.set_meta("watermark", since)
+            self.issue_index.commit()
+            if done:
+                break
+            if not self.issue_index.acquire_lease(self._lease_holder, JIRA_INDEX_LEASE_SECONDS):
+                raise RuntimeError("Issue index sync lease was taken over by another process")
+
+        if previous_keys is not None:
+            stale = list(previous_keys - seen)
+            self.issue_index.remove(stale)
+            removed += len(stale)
+        self.issue_index.set_meta("last_sync", time.time())
+        self.issue_index.commit()
+
+        result = {
+            "mode": "delta" if watermark else "full",
+            "fetched": fetched,
+            "pages": pages,
+            "open_upserted": upserted,
+            "closed_removed": removed,
+            "indexed": self.issue_index.count(),
+            "duration_ms": round((time.monotonic() - started) * 1000, 1),
+        }
+        self.logger.info(f"Issue index sync: {result}")
+        return result
+
     def setup_tools(self):
         """Register available tools"""
         
@@ -69,11 +742,45 @@ class JiraMCPServer:
                             "description": {"type": "string", "description": "Detailed description"},
                             "priority": {"type": "string", "description": "Priority: Critical, High, Medium, Low", "default": "Medium"},
                             "assignee": {"type": "string", "description": "Username to assign to (leave empty for unassigned)"},
-                            "issue_type": {"type": "string", "description": "Issue type (Bug, Task, Story)", "default": "Task"}
+                            "issue_type": {"type": "string", "description": "Issue type (Bug, Task, Story)", "default": "Task"},
+                            "host": {"type": "string", "description": "Alert host, stored as a label for duplicate detection"},
+                            "fingerprint": {"type": "string", "description": "Alert fingerprint, stored as a label for duplicate detection"}
                         },
                         "required": ["summary", "description"]
                     }
                 ),
+                Tool(
+                    name="create_tickets_bulk",
+                    description="Create many Jira tickets with the bulk API; keys and per-item errors are returned in input order",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "tickets": {
+                                "type": "array",
+                                "description": "Tickets with the same fields as create_ticket",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "project": {"type": "string", "default": JIRA_PROJECT_KEY},
+                                        "summary": {"type": "string"},
+                                        "description": {"type": "string"},
+                                        "priority": {"type": "string", "default": "Medium"},
+                                        "assignee": {"type": "string"},
+                                        "issue_type": {"type": "string", "default": "Task"},
+                                        "host": {"type": "string"},
+                                        "fingerprint": {"type": "string"},
+                                        "idempotency_key": {
+                                            "type": "string",
+                                            "description": "Stored as a label; an issue already carrying it is returned instead of creating another"
+                                        }
+                                    },
+                                    "required": ["summary", "description"]
+                                }
+                            }
+                        },
+                        "required": ["tickets"]
+                    }
+                ),
                 Tool(
                     name="update_ticket",
                     description="Update an existing Jira ticket",
@@ -106,7 +813,15 @@ class JiraMCPServer:
                         "type": "object",
                         "properties": {
                             "jql": {"type": "string", "description": "JQL query string (e.g., 'project=TEST AND status=Open')"},
-                            "max_results": {"type": "integer", "default": 50}
+                            "max_results": {"type": "integer", "description": "Maximum issues to return across all pages", "default": 50},
+                            "start_at": {"type": "integer", "description": "Offset of the first issue", "default": 0},
+                            "fields": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Jira fields to fetch and return (default: summary, status, priority)"
+                            },
+                            "page_size": {"type": "integer", "description": "Issues per Jira request", "default": JIRA_SEARCH_PAGE_SIZE},
+                            "updated_since": {"type": "string", "description": "Only issues updated at or after this Jira or ISO-8601 timestamp"}
                         },
                         "required": ["jql"]
                     }
@@ -129,6 +844,48 @@ class JiraMCPServer:
                         }
                     }
                 ),
+                Tool(
+                    name="get_priorities",
+                    description="List Jira priorities",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {}
+                    }
+                ),
+                Tool(
+                    name="refresh_metadata",
+                    description="Drop cached Jira metadata (projects, issue types, priorities, transitions) and reload it",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "project": {"type": "string", "description": "Project whose issue types to preload", "default": JIRA_PROJECT_KEY}
+                        }
+                    }
+                ),
+                Tool(
+                    name="find_duplicates",
+                    description="Find open tickets for the same host, alert fingerprint or a similar summary using the local issue index",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "host": {"type": "string", "description": "Alert host"},
+                            "fingerprint": {"type": "string", "description": "Alert fingerprint"},
+                            "summary": {"type": "string", "description": "Proposed ticket summary"},
+                            "limit": {"type": "integer", "description": "Maximum candidates", "default": 5},
+                            "min_score": {"type": "number", "description": "Minimum match score (0-1)", "default": 0.5}
+                        }
+                    }
+                ),
+                Tool(
+                    name="sync_issue_index",
+                    description="Synchronize the local index of open issues (delta by default, full on request)",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "full": {"type": "boolean", "description": "Force a full reload", "default": False}
+                        }
+                    }
+                ),
                 Tool(
                     name="get_current_user",
                     description="Get information about the current authenticated user",
@@ -143,6 +900,8 @@ class JiraMCPServer:
         async def call_tool(name: str, arguments: Any) -> Sequence[TextContent]:
             if name == "create_ticket":
                 return await self.create_ticket(arguments)
+            elif name == "create_tickets_bulk":
+                return await self.create_tickets_bulk(arguments)
             elif name == "update_ticket":
                 return await self.update_ticket(arguments)
             elif name == "get_ticket":
@@ -153,6 +912,14 @@ class JiraMCPServer:
                 return await self.get_projects(arguments)
             elif name == "get_issue_types":
                 return await self.get_issue_types(arguments)
+            elif name == "get_priorities":
+                return await self.get_priorities(arguments)
+            elif name == "refresh_metadata":
+                return await self.refresh_metadata(arguments)
+            elif name == "find_duplicates":
+                return await self.find_duplicates(arguments)
+            elif name == "sync_issue_index":
+                return await self.handle_sync_issue_index(arguments)
             elif name == "get_current_user":
                 return await self.get_current_user(arguments)
             else:
@@ -167,11 +934,7 @@ class JiraMCPServer:
             )]
         
         try:
-            response = requests.get(
-                f"{JIRA_URL}/rest/api/2/myself",
-                headers=self._get_headers(),
-                timeout=10
-            )
+            response = await self._request("GET", "/rest/api/2/myself")
             
             if response.status_code == 200:
                 user_data = response.json()
@@ -209,43 +972,24 @@ class JiraMCPServer:
         issue_type = args.get("issue_type", "Task")     
         if USE_MOCK or not self.has_token:
             return await self._mock_create_ticket(project, summary, priority, assignee)
+
+        ticket = {"project": project, "priority": priority, "issue_type": issue_type}
+        error = await self._validate_ticket(ticket)
+        if error:
+            self.logger.error(f"✗ Ticket rejected locally: {error}")
+            return [TextContent(type="text", text=json.dumps({"status": "failed", "error": error}, indent=2))]
+        issue_type = ticket["issue_type"]
         
         try:
-            # Priority mapping for Jira
-            priority_map = {
-                "Critical": "Highest",
-                "High": "High",
-                "Medium": "Medium",
-                "Low": "Low"
-            }
-            
-            jira_priority = priority_map.get(priority, "Medium")            
-            
-            # Jira Server format (plain text description)
-            issue_data = {
-                "fields": {
-                    "project": {"key": project},
-                    "summary": summary,
-                    "description": description,
-                    "issuetype": {"name": issue_type},
-                    "priority": {"name": jira_priority}
-                }
-            }
-            
-            # Add assignee if provided
-            # if assignee:
-            #     issue_data["fields"]["assignee"] = {"name": assignee}
+            issue_data = self._issue_payload(
+                project, summary, description, priority, issue_type, args.get("host"), args.get("fingerprint")
+            )
             
             self.logger.info(f"Creating Jira ticket in project {project}")
             self.logger.debug(f"Payload: {json.dumps(issue_data, indent=2)}")
             
             # Create the issue using token authentication
-            response = requests.post(
-                f"{JIRA_URL}/rest/api/2/issue",
-                headers=self._get_headers(),
-                json=issue_data,
-                timeout=30
-            )
+            response = await self._request("POST", "/rest/api/2/issue", endpoint="write", json=issue_data)
             
             self.logger.info(f"Jira API response: {response.status_code}")
             
@@ -254,6 +998,7 @@ class JiraMCPServer:
                 ticket_id = result["key"]
                 
                 self.logger.info(f"✓ Ticket created successfully: {ticket_id}")
+                self._index_created([{**args, "project": project, "ticket_id": ticket_id}])
                 
                 result_data = {
                     "status": "created",
@@ -290,6 +1035,168 @@ class JiraMCPServer:
         
             return await self._mock_create_ticket(project, summary, priority, assignee)
     
+    def _issue_payload(self, project: str, summary: str, description: str, priority: str, issue_type: str,
+                       host: str = None, fingerprint: str = None, idempotency_key: str = None) -> dict:
+        """Issue create payload in Jira Server format (plain text description)"""
+        issue_data = {
+            "fields": {
+                "project": {"key": project},
+                "summary": summary,
+                "description": description,
+                "issuetype": {"name": issue_type},
+                "priority": {"name": PRIORITY_MAP.get(priority, "Medium")}
+            }
+        }
+        labels = self._alert_labels(host, fingerprint)
+        if idempotency_key:
+            labels.append(_label(IDEMPOTENCY_LABEL_PREFIX, idempotency_key))
+        if labels:
+            issue_data["fields"]["labels"] = labels
+
+        # Add assignee if provided
+        # if assignee:
+        #     issue_data["fields"]["assignee"] = {"name": assignee}
+        return issue_data
+
+    async def create_tickets_bulk(self, args: dict) -> Sequence[TextContent]:
+        """Create many tickets via /rest/api/2/issue/bulk, JIRA_BULK_MAX_ISSUES per request"""
+        tickets = args.get("tickets") or []
+        if not tickets:
+            return [TextContent(type="text", text=json.dumps({"error": "tickets is required"}, indent=2))]
+
+        mock = USE_MOCK or not self.has_token
+        results = [None] * len(tickets)
+        valid = []
+        for i, ticket in enumerate(tickets):
+            if not ticket.get("summary") or not ticket.get("description"):
+                results[i] = {"index": i, "status": "failed", "error": "summary and description are required"}
+            else:
+                valid.append(i)
+
+        if mock:
+            stamp = datetime.now().strftime('%H%M%S')
+            for i in valid:
+                results[i] = {"index": i, **self._created_result(tickets[i], f"{tickets[i].get('project', JIRA_PROJECT_KEY)}-{stamp}{i:03d}", True)}
+        else:
+            tickets = [dict(t) for t in tickets]
+            try:
+                existing = await self._existing_issues([tickets[i]["idempotency_key"] for i in valid if tickets[i].get("idempotency_key")])
+            except Exception as e:
+                # Creating keyed tickets without the check could duplicate them; fail those items
+                # so the caller retries them, and still create the ones without a key
+                self.logger.error(f"Idempotency lookup failed: {e}")
+                for i in [i for i in valid if tickets[i].get("idempotency_key")]:
+                    results[i] = {"index": i, "status": "failed", "error": f"Idempotency lookup failed: {e}"}
+                    valid.remove(i)
+                existing = {}
+            for i in list(valid):
+                key = existing.get(_label(IDEMPOTENCY_LABEL_PREFIX, tickets[i]["idempotency_key"])) if tickets[i].get("idempotency_key") else None
+                if key:
+                    results[i] = {"index": i, **self._created_result(tickets[i], key, False), "existing": True}
+                    valid.remove(i)
+                    continue
+                error = await self._validate_ticket(tickets[i])
+                if error:
+                    results[i] = {"index": i, "status": "failed", "error": error}
+                    valid.remove(i)
+            chunks = [valid[n:n + JIRA_BULK_MAX_ISSUES] for n in range(0, len(valid), JIRA_BULK_MAX_ISSUES)]
+            outcomes = await asyncio.gather(*(self._post_bulk_chunk(chunk, tickets) for chunk in chunks), return_exceptions=True)
+            for chunk, outcome in zip(chunks, outcomes):
+                if isinstance(outcome, Exception):
+                    self.logger.error(f"Bulk ticket creation failed: {outcome}")
+                    outcome = {i: {"error": str(outcome)} for i in chunk}
+                for i in chunk:
+                    created = outcome[i]
+                    if "key" in created:
+                        results[i] = {"index": i, **self._created_result(tickets[i], created["key"], False)}
+                    else:
+                        results[i] = {"index": i, "status": "failed", "error": created["error"]}
+            self._index_created([
+                {**tickets[i], "ticket_id": results[i]["ticket_id"]} for i in valid if results[i]["status"] == "created"
+            ])
+
+        failed = sum(1 for r in results if r["status"] == "failed")
+        out = {
+            "requested": len(tickets),
+            "created": len(tickets) - failed,
+            "failed": failed,
+            "results": results,
+            "mock": mock
+        }
+        return [TextContent(type="text", text=json.dumps(out, indent=2))]
+
+    async def _existing_issues(self, idempotency_keys: list) -> dict:
+        """Issue key per idempotency label for issues already created with these keys (one JQL search)"""
+        if not idempotency_keys:
+            return {}
+        labels = [_label(IDEMPOTENCY_LABEL_PREFIX, k) for k in idempotency_keys]
+        jql = "labels in ({})".format(", ".join(f'"{l}"' for l in labels))
+        wanted = set(labels)
+        _, issues = await self._search(jql, ["labels"])
+        found = {}
+        for issue in issues:
+            for label in issue.get("fields", {}).get("labels", []):
+                if label in wanted:
+                    found[label] = issue["key"]
+        return found
+
+    async def _post_bulk_chunk(self, indexes: list, tickets: list) -> dict:
+        """POST one /issue/bulk request; returns {index: {"key"} | {"error"}} for the chunk"""
+        issue_updates = [
+            self._issue_payload(
+                tickets[i].get("project", JIRA_PROJECT_KEY),
+                tickets[i]["summary"],
+                tickets[i]["description"],
+                tickets[i].get("priority", "Medium"),
+                tickets[i].get("issue_type", "Task"),
+                tickets[i].get("host"),
+                tickets[i].get("fingerprint"),
+                tickets[i].get("idempotency_key"),
+            )
+            for i in indexes
+        ]
+        response = await self._request("POST", "/rest/api/2/issue/bulk", endpoint="write", json={"issueUpdates": issue_updates})
+        if response.status_code not in (200, 201):
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            if not isinstance(body.get("errors"), list) or not body["errors"]:
+                return {i: {"error": f"HTTP {response.status_code}: {response.text[:200]}"} for i in indexes}
+        else:
+            body = response.json()
+
+        # Jira lists created issues in request order, skipping the failed elements
+        outcome = {}
+        for error in body.get("errors", []):
+            position = error.get("failedElementNumber")
+            if position is None or position >= len(indexes):
+                continue
+            element = error.get("elementErrors", {})
+            messages = list(element.get("errorMessages", [])) + [f"{k}: {v}" for k, v in element.get("errors", {}).items()]
+            outcome[indexes[position]] = {"error": "; ".join(messages) or f"HTTP {error.get('status')}"}
+        created = iter(body.get("issues", []))
+        for i in indexes:
+            if i not in outcome:
+                issue = next(created, None)
+                outcome[i] = {"key": issue["key"]} if issue else {"error": "Issue missing from bulk response"}
+        self.logger.info(f"✓ Bulk created {sum('key' in o for o in outcome.values())}/{len(indexes)} tickets")
+        return outcome
+
+    def _created_result(self, ticket: dict, ticket_id: str, mock: bool) -> dict:
+        """Result record for a created ticket, matching create_ticket's output"""
+        return {
+            "status": "created",
+            "ticket_id": ticket_id,
+            "project": ticket.get("project", JIRA_PROJECT_KEY),
+            "summary": ticket.get("summary"),
+            "priority": ticket.get("priority", "Medium"),
+            "assignee": ticket.get("assignee") or "Unassigned",
+            "url": f"{JIRA_URL}/browse/{ticket_id}",
+            "created_at": datetime.now().isoformat(),
+            "mock": mock
+        }
+
     async def _mock_create_ticket(self, project: str, summary: str, priority: str, assignee: str) -> Sequence[TextContent]:
         """Mock ticket creation"""
         ticket_id = f"{project}-{datetime.now().strftime('%H%M%S')}"
@@ -325,29 +1232,12 @@ class JiraMCPServer:
             )]
         
         try:
-            response = requests.get(
-                f"{JIRA_URL}/rest/api/2/project",
-                headers=self._get_headers(),
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                projects = response.json()
-                project_list = [
-                    {"key": p["key"], "name": p["name"]}
-                    for p in projects
-                ]
-                
-                self.logger.info(f"✓ Retrieved {len(project_list)} projects")
-                
-                return [TextContent(
-                    type="text",
-                    text=json.dumps({"projects": project_list, "mock": False}, indent=2)
-                )]
-            else:
-                self.logger.error(f"Failed to get projects: {response.status_code}")
-                return [TextContent(type="text", text=json.dumps({"error": "Failed to fetch projects"}, indent=2))]
-                
+            project_list = await self._projects()
+            self.logger.info(f"✓ Retrieved {len(project_list)} projects")
+            return [TextContent(
+                type="text",
+                text=json.dumps({"projects": project_list, "mock": False}, indent=2)
+            )]
         except Exception as e:
             self.logger.error(f"Error getting projects: {e}")
             return [TextContent(type="text", text=json.dumps({"error": str(e)}, indent=2))]
@@ -366,29 +1256,54 @@ class JiraMCPServer:
             )]
         
         try:
-            response = requests.get(
-                f"{JIRA_URL}/rest/api/2/project/{project}",
-                headers=self._get_headers(),
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                project_data = response.json()
-                issue_types = [it["name"] for it in project_data.get("issueTypes", [])]
-                
-                self.logger.info(f"✓ Retrieved {len(issue_types)} issue types for {project}")
-                
-                return [TextContent(
-                    type="text",
-                    text=json.dumps({"issue_types": issue_types, "project": project, "mock": False}, indent=2)
-                )]
-            else:
-                self.logger.error(f"Failed to get issue types: {response.status_code}")
-                return [TextContent(type="text", text=json.dumps({"error": "Failed to fetch issue types"}, indent=2))]
-                
+            issue_types = await self._issue_types(project)
+            self.logger.info(f"✓ Retrieved {len(issue_types)} issue types for {project}")
+            return [TextContent(
+                type="text",
+                text=json.dumps({"issue_types": issue_types, "project": project, "mock": False}, indent=2)
+            )]
         except Exception as e:
             self.logger.error(f"Error getting issue types: {e}")
             return [TextContent(type="text", text=json.dumps({"error": str(e)}, indent=2))]
+
+    async def get_priorities(self, args: dict) -> Sequence[TextContent]:
+        """List priorities"""
+        if USE_MOCK or not self.has_token:
+            return [TextContent(
+                type="text",
+                text=json.dumps({"priorities": ["Highest", "High", "Medium", "Low", "Lowest"], "mock": True}, indent=2)
+            )]
+
+        try:
+            priorities = await self._priorities()
+            return [TextContent(type="text", text=json.dumps({"priorities": priorities, "mock": False}, indent=2))]
+        except Exception as e:
+            self.logger.error(f"Error getting priorities: {e}")
+            return [TextContent(type="text", text=json.dumps({"error": str(e)}, indent=2))]
+
+    async def refresh_metadata(self, args: dict) -> Sequence[TextContent]:
+        """Invalidate the metadata cache and preload projects, priorities and the project's issue types"""
+        project = args.get("project", JIRA_PROJECT_KEY)
+        self.metadata.invalidate()
+        if USE_MOCK or not self.has_token:
+            return [TextContent(type="text", text=json.dumps({"status": "refreshed", "mock": True}, indent=2))]
+
+        try:
+            projects, priorities, issue_types = await asyncio.gather(
+                self._projects(), self._priorities(), self._issue_types(project)
+            )
+            result = {
+                "status": "refreshed",
+                "projects": len(projects),
+                "priorities": len(priorities),
+                "issue_types": {project: issue_types},
+                "cache": self.metadata.stats(),
+                "mock": False
+            }
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+        except Exception as e:
+            self.logger.error(f"Error refreshing metadata: {e}")
+            return [TextContent(type="text", text=json.dumps({"error": str(e)}, indent=2))]
     
     async def update_ticket(self, args: dict) -> Sequence[TextContent]:
         """Update an existing ticket"""
@@ -398,13 +1313,7 @@ class JiraMCPServer:
         assignee = args.get("assignee")
         
         if USE_MOCK or not self.has_token:
-            updates = []
-            if comment:
-                updates.append(f"Added comment")
-            if status:
-                updates.append(f"Changed status to: {status}")
-            if assignee:
-                updates.append(f"Assigned to: {assignee}")
+            updates = self._update_notes(comment, assignee, status)
             
             result = {
                 "status": "updated",
@@ -417,71 +1326,98 @@ class JiraMCPServer:
         
         try:
             updates = []
-            
-            # Add comment
+            errors = []
+            transition = response = None
+
+            if status:
+                # A warm cache skips reading the issue: post the workflow's transition straight away
+                transition = self.metadata.peek(self._transition_key(ticket_id, status))
+                if transition is not None:
+                    self.metadata.hits += 1
+                    response = await self._post_transition(ticket_id, transition, comment, assignee)
+                    if response.status_code in (400, 409):
+                        # Another issue type's workflow, a different current status, or fields off the screen
+                        looked_up = await self._lookup_transition(ticket_id, status, updates, errors)
+                        if looked_up is None:
+                            transition = response = None
+                        elif looked_up["id"] != transition["id"]:
+                            transition = looked_up
+                            response = await self._post_transition(ticket_id, transition, comment, assignee)
+                else:
+                    self.metadata.misses += 1
+                    transition = await self._lookup_transition(ticket_id, status, updates, errors)
+                    if transition:
+                        response = await self._post_transition(ticket_id, transition, comment, assignee)
+
+            if response is not None:
+                if response.status_code == 204:
+                    updates.extend(self._update_notes(comment, assignee, status))
+                    self.logger.info(f"✓ Status changed to {status} for {ticket_id}")
+                    comment = assignee = None
+                elif response.status_code == 400 and (comment or assignee):
+                    # Fields not on the transition screen; transition alone, writes below
+                    response = await self._request(
+                        "POST", f"/rest/api/2/issue/{ticket_id}/transitions", endpoint="write",
+                        json={"transition": {"id": transition["id"]}},
+                    )
+                    if response.status_code == 204:
+                        updates.append(f"Changed status to: {status}")
+                        self.logger.info(f"✓ Status changed to {status} for {ticket_id}")
+                if response.status_code != 204:
+                    self.logger.error(f"Transition to {status} failed for {ticket_id}: {response.status_code} {response.text[:200]}")
+                    errors.append(f"Transition to '{status}' failed: HTTP {response.status_code}: {response.text[:200]}")
+
+            # Comment and assignee are independent writes
+            writes = []
             if comment:
-                comment_response = requests.post(
-                    f"{JIRA_URL}/rest/api/2/issue/{ticket_id}/comment",
-                    headers=self._get_headers(),
-                    json={"body": comment},
-                    timeout=10
-                )
-                if comment_response.status_code == 201:
-                    updates.append("Added comment")
-                    self.logger.info(f"✓ Comment added to {ticket_id}")
-            
-            # Update assignee
+                writes.append(self._request(
+                    "POST", f"/rest/api/2/issue/{ticket_id}/comment", endpoint="write", json={"body": comment}
+                ))
             if assignee:
-                assignee_response = requests.put(
-                    f"{JIRA_URL}/rest/api/2/issue/{ticket_id}",
-                    headers=self._get_headers(),
+                writes.append(self._request(
+                    "PUT", f"/rest/api/2/issue/{ticket_id}", endpoint="write",
                     json={"fields": {"assignee": {"name": assignee}}},
-                    timeout=10
-                )
-                if assignee_response.status_code == 204:
-                    updates.append(f"Assigned to: {assignee}")
-                    self.logger.info(f"✓ Ticket {ticket_id} assigned to {assignee}")
-            
-            # Update status (transition)
-            if status:
-                # Get available transitions
-                transitions_response = requests.get(
-                    f"{JIRA_URL}/rest/api/2/issue/{ticket_id}/transitions",
-                    headers=self._get_headers(),
-                    timeout=10
-                )
-                
-                if transitions_response.status_code == 200:
-                    transitions = transitions_response.json()["transitions"]
-                    # Find matching transition
-                    for transition in transitions:
-                        if transition["name"].lower() == status.lower() or transition["to"]["name"].lower() == status.lower():
-                            # Execute transition
-                            transition_response = requests.post(
-                                f"{JIRA_URL}/rest/api/2/issue/{ticket_id}/transitions",
-                                headers=self._get_headers(),
-                                json={"transition": {"id": transition["id"]}},
-                                timeout=10
-                            )
-                            if transition_response.status_code == 204:
-                                updates.append(f"Changed status to: {status}")
-                                self.logger.info(f"✓ Status changed to {status} for {ticket_id}")
-                            break
-            
+                ))
+            responses = iter(await asyncio.gather(*writes, return_exceptions=True))
+            for wanted, expected, note in ((comment, 201, "Added comment"), (assignee, 204, f"Assigned to: {assignee}")):
+                if not wanted:
+                    continue
+                response = next(responses)
+                if isinstance(response, Exception):
+                    errors.append(f"{note} failed: {type(response).__name__} {response}")
+                elif response.status_code != expected:
+                    errors.append(f"{note} failed: HTTP {response.status_code}: {response.text[:200]}")
+                else:
+                    updates.append(note)
+                    self.logger.info(f"✓ {note} on {ticket_id}")
+
             result = {
-                "status": "updated",
+                "status": "failed" if errors and not updates else "partial" if errors else "updated",
                 "ticket_id": ticket_id,
                 "updates": updates,
                 "updated_at": datetime.now().isoformat(),
                 "mock": False
             }
-            
+            if errors:
+                result["errors"] = errors
+
             return [TextContent(type="text", text=json.dumps(result, indent=2))]
-            
+
         except Exception as e:
             self.logger.error(f"Error updating Jira ticket: {e}")
             return [TextContent(type="text", text=json.dumps({"error": str(e)}, indent=2))]
-    
+
+    @staticmethod
+    def _update_notes(comment: Optional[str], assignee: Optional[str], status: Optional[str]) -> list:
+        notes = []
+        if comment:
+            notes.append("Added comment")
+        if status:
+            notes.append(f"Changed status to: {status}")
+        if assignee:
+            notes.append(f"Assigned to: {assignee}")
+        return notes
+
     async def get_ticket(self, args: dict) -> Sequence[TextContent]:
         """Get ticket details"""
         ticket_id = args.get("ticket_id")
@@ -500,11 +1436,7 @@ class JiraMCPServer:
             return [TextContent(type="text", text=json.dumps(ticket_details, indent=2))]
         
         try:
-            response = requests.get(
-                f"{JIRA_URL}/rest/api/2/issue/{ticket_id}",
-                headers=self._get_headers(),
-                timeout=10
-            )
+            response = await self._request("GET", f"/rest/api/2/issue/{ticket_id}")
             
             if response.status_code == 200:
                 issue = response.json()
@@ -533,11 +1465,54 @@ class JiraMCPServer:
             self.logger.error(f"Error fetching Jira ticket: {e}")
             return [TextContent(type="text", text=json.dumps({"error": str(e)}, indent=2))]
     
+    async def find_duplicates(self, args: dict) -> Sequence[TextContent]:
+        """Look up likely duplicates of a new ticket in the local issue index"""
+        host = args.get("host")
+        fingerprint = args.get("fingerprint")
+        summary = args.get("summary")
+        if not (host or fingerprint or summary):
+            return [TextContent(type="text", text=json.dumps({"error": "host, fingerprint or summary is required"}, indent=2))]
+
+        if USE_MOCK or not self.has_token:
+            return [TextContent(type="text", text=json.dumps({"duplicates": [], "mock": True}, indent=2))]
+        if self.issue_index is None:
+            return [TextContent(type="text", text=json.dumps({"error": "Jira issue index is not enabled"}, indent=2))]
+
+        # The index is refreshed by sync_issue_index from a long-lived owner; lookups never wait on Jira
+        duplicates = self.issue_index.find(
+            host, fingerprint, summary, int(args.get("limit", 5)), float(args.get("min_score", 0.5))
+        )
+        for duplicate in duplicates:
+            duplicate["url"] = f"{JIRA_URL}/browse/{duplicate['ticket_id']}"
+        result = {
+            "duplicates": duplicates,
+            "index_age_seconds": self.issue_index.age_seconds(),
+            "index_ready": self.issue_index.get_meta("watermark") is not None,
+            "mock": False
+        }
+        return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
+    async def handle_sync_issue_index(self, args: dict) -> Sequence[TextContent]:
+        if USE_MOCK or not self.has_token:
+            return [TextContent(type="text", text=json.dumps({"error": "Issue index requires a live Jira connection", "mock": True}, indent=2))]
+        try:
+            result = await self.sync_issue_index(full=bool(args.get("full", False)))
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+        except Exception as e:
+            self.logger.error(f"Error syncing issue index: {e}")
+            return [TextContent(type="text", text=json.dumps({"error": str(e)}, indent=2))]
+
     async def search_tickets(self, args: dict) -> Sequence[TextContent]:
-        """Search tickets using JQL"""
+        """Search tickets using JQL, paging through results and returning only the requested fields"""
         jql = args.get("jql")
-        max_results = args.get("max_results", 50)
-        
+        max_results = int(args.get("max_results", 50))
+        start_at = int(args.get("start_at", 0))
+        fields = args.get("fields") or SEARCH_DEFAULT_FIELDS
+        page_size = max(1, int(args.get("page_size", JIRA_SEARCH_PAGE_SIZE)))
+        if args.get("updated_since"):
+            where, order = re.match(r"(.*?)(\s+ORDER\s+BY\s+.*)?$", jql, re.I | re.S).groups()
+            jql = f"({where}) AND {_jql_updated_since(args['updated_since'])}{order or ''}"
+
         if USE_MOCK or not self.has_token:
             results = {
                 "jql": jql,
@@ -556,45 +1531,26 @@ class JiraMCPServer:
             return [TextContent(type="text", text=json.dumps(results, indent=2))]
         
         try:
-            response = requests.get(
-                f"{JIRA_URL}/rest/api/2/search",
-                headers=self._get_headers(),
-                params={"jql": jql, "maxResults": max_results},
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                results = {
-                    "jql": jql,
-                    "total": data.get("total", 0),
-                    "issues": [
-                        {
-                            "key": issue["key"],
-                            "summary": issue["fields"].get("summary", ""),
-                            "status": issue["fields"].get("status", {}).get("name", ""),
-                            "priority": issue["fields"].get("priority", {}).get("name", "")
-                        }
-                        for issue in data.get("issues", [])
-                    ],
-                    "mock": False
-                }
-                
-                self.logger.info(f"✓ Search returned {len(results['issues'])} results")
-            else:
-                results = {"error": f"Search failed: {response.status_code}"}
-                self.logger.error(f"Search failed: {response.status_code}")
-            
-            return [TextContent(type="text", text=json.dumps(results, indent=2))]
-            
+            def project(issue: dict) -> dict:
+                issue_fields = issue.get("fields", {})
+                return {"key": issue["key"], **{f: self._field_value(issue_fields.get(f)) for f in fields}}
+
+            total, issues = await self._search(jql, fields, start_at, max_results, page_size, project)
+            self.logger.info(f"✓ Search returned {len(issues)} of {total} results")
         except Exception as e:
             self.logger.error(f"Error searching Jira: {e}")
             return [TextContent(type="text", text=json.dumps({"error": str(e)}, indent=2))]
+
+        results = {"jql": jql, "total": total, "start_at": start_at, "issues": issues, "mock": False}
+        return [TextContent(type="text", text=json.dumps(results, indent=2))]
     
     async def run(self):
         """Run the MCP server"""
-        async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(read_stream, write_stream, self.server.create_initialization_options())
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await self.server.run(read_stream, write_stream, self.server.create_initialization_options())
+        finally:
+            await self.close()
 
 def main():
     server = JiraMCPServer()
@@ -7,15 +7,23 @@ Uses SPLUNK_USERNAME / SPLUNK_PASSWORD for REST API queries
 """
 
 import asyncio
+import copy
+import gzip
+import itertools
 import json
 from dotenv import load_dotenv
 import os
 import logging
+import random
+import re
+import time
+import uuid
 from datetime import datetime, timedelta
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
-from typing import Any, Sequence
+from collections import deque
+from typing import Any, Iterator, Optional, Sequence
 import requests
 import urllib3
 
@@ -33,6 +41,45 @@ SPLUNK_PASSWORD = os.getenv("SPLUNK_PASSWORD", "")
 SPLUNK_VERIFY_SSL = os.getenv("SPLUNK_VERIFY_SSL", "false").lower() == "true"
 USE_MOCK = os.getenv("USE_MOCK_SPLUNK", "false").lower() == "true"
 
+# Time-sliced scan defaults
+SPLUNK_SCAN_SLICES = int(os.getenv("SPLUNK_SCAN_SLICES", "1"))
+SPLUNK_SCAN_PARALLELISM = int(os.getenv("SPLUNK_SCAN_PARALLELISM", "4"))
+SPLUNK_SCAN_RETRIES = int(os.getenv("SPLUNK_SCAN_RETRIES", "2"))
+SCAN_MAX_MESSAGES_PER_HOST = 20
+SEVERITY_KEYWORDS = {
+    "Critical": ["critical", "fatal", "panic", "outage"],
+    "High": ["high", "severe", "major"],
+}
+SEVERITY_RANK = {"Medium": 0, "High": 1, "Critical": 2}  # Returned as severity_rank so callers can merge without the keywords
+TIME_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+# Search job lifecycle
+SPLUNK_MAX_CONCURRENT_SEARCHES = int(os.getenv("SPLUNK_MAX_CONCURRENT_SEARCHES", "3"))  # Match the role's srchJobsQuota
+SPLUNK_JOB_TTL = int(os.getenv("SPLUNK_JOB_TTL", "60"))  # Seconds Splunk keeps an unreferenced job
+SPLUNK_SEARCH_TIMEOUT = float(os.getenv("SPLUNK_SEARCH_TIMEOUT", "120"))
+SPLUNK_JOB_POLL_INTERVAL = 0.5
+
+# Synthetic mock data (deterministic for a given seed)
+SPLUNK_MOCK_SEED = int(os.getenv("SPLUNK_MOCK_SEED", "42"))
+SPLUNK_MOCK_HOSTS = int(os.getenv("SPLUNK_MOCK_HOSTS", "3"))
+SPLUNK_MOCK_EVENTS_PER_MINUTE = float(os.getenv("SPLUNK_MOCK_EVENTS_PER_MINUTE", "2"))
+SPLUNK_MOCK_ERROR_RATE = float(os.getenv("SPLUNK_MOCK_ERROR_RATE", "0.3"))
+SPLUNK_MOCK_BURST_EVERY_MINUTES = int(os.getenv("SPLUNK_MOCK_BURST_EVERY_MINUTES", "180"))
+SPLUNK_MOCK_BURST_MINUTES = int(os.getenv("SPLUNK_MOCK_BURST_MINUTES", "10"))
+SPLUNK_MOCK_BURST_MULTIPLIER = float(os.getenv("SPLUNK_MOCK_BURST_MULTIPLIER", "20"))
+SPLUNK_MOCK_TEMPLATES = os.getenv("SPLUNK_MOCK_TEMPLATES", "")  # Optional JSON file: {"error": [...], "info": [...]}
+ERROR_TERMS = ("error", "exception", "failed", "fatal", "timeout")
+
+# HEC batching
+SPLUNK_HEC_BATCH_MAX_EVENTS = int(os.getenv("SPLUNK_HEC_BATCH_MAX_EVENTS", "500"))
+SPLUNK_HEC_BATCH_MAX_BYTES = int(os.getenv("SPLUNK_HEC_BATCH_MAX_BYTES", str(1024 * 1024)))
+SPLUNK_HEC_FLUSH_INTERVAL = float(os.getenv("SPLUNK_HEC_FLUSH_INTERVAL", "2.0"))
+SPLUNK_HEC_RETRIES = int(os.getenv("SPLUNK_HEC_RETRIES", "3"))
+SPLUNK_HEC_ACK = os.getenv("SPLUNK_HEC_ACK", "false").lower() == "true"
+SPLUNK_HEC_ACK_INTERVAL = float(os.getenv("SPLUNK_HEC_ACK_INTERVAL", "10"))  # Seconds between ack polls
+SPLUNK_HEC_ACK_TIMEOUT = float(os.getenv("SPLUNK_HEC_ACK_TIMEOUT", "300"))  # Re-send a batch whose ackId is still pending after this long
+SPLUNK_HEC_ACK_RESENDS = int(os.getenv("SPLUNK_HEC_ACK_RESENDS", "2"))  # Re-sends per batch before it is counted as unacknowledged
+
 print(f"SPLUNK_VERIFY_SSL={SPLUNK_VERIFY_SSL}, USE_MOCK={USE_MOCK}")
 print(f"SPLUNK_USERNAME={SPLUNK_USERNAME}, SPLUNK_PASSWORD={SPLUNK_PASSWORD}")
 print(f"SPLUNK_HOST={SPLUNK_HOST}")
@@ -40,11 +87,327 @@ print(f"SPLUNK_HOST={SPLUNK_HOST}")
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+class HECBatchWriter:
+    """
+    Buffered Splunk HEC writer.
+    Events are concatenated into one HEC batch payload, gzip-compressed and posted over a
+    pooled session; the buffer flushes when it reaches the event/byte limit or after the
+    flush interval. With indexer acknowledgement enabled, ackIds are tracked per channel and
+    polled in the background once they are at least one ack interval old, since indexing
+    takes seconds to complete. Each pending batch keeps its compressed body; one still not
+    acknowledged after SPLUNK_HEC_ACK_TIMEOUT is re-sent up to SPLUNK_HEC_ACK_RESENDS times
+    (at-least-once: a batch indexed but not acknowledged in time is indexed twice).
+    """
+
+    def __init__(self, hec_url: str, token: str, verify_ssl: bool):
+        self.url = f"{hec_url}/services/collector/event"
+        self.ack_url = f"{hec_url}/services/collector/ack"
+        self.verify_ssl = verify_ssl
+        self.channel = str(uuid.uuid4())
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Splunk {token}",
+            "Content-Type": "application/json",
+            "X-Splunk-Request-Channel": self.channel,
+        })
+        self._buffer: list[bytes] = []
+        self._buffer_bytes = 0
+        self._lock = asyncio.Lock()
+        self._timer: asyncio.Task | None = None
+        self._ack_task: asyncio.Task | None = None
+        self.pending_acks: dict[int, tuple[bytes, int, float, int]] = {}  # ackId -> (gzip body, events, sent at, re-sends)
+        self.stats = {"events_sent": 0, "batches_sent": 0, "bytes_raw": 0, "bytes_sent": 0, "retries": 0, "failed_batches": 0,
+                      "acked_batches": 0, "acked_events": 0, "resent_batches": 0, "unacked_batches": 0}
+
+    async def add(self, payload: dict) -> list:
+        """Buffer one HEC event payload, flushing if a size limit is reached"""
+        encoded = json.dumps(payload, separators=(",", ":")).encode()
+        self._buffer.append(encoded)
+        self._buffer_bytes += len(encoded)
+        if len(self._buffer) >= SPLUNK_HEC_BATCH_MAX_EVENTS or self._buffer_bytes >= SPLUNK_HEC_BATCH_MAX_BYTES:
+            return await self.flush()
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later())
+        return []
+
+    async def flush(self) -> list:
+        """Send everything buffered; returns one result per batch"""
+        async with self._lock:
+            if not self._buffer:
+                return []
+            batch, self._buffer, self._buffer_bytes = self._buffer, [], 0
+            result = await self._send(batch)
+        if SPLUNK_HEC_ACK and self.pending_acks and (self._ack_task is None or self._ack_task.done()):
+            self._ack_task = asyncio.create_task(self._poll_acks())
+        return [result]
+
+    async def _flush_later(self):
+        await asyncio.sleep(SPLUNK_HEC_FLUSH_INTERVAL)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Interval HEC flush failed: {e}")
+
+    async def _send(self, batch: list) -> dict:
+        """Compress and deliver one batch of encoded events"""
+        raw = b"".join(batch)
+        body = gzip.compress(raw)
+        result = await self._deliver(body, len(batch))
+        if result["status"] == "success":
+            self.stats["events_sent"] += len(batch)
+            self.stats["batches_sent"] += 1
+            self.stats["bytes_raw"] += len(raw)
+            self.stats["bytes_sent"] += len(body)
+        return result
+
+    async def _deliver(self, body: bytes, events: int, resends: int = 0) -> dict:
+        """Post one compressed batch from a worker thread, then record the outcome and its ackId on the event loop"""
+        outcome = await asyncio.to_thread(self._post_batch, body)
+        self.stats["retries"] += outcome["retries"]
+        if outcome["status"] != "success":
+            self.stats["failed_batches"] += 1
+            return {"status": "error", "events": events, **{k: v for k, v in outcome.items() if k in ("message", "error")}}
+        ack_id = outcome["ack_id"]
+        if ack_id is not None and SPLUNK_HEC_ACK:
+            self.pending_acks[ack_id] = (body, events, time.time(), resends)
+        return {"status": "success", "events": events, "bytes": len(body), "ack_id": ack_id}
+
+    def _post_batch(self, body: bytes) -> dict:
+        """
+        POST one gzip-compressed batch, retrying with exponential backoff. Runs in a worker
+        thread, so it touches no shared state and only returns the outcome:
+        {"status", "ack_id" or "message", "retries"}.
+        """
+        last_error = None
+        for attempt in range(SPLUNK_HEC_RETRIES + 1):
+            try:
+                response = self.session.post(
+                    self.url,
+                    data=body,
+                    headers={"Content-Encoding": "gzip"},
+                    verify=self.verify_ssl,
+                    timeout=30
+                )
+                # 503 = server busy / queue full; 5xx and 429 are worth retrying
+                if response.status_code == 200:
+                    return {"status": "success", "ack_id": response.json().get("ackId"), "retries": attempt}
+                if response.status_code != 429 and response.status_code < 500:
+                    return {"status": "error", "message": f"HEC returned {response.status_code}", "error": response.text, "retries": attempt}
+                last_error = f"HEC returned {response.status_code}: {response.text}"
+            except requests.RequestException as e:
+                last_error = str(e)
+            if attempt < SPLUNK_HEC_RETRIES:
+                time.sleep(min(0.5 * 2 ** attempt, 8))
+        logger.error(f"HEC batch failed after retries: {last_error}")
+        return {"status": "error", "message": last_error, "retries": SPLUNK_HEC_RETRIES}
+
+    async def _poll_acks(self):
+        """Poll outstanding ackIds until all are acknowledged or have timed out"""
+        while self.pending_acks:
+            await asyncio.sleep(SPLUNK_HEC_ACK_INTERVAL)
+            try:
+                await self.check_acks()
+            except Exception as e:
+                logger.warning(f"HEC ack poll failed: {e}")
+
+    async def check_acks(self) -> dict:
+        """
+        Query indexer acknowledgement for ackIds at least one poll interval old, drop the
+        acknowledged ones and re-send batches past the ack timeout. Only the HTTP calls run in
+        worker threads; pending_acks and stats are updated on the event loop.
+        """
+        now = time.time()
+        due = [ack_id for ack_id, (_, _, sent, _) in self.pending_acks.items() if now - sent >= SPLUNK_HEC_ACK_INTERVAL]
+        if not due:
+            return {}
+        acks = await asyncio.to_thread(self._query_acks, due)
+        expired = []
+        for ack_id in due:
+            body, events, sent, resends = self.pending_acks[ack_id]
+            if acks.get(ack_id):
+                del self.pending_acks[ack_id]
+                self.stats["acked_batches"] += 1
+                self.stats["acked_events"] += events
+            elif now - sent >= SPLUNK_HEC_ACK_TIMEOUT:
+                del self.pending_acks[ack_id]
+                expired.append((ack_id, body, events, resends))
+        for ack_id, body, events, resends in expired:
+            if resends >= SPLUNK_HEC_ACK_RESENDS:
+                self.stats["unacked_batches"] += 1
+                logger.error(f"HEC batch of {events} events (ackId {ack_id}) not acknowledged after {resends} re-sends; giving up")
+                continue
+            logger.warning(f"HEC batch of {events} events (ackId {ack_id}) not acknowledged after {SPLUNK_HEC_ACK_TIMEOUT}s; re-sending")
+            self.stats["resent_batches"] += 1
+            result = await self._deliver(body, events, resends + 1)
+            if result["status"] != "success":
+                logger.error(f"Re-send of HEC batch of {events} events failed: {result.get('message')}")
+        return acks
+
+    def _query_acks(self, ack_ids: list) -> dict:
+        response = self.session.post(
+            self.ack_url,
+            json={"acks": ack_ids},
+            verify=self.verify_ssl,
+            timeout=10
+        )
+        response.raise_for_status()
+        return {int(k): v for k, v in response.json().get("acks", {}).items()}
+
+
+class SyntheticEventGenerator:
+    """
+    Deterministic, seeded log event stream for the mock Splunk path.
+    Events are derived per minute bucket from (seed, minute), so any time window yields
+    the same events on every call and windows can be sliced or resumed consistently.
+    Events are generated lazily; nothing is materialised beyond the current minute.
+    Every SPLUNK_MOCK_BURST_EVERY_MINUTES a burst multiplies the event rate and
+    concentrates errors on a single host. A host outside the generated fleet (e.g. a
+    database server named in an alert) gets its own seeded stream at one fleet host's rate.
+    """
+
+    DEFAULT_TEMPLATES = {
+        "error": [
+            "ERROR Connection timeout to {dep} after {ms}ms",
+            "FATAL OutOfMemoryError: Java heap space ({pct}% used)",
+            "ERROR Request failed with status {status} on /api/v1/{endpoint}",
+            "CRITICAL Disk usage at {pct}% on /var",
+            "ERROR Database connection pool exhausted ({n}/{n} in use)",
+            "ERROR Exception in worker thread: NullPointerException at {endpoint}",
+            "ERROR Severe latency {ms}ms calling {dep}",
+        ],
+        "info": [
+            "INFO Request completed in {ms}ms on /api/v1/{endpoint}",
+            "INFO Normal operation checkpoint {n}",
+            "INFO Health check passed for {dep}",
+        ],
+    }
+    DEPENDENCIES = ["prod-db-01", "prod-db-02", "prod-cache-01", "prod-mq-01"]
+    ENDPOINTS = ["payments", "orders", "users", "inventory", "checkout"]
+
+    def __init__(self, seed: int = SPLUNK_MOCK_SEED, hosts: int = SPLUNK_MOCK_HOSTS,
+                 events_per_minute: float = SPLUNK_MOCK_EVENTS_PER_MINUTE, error_rate: float = SPLUNK_MOCK_ERROR_RATE,
+                 burst_every_minutes: int = SPLUNK_MOCK_BURST_EVERY_MINUTES, burst_minutes: int = SPLUNK_MOCK_BURST_MINUTES,
+                 burst_multiplier: float = SPLUNK_MOCK_BURST_MULTIPLIER, templates: Optional[dict] = None):
+        self.seed = seed
+        self.hosts = [f"prod-web-{i + 1:02d}" for i in range(max(1, hosts))]
+        self.events_per_minute = events_per_minute
+        self.error_rate = error_rate
+        self.burst_every_minutes = burst_every_minutes
+        self.burst_minutes = burst_minutes
+        self.burst_multiplier = burst_multiplier
+        self.templates = templates or self._load_templates()
+        self._other_hosts: dict = {}
+
+    def _host_stream(self, host: str) -> "SyntheticEventGenerator":
+        """Deterministic generator for a single host that is not part of the fleet"""
+        if host not in self._other_hosts:
+            stream = copy.copy(self)
+            stream.seed = f"{self.seed}:{host}"
+            stream.hosts = [host]
+            stream.events_per_minute = self.events_per_minute / len(self.hosts)
+            stream._other_hosts = {}
+            self._other_hosts[host] = stream
+        return self._other_hosts[host]
+
+    def _load_templates(self) -> dict:
+        if SPLUNK_MOCK_TEMPLATES:
+            with open(SPLUNK_MOCK_TEMPLATES) as f:
+                return {**self.DEFAULT_TEMPLATES, **json.load(f)}
+        return self.DEFAULT_TEMPLATES
+
+    def events(self, earliest: float, latest: float, host: Optional[str] = None,
+               errors_only: bool = False, newest_first: bool = False) -> Iterator[dict]:
+        """Yield events with earliest <= _time < latest"""
+        if host is not None and host not in self.hosts:
+            yield from self._host_stream(host).events(earliest, latest, None, errors_only, newest_first)
+            return
+        first, last = int(earliest) // 60, (int(latest) - 1) // 60
+        minutes = range(last, first - 1, -1) if newest_first else range(first, last + 1)
+        for minute in minutes:
+            bucket = self._minute_events(minute, host, errors_only)
+            if newest_first:
+                bucket.reverse()
+            for event in bucket:
+                if earliest <= event["_epoch"] < latest:
+                    yield event
+
+    def _minute_events(self, minute: int, host: Optional[str] = None, errors_only: bool = False) -> list:
+        # Every random draw happens regardless of filters so a filtered stream is a
+        # subset of the unfiltered one; filtered-out events are simply never formatted.
+        rng = random.Random(f"{self.seed}:{minute}")
+        burst_host = None
+        rate, error_rate = self.events_per_minute, self.error_rate
+        if self.burst_every_minutes and minute % self.burst_every_minutes < self.burst_minutes:
+            burst_host = random.Random(f"{self.seed}:burst:{minute // self.burst_every_minutes}").choice(self.hosts)
+            rate *= self.burst_multiplier
+            error_rate = max(error_rate, 0.8)
+
+        count = int(rate) + (1 if rng.random() < rate - int(rate) else 0)
+        offsets = sorted(rng.random() * 60 for _ in range(count))
+        events = []
+        for offset in offsets:
+            is_error = rng.random() < error_rate
+            if burst_host and is_error and rng.random() < 0.7:
+                event_host = burst_host
+            else:
+                event_host = self.hosts[int(rng.random() * len(self.hosts))]
+            templates = self.templates["error" if is_error else "info"]
+            template = templates[int(rng.random() * len(templates))]
+            draw = rng.random()
+            if (errors_only and not is_error) or (host is not None and event_host != host):
+                continue
+            epoch = minute * 60 + offset
+            raw = template.format(
+                dep=self.DEPENDENCIES[int(draw * len(self.DEPENDENCIES))],
+                endpoint=self.ENDPOINTS[int(draw * 7919) % len(self.ENDPOINTS)],
+                ms=50 + int(draw * 29950),
+                pct=80 + int(draw * 20),
+                status=(500, 502, 503, 504)[int(draw * 4)],
+                n=10 + int(draw * 190),
+            )
+            events.append({
+                "_epoch": epoch,
+                "_error": is_error,
+                "_time": datetime.fromtimestamp(epoch).isoformat(),
+                "indextime": int(epoch) + 1,
+                "host": event_host,
+                "source": "/var/log/app/app.log",
+                "sourcetype": "application:log",
+                "_raw": f"[{event_host}] {raw}",
+            })
+        return events
+
+    @staticmethod
+    def to_result(event: dict, **extra) -> dict:
+        """Strip generator bookkeeping to the shape of a Splunk result row"""
+        row = {k: v for k, v in event.items() if not k.startswith("_") or k in ("_time", "_raw")}
+        row.update(extra)
+        return row
+
 class SplunkMCPServer:
     def __init__(self):
         self.server = Server("splunk-server")
         self.has_token = bool(SPLUNK_TOKEN)
         self.has_userpass = bool(SPLUNK_USERNAME and SPLUNK_PASSWORD)
+        self.hec = HECBatchWriter(SPLUNK_HEC_URL, SPLUNK_TOKEN, SPLUNK_VERIFY_SSL) if self.has_token else None
+        self.synthetic = SyntheticEventGenerator()
+        self.http = requests.Session()
+        self.http.auth = self._get_auth()
+        self.http.verify = SPLUNK_VERIFY_SSL
+        self._search_slots = asyncio.Semaphore(SPLUNK_MAX_CONCURRENT_SEARCHES)
+        self.jobs: dict[str, dict] = {}
+        self.search_metrics = {
+            "jobs_created": 0,
+            "jobs_deleted": 0,
+            "jobs_cancelled": 0,
+            "jobs_failed": 0,
+            "waiting_for_slot": 0,
+            "slot_wait_seconds_total": 0.0,
+            "slot_wait_seconds_max": 0.0,
+            "dispatch_queue_seconds_total": 0.0,
+            "dispatch_queue_seconds_max": 0.0,
+        }
         self.setup_tools()
 
         if not self.has_token and not self.has_userpass:
@@ -116,6 +479,45 @@ class SplunkMCPServer:
                         },
                         "required": ["host", "error_pattern"]}
                 ),
+                Tool(
+                    name="scan_errors",
+                    description="Scan for errors by splitting the time range into slices searched in parallel, returning per-host aggregates",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "search_term": {"type": "string", "description": "SPL filter applied to every slice", "default": "(error OR exception OR failed OR fatal OR timeout)"},
+                            "time_range": {"type": "string", "description": "Time range (e.g., 1h, 24h, 7d)", "default": "24h"},
+                            "slices": {"type": "integer", "description": "Number of time slices", "default": SPLUNK_SCAN_SLICES},
+                            "indexes": {"type": "array", "items": {"type": "string"}, "description": "Indexes to split the scan by (default: all)"},
+                            "max_parallel": {"type": "integer", "description": "Maximum concurrent slice searches", "default": SPLUNK_SCAN_PARALLELISM},
+                            "max_results_per_slice": {"type": "integer", "description": "Maximum events fetched per slice", "default": 1000}
+                        }
+                    }
+                ),
+                Tool(
+                    name="search_since",
+                    description="Search one index for events indexed after a high-water mark (_indextime), oldest first",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "search_term": {"type": "string", "description": "SPL filter", "default": "(error OR exception OR failed OR fatal OR timeout)"},
+                            "index": {"type": "string", "description": "Splunk index to search", "default": "*"},
+                            "index_earliest": {"type": "integer", "description": "Return only events with _indextime greater than this epoch"},
+                            "index_offset": {"type": "integer", "description": "Events at _indextime index_earliest+1 already returned by a truncated page", "default": 0},
+                            "max_lookback": {"type": "string", "description": "Upper bound on event _time age (e.g., 24h)", "default": "24h"},
+                            "max_results": {"type": "integer", "description": "Maximum events returned", "default": 1000}
+                        },
+                        "required": ["index_earliest"]
+                    }
+                ),
+                Tool(
+                    name="get_search_metrics",
+                    description="Get search job lifecycle metrics: active jobs, cleanup counts and queue wait times",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {}
+                    }
+                ),
                 Tool(
                     name="send_event",
                     description="Send event to Splunk HEC",
@@ -128,6 +530,24 @@ class SplunkMCPServer:
                         },
                         "required": ["event"]
                     }
+                ),
+                Tool(
+                    name="send_events",
+                    description="Send a batch of events to Splunk HEC as one gzip-compressed request",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "events": {
+                                "type": "array",
+                                "description": "Events: strings, or objects with event/sourcetype/host/time",
+                                "items": {}
+                            },
+                            "sourcetype": {"type": "string", "description": "Default source type", "default": "aitta:test"},
+                            "host": {"type": "string", "description": "Default host name", "default": "aitta-agent"},
+                            "flush": {"type": "boolean", "description": "Flush the buffer before returning", "default": True}
+                        },
+                        "required": ["events"]
+                    }
                 )
             ]
 
@@ -141,8 +561,16 @@ class SplunkMCPServer:
                 return await self.get_alert_details(arguments)
             elif name == "search_errors":
                 return await self.search_errors(arguments)
+            elif name == "scan_errors":
+                return await self.scan_errors(arguments)
+            elif name == "search_since":
+                return await self.search_since(arguments)
+            elif name == "get_search_metrics":
+                return await self.get_search_metrics(arguments)
             elif name == "send_event":
                 return await self.send_event(arguments)
+            elif name == "send_events":
+                return await self.send_events(arguments)
             else:
                 raise ValueError(f"Unknown tool: {name}")
 
@@ -158,45 +586,9 @@ class SplunkMCPServer:
 
         try:
             spl_query = f'search index={index}  {search_query} | head 100 | table _time, host, source, sourcetype, _raw'
-            search_url = f"{SPLUNK_HOST}/services/search/jobs"
-
-            response = requests.post(
-                search_url,
-                auth=self._get_auth(),
-                data={
-                    "search": spl_query,
-                    "earliest_time": f"-{time_range}",
-                    "latest_time": "now",
-                    "output_mode": "json"
-                },
-                verify=SPLUNK_VERIFY_SSL
+            results = await self._run_search_job(
+                spl_query, {"earliest_time": f"-{time_range}", "latest_time": "now"}, 100
             )
-
-            if response.status_code not in [200, 201]:
-                logger.error(f"Search job creation failed: {response.status_code} - {response.text}")
-                return await self._mock_query_logs(host, time_range, search_query)
-
-            job_id = response.json().get("sid")
-            if not job_id:
-                logger.error(f"No job ID returned: {response.text}")
-                return await self._mock_query_logs(host, time_range, search_query)
-
-            # Poll briefly, or go straight to results (Splunk will buffer)
-            await asyncio.sleep(2)
-
-            results_url = f"{SPLUNK_HOST}/services/search/jobs/{job_id}/results"
-            results_response = requests.get(
-                results_url,
-                auth=self._get_auth(),
-                params={"output_mode": "json"},
-                verify=SPLUNK_VERIFY_SSL
-            )
-
-            if results_response.status_code != 200:
-                logger.error(f"Failed to fetch results: {results_response.status_code} - {results_response.text}")
-                return await self._mock_query_logs(host, time_range, search_query)
-
-            results = results_response.json().get("results", [])
             logs = []
             for result in results:
                 logs.append({
@@ -231,57 +623,18 @@ class SplunkMCPServer:
         max_results = args.get("max_results", 100)
 
         if USE_MOCK or not self.has_userpass:
-            return await self._mock_search_recent(search_term)
+            return await self._mock_search_recent(search_term, time_range, max_results)
 
         try:
             spl_query = f"search {search_term}"
-
-            search_url = f"{SPLUNK_HOST}/services/search/jobs"
-
-            response = requests.post(
-                search_url,
-                auth=self._get_auth(),
-                data={
-                    "search": spl_query,
+            results = await self._run_search_job(
+                spl_query,
+                {
                     "earliest_time": f"-{time_range}" if not time_range.startswith("-") else time_range,
                     "latest_time": "now",
-                    "output_mode": "json",
                 },
-                verify=SPLUNK_VERIFY_SSL,
+                max_results,
             )
-           
-
-            if response.status_code not in [200, 201]:
-                logger.error(f"Search job creation failed: {response.status_code} - {response.text}")
-                return await self._mock_search_recent(search_term)
-
-            job_id = response.json().get("sid")
-            if not job_id:
-                logger.error(f"No job ID returned: {response.text}")
-                return await self._mock_search_recent(search_term)
-
-            
-            await asyncio.sleep(2)
-
-            results_url = f"{SPLUNK_HOST}/services/search/jobs/{job_id}/results"
-            results_response = requests.get(
-                results_url,
-                auth=self._get_auth(),
-                params={"output_mode": "json", "count": max_results},
-                verify=SPLUNK_VERIFY_SSL,
-            )
-
-            try:
-                json_data = results_response.json()
-            except ValueError:
-                json_data = {"error": results_response.text}
-
-            
-            if results_response.status_code != 200:
-                logger.error(f"Failed to fetch results: {results_response.status_code} - {results_response.text}")
-                return await self._mock_search_recent(search_term)
-
-            results = json_data.get("results", [])
 
             return [
                 TextContent(
@@ -291,6 +644,7 @@ class SplunkMCPServer:
                             "search_term": search_term,
                             "results_count": len(results),
                             "results": results[:max_results],
+                            "hosts": list(self._aggregate_by_host(reversed(results[:max_results])).values()),
                             "mock": False,
                         },
                         indent=2,
@@ -300,8 +654,363 @@ class SplunkMCPServer:
 
         except Exception as e:
             logger.error(f"Error searching Splunk: {e}", exc_info=True)
-            return await self._mock_search_recent(search_term)
+            return await self._mock_search_recent(search_term, time_range, max_results)
+
 
+    async def scan_errors(self, args: dict) -> Sequence[TextContent]:
+        """Scan a time range as parallel slices (optionally per index) and merge per-host aggregates"""
+        search_term = args.get("search_term", "(error OR exception OR failed OR fatal OR timeout)")
+        time_range = args.get("time_range", "24h")
+        slices = max(1, int(args.get("slices", SPLUNK_SCAN_SLICES)))
+        indexes = args.get("indexes") or ["*"]
+        max_parallel = max(1, int(args.get("max_parallel", SPLUNK_SCAN_PARALLELISM)))
+        max_results = int(args.get("max_results_per_slice", 1000))
+
+        try:
+            window = self._parse_time_range(time_range)
+        except ValueError as e:
+            return [TextContent(type="text", text=json.dumps({"error": str(e)}, indent=2))]
+
+        latest = int(time.time())
+        earliest = latest - int(window.total_seconds())
+        tasks = [(index, lo, hi) for index in indexes for lo, hi in self._slice_bounds(earliest, latest, slices)]
+
+        mock = USE_MOCK or not self.has_userpass
+        search = self._mock_search_slice if mock else self._search_slice
+        semaphore = asyncio.Semaphore(max_parallel)
+        started = time.monotonic()
+
+        outcomes = await asyncio.gather(
+            *(self._run_slice(semaphore, search, search_term, index, lo, hi, max_results) for index, lo, hi in tasks),
+            return_exceptions=True,
+        )
+
+        hosts = {}
+        failed_slices = []
+        for (index, lo, hi), outcome in zip(tasks, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Slice index={index} {lo}-{hi} failed: {outcome}")
+                failed_slices.append({"index": index, "earliest": lo, "latest": hi, "error": str(outcome)})
+                continue
+            self._merge_host_aggregates(hosts, outcome)
+
+        return [TextContent(
+            type="text",
+            text=json.dumps({
+                "search_term": search_term,
+                "time_range": time_range,
+                "indexes": indexes,
+                "slices_total": len(tasks),
+                "slices_failed": len(failed_slices),
+                "failed_slices": failed_slices,
+                "total_error_events": sum(h["error_count"] for h in hosts.values()),
+                "affected_hosts": len(hosts),
+                "hosts": list(hosts.values()),
+                "elapsed_seconds": round(time.monotonic() - started, 3),
+                "mock": mock
+            }, indent=2)
+        )]
+
+    async def search_since(self, args: dict) -> Sequence[TextContent]:
+        """
+        Incremental search: events indexed after the caller's watermark, oldest first, with
+        _cd as a stable tiebreak inside a second. The returned watermark is the highest
+        _indextime seen. When the page is truncated the watermark stays one second short of
+        the last event and the returned offset counts the events already read from that last
+        second, so the next call resumes inside it instead of re-reading or stalling on it.
+        """
+        search_term = args.get("search_term", "(error OR exception OR failed OR fatal OR timeout)")
+        index = args.get("index", "*")
+        watermark = int(args.get("index_earliest", 0))
+        offset = int(args.get("index_offset", 0))
+        max_lookback = args.get("max_lookback", "24h")
+        max_results = int(args.get("max_results", 1000))
+
+        mock = USE_MOCK or not self.has_userpass
+        try:
+            if mock:
+                events = self._mock_events_since(index, watermark, max_results, offset)
+            else:
+                skip = ""
+                if offset:
+                    # Drop the events of the boundary second that the previous page already returned
+                    skip = (
+                        f" | streamstats count as boundary_pos by indextime"
+                        f" | where indextime > {watermark + 1} OR boundary_pos > {offset}"
+                    )
+                spl_query = (
+                    f"search index={index} _index_earliest={watermark + 1} {search_term}"
+                    f" | eval indextime=_indextime | sort 0 indextime, _cd{skip} | head {max_results}"
+                    f" | table _time, indextime, index, host, source, _raw"
+                )
+                lookback = self._parse_time_range(max_lookback)
+                events = await self._run_search_job(
+                    spl_query,
+                    {"earliest_time": f"-{int(lookback.total_seconds())}s", "latest_time": "now"},
+                    max_results,
+                )
+        except Exception as e:
+            logger.error(f"Incremental search failed for index={index}: {e}", exc_info=True)
+            return [TextContent(type="text", text=json.dumps({"error": str(e), "index": index}, indent=2))]
+
+        truncated = len(events) >= max_results
+        new_watermark = max((int(float(e.get("indextime", watermark))) for e in events), default=watermark)
+        new_offset = 0 if events else offset
+        if truncated and events:
+            # Hold the watermark before the last second and remember how far into it this page got
+            new_offset = sum(1 for e in events if int(float(e.get("indextime", watermark))) == new_watermark)
+            if new_watermark == watermark + 1:
+                new_offset += offset
+            new_watermark -= 1
+
+        return [TextContent(
+            type="text",
+            text=json.dumps({
+                "index": index,
+                "index_earliest": watermark,
+                "watermark": new_watermark,
+                "offset": new_offset,
+                "truncated": truncated,
+                "results_count": len(events),
+                "results": events,
+                "hosts": list(self._aggregate_by_host(events).values()),
+                "mock": mock
+            }, indent=2)
+        )]
+
+    async def _run_slice(self, semaphore: asyncio.Semaphore, search, search_term: str,
+                         index: str, earliest: int, latest: int, max_results: int) -> dict:
+        """Run one slice under the parallelism cap, retrying it on its own before giving up"""
+        async with semaphore:
+            for attempt in range(SPLUNK_SCAN_RETRIES + 1):
+                try:
+                    events = await search(search_term, index, earliest, latest, max_results)
+                    return self._aggregate_by_host(events)
+                except Exception as e:
+                    if attempt == SPLUNK_SCAN_RETRIES:
+                        raise
+                    logger.warning(f"Slice index={index} {earliest}-{latest} attempt {attempt + 1} failed: {e}, retrying")
+                    await asyncio.sleep(2 ** attempt)
+
+    async def _search_slice(self, search_term: str, index: str, earliest: int, latest: int, max_results: int) -> list:
+        """Run a search job for one slice and return its events"""
+        spl_query = f"search index={index} {search_term} | head {max_results} | table _time, host, source, _raw"
+        results = await self._run_search_job(spl_query, {"earliest_time": str(earliest), "latest_time": str(latest)}, max_results)
+        return list(reversed(results))
+
+    async def _mock_search_slice(self, search_term: str, index: str, earliest: int, latest: int, max_results: int) -> list:
+        """Mock search for one slice"""
+        return self._mock_slice_events(search_term, index, earliest, latest, max_results)
+
+    async def _run_search_job(self, spl_query: str, time_bounds: dict, max_results: int) -> list:
+        """
+        Run a search job under the client-side concurrency cap.
+        Jobs are created with a short TTL, deleted as soon as their results are read,
+        and cancelled if the search fails, times out or its caller is cancelled.
+        """
+        queued_at = time.monotonic()
+        self.search_metrics["waiting_for_slot"] += 1
+        try:
+            await self._search_slots.acquire()
+        finally:
+            self.search_metrics["waiting_for_slot"] -= 1
+        try:
+            self._record_wait("slot_wait", time.monotonic() - queued_at)
+            sid = await asyncio.to_thread(self._create_job, spl_query, time_bounds)
+            self.jobs[sid] = {"search": spl_query[:200], "created": datetime.now().isoformat(), "state": "QUEUED"}
+            consumed = False
+            try:
+                await asyncio.wait_for(self._wait_for_job(sid), SPLUNK_SEARCH_TIMEOUT)
+                results = await asyncio.to_thread(self._fetch_results, sid, max_results)
+                consumed = True
+                return results
+            finally:
+                await asyncio.shield(self._release_job(sid, cancel=not consumed))
+        finally:
+            self._search_slots.release()
+
+    def _create_job(self, spl_query: str, time_bounds: dict) -> str:
+        response = self.http.post(
+            f"{SPLUNK_HOST}/services/search/jobs",
+            data={
+                "search": spl_query,
+                **time_bounds,
+                "timeout": SPLUNK_JOB_TTL,
+                "output_mode": "json"
+            },
+            timeout=30
+        )
+        if response.status_code not in [200, 201]:
+            raise RuntimeError(f"Search job creation failed: {response.status_code} - {response.text}")
+        job_id = response.json().get("sid")
+        if not job_id:
+            raise RuntimeError(f"No job ID returned: {response.text}")
+        self.search_metrics["jobs_created"] += 1
+        return job_id
+
+    async def _wait_for_job(self, sid: str):
+        """Poll job status until it is done, recording time spent in Splunk's dispatch queue"""
+        started = time.monotonic()
+        dispatched = False
+        interval = SPLUNK_JOB_POLL_INTERVAL
+        while True:
+            content = await asyncio.to_thread(self._job_status, sid)
+            state = content.get("dispatchState", "")
+            self.jobs[sid]["state"] = state
+            if not dispatched and state not in ("QUEUED", "PARSING"):
+                dispatched = True
+                self._record_wait("dispatch_queue", time.monotonic() - started)
+            if state == "FAILED":
+                self.search_metrics["jobs_failed"] += 1
+                raise RuntimeError(f"Search job {sid} failed: {content.get('messages')}")
+            if content.get("isDone"):
+                return
+            await asyncio.sleep(interval)
+            interval = min(interval * 1.5, 2.0)
+
+    def _job_status(self, sid: str) -> dict:
+        response = self.http.get(
+            f"{SPLUNK_HOST}/services/search/jobs/{sid}",
+            params={"output_mode": "json"},
+            timeout=30
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to fetch job status: {response.status_code} - {response.text}")
+        entries = response.json().get("entry", [])
+        return entries[0].get("content", {}) if entries else {}
+
+    def _fetch_results(self, sid: str, max_results: int) -> list:
+        response = self.http.get(
+            f"{SPLUNK_HOST}/services/search/jobs/{sid}/results",
+            params={"output_mode": "json", "count": max_results},
+            timeout=60
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to fetch results: {response.status_code} - {response.text}")
+        return response.json().get("results", [])
+
+    async def _release_job(self, sid: str, cancel: bool):
+        """Delete a consumed job, or cancel an abandoned one, freeing its dispatch slot and disk"""
+        try:
+            if cancel:
+                await asyncio.to_thread(
+                    self.http.post, f"{SPLUNK_HOST}/services/search/jobs/{sid}/control",
+                    data={"action": "cancel"}, timeout=10
+                )
+                self.search_metrics["jobs_cancelled"] += 1
+            else:
+                await asyncio.to_thread(self.http.delete, f"{SPLUNK_HOST}/services/search/jobs/{sid}", timeout=10)
+                self.search_metrics["jobs_deleted"] += 1
+        except Exception as e:
+            logger.warning(f"Failed to release search job {sid}: {e}")
+        finally:
+            self.jobs.pop(sid, None)
+
+    def _record_wait(self, kind: str, seconds: float):
+        self.search_metrics[f"{kind}_seconds_total"] += seconds
+        self.search_metrics[f"{kind}_seconds_max"] = max(self.search_metrics[f"{kind}_seconds_max"], seconds)
+
+    async def get_search_metrics(self, args: dict) -> Sequence[TextContent]:
+        """Report search job lifecycle metrics"""
+        created = self.search_metrics["jobs_created"]
+        metrics = dict(self.search_metrics)
+        metrics["slot_wait_seconds_avg"] = round(metrics["slot_wait_seconds_total"] / created, 3) if created else 0.0
+        metrics["dispatch_queue_seconds_avg"] = round(metrics["dispatch_queue_seconds_total"] / created, 3) if created else 0.0
+        return [TextContent(
+            type="text",
+            text=json.dumps({
+                "max_concurrent_searches": SPLUNK_MAX_CONCURRENT_SEARCHES,
+                "job_ttl_seconds": SPLUNK_JOB_TTL,
+                "active_jobs": self.jobs,
+                "metrics": metrics
+            }, indent=2)
+        )]
+
+    def _aggregate_by_host(self, events) -> dict:
+        """
+        Group events (oldest first, streamed) into per-host error aggregates. This is the one
+        place messages are classified into severities; callers merge aggregates by severity_rank.
+        """
+        hosts = {}
+        for event in events:
+            host = event.get("host", "unknown")
+            raw_message = event.get("_raw", "")
+            agg = hosts.setdefault(host, {
+                "host": host,
+                "error_count": 0,
+                "messages": deque(maxlen=SCAN_MAX_MESSAGES_PER_HOST),
+                "severity": "Medium",
+                "severity_rank": SEVERITY_RANK["Medium"],
+                "latest_timestamp": event.get("_time", datetime.now().isoformat())
+            })
+            agg["error_count"] += 1
+            agg["messages"].append(raw_message[:200])
+            agg["latest_timestamp"] = max(agg["latest_timestamp"], event.get("_time", agg["latest_timestamp"]))
+            severity = self._classify_severity(raw_message)
+            if SEVERITY_RANK[severity] > agg["severity_rank"]:
+                agg["severity"] = severity
+                agg["severity_rank"] = SEVERITY_RANK[severity]
+        for agg in hosts.values():
+            agg["messages"] = list(agg["messages"])
+        return hosts
+
+    def _merge_host_aggregates(self, merged: dict, slice_hosts: dict):
+        """Fold one slice's per-host aggregates into the running scan totals"""
+        for host, agg in slice_hosts.items():
+            if host not in merged:
+                merged[host] = dict(agg, messages=list(agg["messages"]))
+                continue
+            target = merged[host]
+            target["error_count"] += agg["error_count"]
+            if agg["latest_timestamp"] >= target["latest_timestamp"]:
+                target["messages"] = (target["messages"] + agg["messages"])[-SCAN_MAX_MESSAGES_PER_HOST:]
+                target["latest_timestamp"] = agg["latest_timestamp"]
+            else:
+                target["messages"] = (agg["messages"] + target["messages"])[-SCAN_MAX_MESSAGES_PER_HOST:]
+            if agg["severity_rank"] > target["severity_rank"]:
+                target["severity"] = agg["severity"]
+                target["severity_rank"] = agg["severity_rank"]
+
+    def _classify_severity(self, raw_message: str) -> str:
+        """Map an error message to an alert severity by keyword"""
+        lowered = raw_message.lower()
+        for severity in ("Critical", "High"):
+            if any(keyword in lowered for keyword in SEVERITY_KEYWORDS[severity]):
+                return severity
+        return "Medium"
+
+    def _parse_time_range(self, time_range: str) -> timedelta:
+        """Parse a relative Splunk time range such as 30m, -24h or 7d"""
+        match = re.fullmatch(r"-?(\d+)([smhdw])", time_range.strip())
+        if not match:
+            raise ValueError(f"Unsupported time range: {time_range}")
+        return timedelta(seconds=int(match.group(1)) * TIME_UNITS[match.group(2)])
+
+    def _slice_bounds(self, earliest: int, latest: int, slices: int) -> list:
+        """Split [earliest, latest) into contiguous epoch slices"""
+        step = max(1, (latest - earliest) // slices)
+        bounds = []
+        lo = earliest
+        while lo < latest:
+            hi = latest if len(bounds) == slices - 1 else min(latest, lo + step)
+            bounds.append((lo, hi))
+            lo = hi
+        return bounds
+
+    def _mock_slice_events(self, search_term: str, index: str, earliest: int, latest: int, max_results: int):
+        """Synthetic error events for one slice, oldest first"""
+        events = self.synthetic.events(earliest, latest, errors_only=True)
+        return (self.synthetic.to_result(e, index=index) for e in itertools.islice(events, max_results))
+
+    def _mock_events_since(self, index: str, watermark: int, max_results: int, offset: int = 0) -> list:
+        """Synthetic error events indexed since the watermark, oldest first, skipping offset events of the first second"""
+        now = int(time.time())
+        earliest = max(watermark, now - int(timedelta(days=1).total_seconds()))
+        events = (e for e in self.synthetic.events(earliest - 1, now, errors_only=True) if watermark < e["indextime"] <= now)
+        if offset:
+            skipped = itertools.count(1)
+            events = (e for e in events if e["indextime"] != watermark + 1 or next(skipped) > offset)
+        return [self.synthetic.to_result(e, index=index) for e in itertools.islice(events, max_results)]
 
     async def send_event(self, args: dict) -> Sequence[TextContent]:
         """Send event to Splunk HEC using token"""
@@ -325,12 +1034,10 @@ class SplunkMCPServer:
                 "time": int(datetime.now().timestamp())
             }
 
-            response = requests.post(
+            # requests is blocking; keep the event loop free while the POST is in flight
+            response = await asyncio.to_thread(
+                self.hec.session.post,
                 hec_url,
-                headers={
-                    "Authorization": f"Splunk {SPLUNK_TOKEN}",
-                    "Content-Type": "application/json"
-                },
                 json=payload,
                 verify=SPLUNK_VERIFY_SSL,
                 timeout=10
@@ -363,18 +1070,73 @@ class SplunkMCPServer:
                 text=json.dumps({"status": "error", "message": str(e)}, indent=2)
             )]
 
+    async def send_events(self, args: dict) -> Sequence[TextContent]:
+        """Send many events through the buffered HEC writer"""
+        events = args.get("events") or []
+        sourcetype = args.get("sourcetype", "aitta:test")
+        host = args.get("host", "aitta-agent")
+        flush = args.get("flush", True)
+
+        if USE_MOCK or not self.has_token:
+            return [TextContent(
+                type="text",
+                text=json.dumps({"status": "mock", "events": len(events), "message": "Events would be sent to HEC"}, indent=2)
+            )]
+
+        try:
+            now = time.time()
+            batches = []
+            for event in events:
+                item = event if isinstance(event, dict) else {"event": event}
+                batches.extend(await self.hec.add({
+                    "event": item.get("event"),
+                    "sourcetype": item.get("sourcetype", sourcetype),
+                    "source": "aitta",
+                    "host": item.get("host", host),
+                    "time": item.get("time", now)
+                }))
+            if flush:
+                batches.extend(await self.hec.flush())
+
+            failed = [b for b in batches if b["status"] != "success"]
+            return [TextContent(
+                type="text",
+                text=json.dumps({
+                    "status": "error" if failed else "success",
+                    "events": len(events),
+                    "batches": batches,
+                    "buffered": len(self.hec._buffer),
+                    "pending_acks": len(self.hec.pending_acks),
+                    "stats": self.hec.stats
+                }, indent=2)
+            )]
+
+        except Exception as e:
+            logger.error(f"Error sending batch to HEC: {e}", exc_info=True)
+            return [TextContent(
+                type="text",
+                text=json.dumps({"status": "error", "message": str(e)}, indent=2)
+            )]
+
     async def _mock_query_logs(self, host: str, time_range: str, search_query: str) -> Sequence[TextContent]:
-        """Mock implementation for testing"""
+        """Mock implementation serving the synthetic event stream"""
+        latest = time.time()
+        try:
+            earliest = latest - self._parse_time_range(time_range).total_seconds()
+        except ValueError:
+            earliest = latest - 1800
+        errors_only = any(term in search_query.lower() for term in ERROR_TERMS)
+        events = self.synthetic.events(earliest, latest, host=host, errors_only=errors_only, newest_first=True)
         mock_logs = [
             {
-                "timestamp": (datetime.now() - timedelta(minutes=i*3)).isoformat(),
-                "level": "ERROR" if i % 3 == 0 else "INFO",
-                "message": f"[{host}] Memory usage at {85 + i}%" if i % 3 == 0 else f"[{host}] Normal operation checkpoint {i}",
-                "source": "/var/log/app/app.log",
-                "sourcetype": "application:log",
-                "host": host
+                "timestamp": e["_time"],
+                "level": "ERROR" if e["_error"] else "INFO",
+                "message": e["_raw"][:500],
+                "source": e["source"],
+                "sourcetype": e["sourcetype"],
+                "host": e["host"]
             }
-            for i in range(15)
+            for e in itertools.islice(events, 100)
         ]
 
         return [TextContent(
@@ -389,14 +1151,23 @@ class SplunkMCPServer:
             }, indent=2)
         )]
 
-    async def _mock_search_recent(self, search_term: str) -> Sequence[TextContent]:
-        """Mock search results"""
+    async def _mock_search_recent(self, search_term: str, time_range: str = "15m", max_results: int = 100) -> Sequence[TextContent]:
+        """Mock search results served from the synthetic event stream"""
+        latest = time.time()
+        try:
+            earliest = latest - self._parse_time_range(time_range).total_seconds()
+        except ValueError:
+            earliest = latest - 900
+        errors_only = any(term in (search_term or "").lower() for term in ERROR_TERMS)
+        events = self.synthetic.events(earliest, latest, errors_only=errors_only, newest_first=True)
+        results = [self.synthetic.to_result(e) for e in itertools.islice(events, max_results)]
         return [TextContent(
             type="text",
             text=json.dumps({
                 "search_term": search_term,
-                "results_count": 5,
-                "results": [{"_time": datetime.now().isoformat(), "_raw": f"Mock result for {search_term}"}],
+                "results_count": len(results),
+                "results": results,
+                "hosts": list(self._aggregate_by_host(reversed(results)).values()),
                 "mock": True
             }, indent=2)
         )]
@@ -431,8 +1202,14 @@ class SplunkMCPServer:
 
     async def run(self):
         """Run the MCP server"""
-        async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(read_stream, write_stream, self.server.create_initialization_options())
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await self.server.run(read_stream, write_stream, self.server.create_initialization_options())
+        finally:
+            if self.hec is not None:
+                await self.hec.flush()
+            for sid in list(self.jobs):
+                await self._release_job(sid, cancel=True)
 
 def main():
     server = SplunkMCPServer()
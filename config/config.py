@@ -22,6 +22,10 @@ class Config:
     SPLUNK_TOKEN = os.getenv("SPLUNK_TOKEN", "")
     SPLUNK_USERNAME = os.getenv("SPLUNK_USERNAME", "")
     SPLUNK_PASSWORD = os.getenv("SPLUNK_PASSWORD", "")
+    SPLUNK_SCAN_SLICES = int(os.getenv("SPLUNK_SCAN_SLICES", "1"))  # >1 enables time-sliced parallel scans
+    SPLUNK_SCAN_PARALLELISM = int(os.getenv("SPLUNK_SCAN_PARALLELISM", "4"))
+    SPLUNK_AUDIT_EVENTS = os.getenv("SPLUNK_AUDIT_EVENTS", "false").lower() == "true"  # Batch agent activity to HEC
+    SPLUNK_SCAN_INDEXES = os.getenv("SPLUNK_SCAN_INDEXES", "")  # Comma-separated, empty scans index=*
 
     # Jira
     JIRA_URL = os.getenv("JIRA_URL", "")
@@ -33,6 +37,9 @@ class Config:
     CMDB_API_URL = os.getenv("CMDB_API_URL", "")
     CMDB_USERNAME = os.getenv("CMDB_USERNAME", "")
     CMDB_PASSWORD = os.getenv("CMDB_PASSWORD", "")
+    # Local CMDB snapshot, refreshed from the API process; the CMDB server only reads it
+    CMDB_SNAPSHOT_ENABLED = os.getenv("CMDB_SNAPSHOT_ENABLED", "false").lower() == "true"
+    CMDB_SNAPSHOT_SYNC_INTERVAL = int(os.getenv("CMDB_SNAPSHOT_SYNC_INTERVAL", "300"))  # Seconds between delta syncs
 
     # Application
     API_HOST = os.getenv("API_HOST", "0.0.0.0")
@@ -45,6 +52,49 @@ class Config:
     AGENT_MAX_ACTIVITY_LOG = int(os.getenv("AGENT_MAX_ACTIVITY_LOG", "100"))
     AGENT_TIMEOUT = int(os.getenv("AGENT_TIMEOUT", "60"))
 
+    # Continuous (watermark-based) scanning
+    CONTINUOUS_SCAN_ENABLED = os.getenv("CONTINUOUS_SCAN_ENABLED", "false").lower() == "true"
+    CONTINUOUS_SCAN_INTERVAL = int(os.getenv("CONTINUOUS_SCAN_INTERVAL", "300"))  # Seconds between runs
+    CONTINUOUS_SCAN_LOOKBACK = os.getenv("CONTINUOUS_SCAN_LOOKBACK", "24h")  # First run / late-event bound
+    CONTINUOUS_SCAN_MAX_EVENTS = int(os.getenv("CONTINUOUS_SCAN_MAX_EVENTS", "1000"))  # Per index per run
+    CONTINUOUS_SCAN_REALERT_MINUTES = int(os.getenv("CONTINUOUS_SCAN_REALERT_MINUTES", "60"))
+    SCAN_ALERT_CONCURRENCY = int(os.getenv("SCAN_ALERT_CONCURRENCY", "5"))  # Hosts processed at once per scan
+
+    # Jira ticket batching
+    JIRA_BATCH_WINDOW_MS = int(os.getenv("JIRA_BATCH_WINDOW_MS", "50"))  # Coalescing window for concurrent creates
+    JIRA_BATCH_MAX = int(os.getenv("JIRA_BATCH_MAX", "50"))
+
+    # Jira duplicate detection (comment on an open ticket instead of creating one)
+    JIRA_DEDUP_ENABLED = os.getenv("JIRA_DEDUP_ENABLED", "true").lower() == "true"
+    JIRA_DEDUP_MIN_SCORE = float(os.getenv("JIRA_DEDUP_MIN_SCORE", "0.75"))
+    # The API process owns the index refresh; the Jira server only answers lookups from it
+    JIRA_INDEX_SYNC_ENABLED = os.getenv("JIRA_INDEX_SYNC_ENABLED", "true").lower() == "true"
+    JIRA_INDEX_SYNC_INTERVAL = int(os.getenv("JIRA_INDEX_SYNC_INTERVAL", "120"))  # Seconds between delta syncs
+
+    # Ticket outbox (Jira / ServiceNow writes queued in the database and sent in the background)
+    OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "false").lower() == "true"
+    OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))  # Seconds between drains when idle
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))  # Writes per bulk tool call
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+    OUTBOX_RETRY_BACKOFF = float(os.getenv("OUTBOX_RETRY_BACKOFF", "10"))  # Base seconds; doubles per attempt
+    OUTBOX_RETRY_MAX_WAIT = float(os.getenv("OUTBOX_RETRY_MAX_WAIT", "900"))
+
+    # Jira -> local ticket status sync (one JQL search per interval)
+    TICKET_SYNC_ENABLED = os.getenv("TICKET_SYNC_ENABLED", "false").lower() == "true"
+    TICKET_SYNC_INTERVAL = int(os.getenv("TICKET_SYNC_INTERVAL", "300"))  # Seconds between runs
+    TICKET_SYNC_MAX_RESULTS = int(os.getenv("TICKET_SYNC_MAX_RESULTS", "5000"))  # Issues per run; the rest follow next run
+    # Jira resolutions counted as false positives in dashboard metrics
+    FALSE_POSITIVE_RESOLUTIONS = [
+        r.strip() for r in os.getenv(
+            "FALSE_POSITIVE_RESOLUTIONS", "Won't Do,Won't Fix,Not a Bug,Cannot Reproduce,Duplicate"
+        ).split(",") if r.strip()
+    ]
+
+    # MCP call_tool record/replay (off | record | replay)
+    MCP_CASSETTE_MODE = os.getenv("MCP_CASSETTE_MODE", "off").lower()
+    MCP_CASSETTE_PATH = os.getenv("MCP_CASSETTE_PATH", "mcp_cassette.jsonl")
+    MCP_CASSETTE_LATENCY_SCALE = float(os.getenv("MCP_CASSETTE_LATENCY_SCALE", "0"))  # Replay: 0 = instant, 1 = recorded
+
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./aitta.db")
 
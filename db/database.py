@@ -2,7 +2,7 @@
 Database configuration and session management for AITTA
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, Session
 from models.database import Base
 from config.config import config
@@ -19,6 +19,24 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base.metadata.create_all(bind=engine)
 
 
+def _add_missing_columns():
+    """create_all does not alter existing tables; add nullable columns introduced since they were created"""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    conn.execute(text(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}"
+                    ))
+
+
+_add_missing_columns()
+
+
 def get_db() -> Session:
     """Database dependency for FastAPI"""
     db = SessionLocal()
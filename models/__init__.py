@@ -3,7 +3,7 @@ Models package for AITTA
 Contains database models and API schemas
 """
 
-from .database import Base, TicketRecord, MetricRecord, AgentActivityRecord
+from .database import Base, TicketRecord, MetricRecord, AgentActivityRecord, ScanWatermark, HostScanState
 from .schemas import (
     AlertData, TicketResponse, MetricsResponse,
     ActivityLogItem, IncidentPattern, TimelineItem,
@@ -16,6 +16,8 @@ __all__ = [
     "TicketRecord",
     "MetricRecord",
     "AgentActivityRecord",
+    "ScanWatermark",
+    "HostScanState",
     # API schemas
     "AlertData",
     "TicketResponse",
@@ -26,6 +26,12 @@ class TicketRecord(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     processing_time = Column(Float)
     status = Column(String, default="created")
+    jira_status = Column(String)
+    duplicate_of = Column(String)
+    incident_number = Column(String, index=True)
+    resolution = Column(String)
+    resolved_at = Column(DateTime)
+    status_synced_at = Column(DateTime)
 
 
 class MetricRecord(Base):
@@ -51,3 +57,58 @@ class AgentActivityRecord(Base):
     action = Column(String)
     detail = Column(Text)
     status = Column(String)
+
+
+class ScanWatermark(Base):
+    """Database model for per-index continuous scan high-water marks"""
+    __tablename__ = "scan_watermarks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    index_name = Column(String, unique=True, index=True)
+    last_indextime = Column(Integer, default=0)
+    last_offset = Column(Integer, default=0)  # Events already read from second last_indextime + 1 (truncated page)
+    last_event_time = Column(String)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class HostScanState(Base):
+    """Database model for per-host state carried across continuous scan runs"""
+    __tablename__ = "host_scan_state"
+
+    id = Column(Integer, primary_key=True, index=True)
+    host = Column(String, unique=True, index=True)
+    total_errors = Column(Integer, default=0)
+    pending_errors = Column(Integer, default=0)
+    last_error_time = Column(String)
+    last_alert_id = Column(String)
+    last_alerted_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class OutboxRecord(Base):
+    """Database model for pending Jira / ServiceNow writes drained by the outbox dispatcher"""
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    idempotency_key = Column(String, unique=True, index=True)
+    kind = Column(String, index=True)  # jira_ticket | jira_comment | servicenow_incident
+    alert_id = Column(String, index=True)
+    payload = Column(Text)
+    status = Column(String, default="pending", index=True)  # pending | done | failed | skipped
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, index=True)
+    last_error = Column(Text)
+    external_id = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class TicketSyncState(Base):
+    """Database model for the Jira status sync high-water mark"""
+    __tablename__ = "ticket_sync_state"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String, unique=True, index=True)
+    last_updated = Column(String)  # Latest Jira `updated` seen, as Jira reported it
+    last_run_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
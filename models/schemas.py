@@ -38,6 +38,7 @@ class MetricsResponse(BaseModel):
     avg_time_to_ticket: float
     false_positive_rate: float
     priority_accuracy: float
+    mean_time_to_resolve: Optional[float] = None  # Hours, from Jira-synced resolution times
 
 
 class ActivityLogItem(BaseModel):
@@ -71,6 +72,7 @@ class TicketSummary(BaseModel):
     created_at: str
     processing_time: float
     status: str
+    jira_status: Optional[str] = None
 
 
 class TicketDetail(BaseModel):
@@ -86,6 +88,7 @@ class TicketDetail(BaseModel):
     created_at: str
     processing_time: float
     status: str
+    jira_status: Optional[str] = None
 
 
 class MCPToolsResponse(BaseModel):
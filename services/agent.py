@@ -4,9 +4,12 @@ Contains the AITTAgent class that orchestrates incident triage and ticket creati
 """
 
 import asyncio
+import copy
+import hashlib
 import json
 import logging
-from datetime import datetime
+import re
+from datetime import datetime, timedelta
 from typing import List, Dict, Any
 
 import google.generativeai as genai
@@ -14,13 +17,25 @@ from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
 from config.config import Config
-from models.database import AgentActivityRecord, TicketRecord
+from db.database import SessionLocal
+from models.database import AgentActivityRecord, TicketRecord, ScanWatermark, HostScanState
 from models.schemas import AlertData, TicketResponse
 from aitta_mcp.mcp_client_manager import MCPClientManager
+from services.ticket_batcher import JiraTicketBatcher
+from services import outbox
 
 # Global MCP manager
 mcp_manager = MCPClientManager(Config)
 
+# Concurrent ticket creations are coalesced into create_tickets_bulk calls
+ticket_batcher = JiraTicketBatcher(mcp_manager, Config.JIRA_BATCH_WINDOW_MS, Config.JIRA_BATCH_MAX)
+
+# The only CMDB fields the triage flow reads; passed as `fields` so the CMDB server fetches and returns just these
+CMDB_ENRICHMENT_FIELDS = ["owner_team", "service", "criticality", "dependencies"]
+
+# Ticket id recorded for an alert folded into an open Jira issue (the issue key goes in duplicate_of)
+DUPLICATE_TICKET_PREFIX = "DUPLICATE-"
+
 
 class AITTAgent:
     """The Agentic AI core that orchestrates the triage process"""
@@ -28,6 +43,7 @@ class AITTAgent:
     def __init__(self, db: Session, config: Config = None):
         self.db = db
         self.config = config
+        self._audit_events: List[Dict] = []
         self._setup_llm()
 
     def _setup_llm(self):
@@ -44,6 +60,13 @@ class AITTAgent:
             logging.getLogger(__name__).warning("No LLM configured, using rule-based triage")
             self.llm_available = False
 
+    def _with_session(self, db: Session) -> "AITTAgent":
+        """Copy of this agent bound to its own DB session and audit buffer, for alerts processed concurrently"""
+        agent = copy.copy(self)
+        agent.db = db
+        agent._audit_events = []
+        return agent
+
     def log_activity(self, alert_id: str, action: str, detail: str, status: str):
         """Log agent activity to database"""
         try:
@@ -56,10 +79,16 @@ class AITTAgent:
             self.db.add(activity)
             self.db.commit()
             logging.getLogger(__name__).info(f"[{alert_id}] {action}: {detail}")
+            if self.config.SPLUNK_AUDIT_EVENTS:
+                self._audit_events.append({
+                    "event": {"alert_id": alert_id, "action": action, "detail": detail, "status": status},
+                    "time": datetime.now().timestamp(),
+                })
         except Exception as e:
             logging.getLogger(__name__).error(f"Failed to log activity: {e}")
 
-    async def process_alert(self, alert: AlertData) -> TicketResponse:
+    async def process_alert(self, alert: AlertData, cmdb_data: Dict[str, Any] = None,
+                            incident_batch: List[Dict] = None) -> TicketResponse:
         """
         Main agentic workflow:
         1. Retrieve logs from Splunk
@@ -68,6 +97,10 @@ class AITTAgent:
         4. Create Jira ticket
         5. Create ServiceNow incident
         6. Save ticket record
+
+        cmdb_data may be supplied when the caller already fetched it in bulk;
+        when incident_batch is given, the ServiceNow incident is queued there
+        for the caller to create in bulk instead of being created inline
         """
         start_time = datetime.now()
 
@@ -79,25 +112,56 @@ class AITTAgent:
             "processing",
         )
 
-        # Step 2: Retrieve logs from Splunk
-        logs = await self._retrieve_logs(alert)
+        try:
+            # Step 2: Retrieve logs from Splunk
+            logs = await self._retrieve_logs(alert)
+
+            # Step 3: Enrich with CMDB data
+            cmdb_data = await self._enrich_with_cmdb(alert, logs, cmdb_data)
 
-        # Step 3: Enrich with CMDB data
-        cmdb_data = await self._enrich_with_cmdb(alert, logs)
+            # Step 4: Analyze and determine priority
+            analysis = await self._analyze_incident(alert, logs, cmdb_data)
 
-        # Step 4: Analyze and determine priority
-        analysis = await self._analyze_incident(alert, logs, cmdb_data)
+            # Steps 5-7 via the outbox: persist the ticket record with its pending writes and return
+            if self.config.OUTBOX_ENABLED:
+                return await self._queue_ticket(alert, analysis, start_time)
 
-        # Step 5: Create Jira ticket
-        ticket = await self._create_jira_ticket(alert, analysis)
+            # Step 5: Create Jira ticket, or comment on an open duplicate
+            ticket = await self._create_jira_ticket(alert, analysis)
+            if analysis.get("duplicate_of"):
+                self._save_ticket_record(alert, analysis, ticket, start_time, status="duplicate")
+                return ticket
 
-        # Step 6: Create ServiceNow incident
-        await self._create_servicenow_incident(alert, analysis)
+            # Step 6: Create ServiceNow incident
+            if incident_batch is not None:
+                incident_batch.append({"alert": alert, "analysis": analysis})
+            else:
+                await self._create_servicenow_incident(alert, analysis)
 
-        # Step 7: Save ticket record
-        self._save_ticket_record(alert, analysis, ticket, start_time)
+            # Step 7: Save ticket record
+            self._save_ticket_record(alert, analysis, ticket, start_time)
 
-        return ticket
+            return ticket
+        finally:
+            # Step 8: Write the audit trail back to Splunk in one batch
+            await self._flush_audit_events()
+
+    async def _flush_audit_events(self):
+        """Send buffered audit events to Splunk HEC as a single batch"""
+        if not self._audit_events:
+            return
+        events, self._audit_events = self._audit_events, []
+        try:
+            await asyncio.wait_for(
+                mcp_manager.call_tool(
+                    "splunk",
+                    "send_events",
+                    {"events": events, "sourcetype": "aitta:audit", "host": "aitta-agent"},
+                ),
+                timeout=20,
+            )
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Audit event submission failed: {type(e).__name__} - {e}")
 
     async def _retrieve_logs(self, alert: AlertData) -> List[Dict]:
         """Retrieve relevant logs from Splunk"""
@@ -133,22 +197,25 @@ class AITTAgent:
 
         return logs
 
-    async def _enrich_with_cmdb(self, alert: AlertData, logs: List[Dict]) -> Dict[str, Any]:
+    async def _enrich_with_cmdb(self, alert: AlertData, logs: List[Dict], prefetched: Dict[str, Any] = None) -> Dict[str, Any]:
         """Enrich alert with CMDB data"""
         owner_team = "DevOps"
         service = "DevOps Service"
         cmdb_data = {}
 
         try:
-            cmdb_result = await asyncio.wait_for(
-                mcp_manager.call_tool(
-                    "cmdb",
-                    "get_asset_info",
-                    {"hostname": alert.host},
-                ),
-                timeout=20,
-            )
-            cmdb_data = self._parse_tool_response(cmdb_result)
+            if prefetched is not None:
+                cmdb_data = prefetched
+            else:
+                cmdb_result = await asyncio.wait_for(
+                    mcp_manager.call_tool(
+                        "cmdb",
+                        "get_asset_info",
+                        {"hostname": alert.host, "fields": CMDB_ENRICHMENT_FIELDS},
+                    ),
+                    timeout=20,
+                )
+                cmdb_data = self._parse_tool_response(cmdb_result)
             owner_team = cmdb_data.get("owner_team", owner_team)
             service = cmdb_data.get("service", service)
 
@@ -197,26 +264,135 @@ class AITTAgent:
                 "description": alert.message,
             }
 
-    async def _create_jira_ticket(self, alert: AlertData, analysis: Dict) -> TicketResponse:
-        """Create Jira ticket"""
+    @staticmethod
+    def _alert_fingerprint(alert: AlertData) -> str:
+        """Stable id for an alert pattern: host plus message with numbers and hex ids masked"""
+        message = re.sub(r"0x[0-9a-f]+|\d+", "#", alert.message.lower())
+        return hashlib.sha1(f"{alert.host.lower()}|{message}".encode()).hexdigest()[:12]
+
+    async def _find_duplicate_ticket(self, alert: AlertData, analysis: Dict, fingerprint: str):
+        """Comment on an open ticket for the same alert pattern instead of filing a new one"""
         try:
-            ticket_result = await asyncio.wait_for(
+            result = self._parse_tool_response(await asyncio.wait_for(
                 mcp_manager.call_tool(
                     "jira",
-                    "create_ticket",
+                    "find_duplicates",
                     {
-                        "project": self.config.JIRA_PROJECT_KEY,
+                        "host": alert.host,
+                        "fingerprint": fingerprint,
                         "summary": analysis["summary"],
-                        "description": analysis["description"],
-                        "priority": analysis["priority"],
-                        "assignee": analysis.get("assigned_to", "DevOps"),
-                        "issue_type": analysis.get("issue_type", "Task"),
+                        "limit": 1,
+                        "min_score": self.config.JIRA_DEDUP_MIN_SCORE,
+                    },
+                ),
+                timeout=10,
+            ))
+            duplicates = result.get("duplicates") or []
+            if not duplicates:
+                return None
+            duplicate = duplicates[0]
+            update = self._parse_tool_response(await asyncio.wait_for(
+                mcp_manager.call_tool(
+                    "jira",
+                    "update_ticket",
+                    {
+                        "ticket_id": duplicate["ticket_id"],
+                        "comment": self._recurrence_comment(alert),
                     },
                 ),
                 timeout=20,
-            )
+            ))
+            if update.get("status") != "updated":
+                raise RuntimeError(f"comment on {duplicate['ticket_id']} failed: {update.get('errors') or update.get('error') or update}")
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"Duplicate check failed, creating a new ticket: {type(e).__name__} - {e}")
+            return None
 
-            ticket_data = self._parse_tool_response(ticket_result)
+        analysis["duplicate_of"] = duplicate["ticket_id"]
+        self.log_activity(
+            alert.alert_id,
+            "Duplicate Ticket",
+            f"Commented on open {duplicate['ticket_id']} (matched on {', '.join(duplicate.get('matched_on', []))})",
+            "complete",
+        )
+        return TicketResponse(
+            ticket_id=duplicate["ticket_id"],
+            priority=analysis["priority"],
+            summary=duplicate.get("summary") or analysis["summary"],
+            description=analysis["description"],
+            assigned_to=analysis.get("assigned_to", "DevOps"),
+            url=duplicate.get("url", ""),
+            created_at=datetime.now(),
+            processing_time=(datetime.now() - alert.timestamp.replace(tzinfo=None)).total_seconds(),
+        )
+
+    @staticmethod
+    def _recurrence_comment(alert: AlertData) -> str:
+        return f"Recurring {alert.severity} alert {alert.alert_id} on {alert.host} at {alert.timestamp}: {alert.message}"
+
+    def _jira_ticket_payload(self, alert: AlertData, analysis: Dict, fingerprint: str) -> Dict:
+        return {
+            "project": self.config.JIRA_PROJECT_KEY,
+            "summary": analysis["summary"],
+            "description": analysis["description"],
+            "priority": analysis["priority"],
+            "assignee": analysis.get("assigned_to", "DevOps"),
+            "issue_type": analysis.get("issue_type", "Task"),
+            "host": alert.host,
+            "fingerprint": fingerprint,
+        }
+
+    def _incident_payload(self, alert: AlertData, analysis: Dict) -> Dict:
+        return {
+            "hostname": alert.host,
+            "short_description": analysis["summary"],
+            "description": analysis["description"],
+            "urgency": self._map_priority_to_urgency(analysis["priority"]),
+            "impact": self._map_priority_to_impact(analysis["priority"]),
+        }
+
+    async def _queue_ticket(self, alert: AlertData, analysis: Dict, start_time: datetime) -> TicketResponse:
+        """
+        Save the ticket record and its Jira / ServiceNow writes in one transaction for the outbox
+        dispatcher. The record carries a pending ticket id until the Jira key is written back.
+        """
+        existing = self.db.query(TicketRecord).filter(TicketRecord.alert_id == alert.alert_id).first()
+        if existing is None:
+            payload = self._jira_ticket_payload(alert, analysis, self._alert_fingerprint(alert))
+            # The dispatcher checks for an open duplicate and posts this comment on it instead
+            payload[outbox.DUPLICATE_COMMENT_FIELD] = self._recurrence_comment(alert)
+            outbox.enqueue(self.db, "jira_ticket", alert.alert_id, payload)
+            outbox.enqueue(self.db, "servicenow_incident", alert.alert_id, self._incident_payload(alert, analysis))
+
+        ticket = TicketResponse(
+            ticket_id=existing.ticket_id if existing else f"{outbox.PENDING_TICKET_PREFIX}{alert.alert_id}",
+            priority=analysis["priority"],
+            summary=analysis["summary"],
+            description=analysis["description"],
+            assigned_to=analysis.get("assigned_to", "DevOps"),
+            url=None,
+            created_at=datetime.now(),
+            processing_time=(datetime.now() - alert.timestamp.replace(tzinfo=None)).total_seconds(),
+        )
+        if existing is not None:
+            self.log_activity(alert.alert_id, "Ticket Queued", f"Alert already recorded as {existing.ticket_id}", "complete")
+            return ticket
+
+        self._save_ticket_record(alert, analysis, ticket, start_time, status="queued")
+        outbox.notify()
+        self.log_activity(alert.alert_id, "Ticket Queued", "Jira ticket and ServiceNow incident queued for dispatch", "complete")
+        return ticket
+
+    async def _create_jira_ticket(self, alert: AlertData, analysis: Dict) -> TicketResponse:
+        """Create Jira ticket"""
+        fingerprint = self._alert_fingerprint(alert)
+        if self.config.JIRA_DEDUP_ENABLED:
+            duplicate = await self._find_duplicate_ticket(alert, analysis, fingerprint)
+            if duplicate:
+                return duplicate
+
+        try:
+            ticket_data = await ticket_batcher.create(self._jira_ticket_payload(alert, analysis, fingerprint))
             ticket_id = ticket_data.get("ticket_id", f"{self.config.JIRA_PROJECT_KEY}-XXXX")
             ticket_url = ticket_data.get("url", "")
 
@@ -249,17 +425,7 @@ class AITTAgent:
         """Create ServiceNow incident"""
         try:
             incident_result = await asyncio.wait_for(
-                mcp_manager.call_tool(
-                    "cmdb",
-                    "create_incident",
-                    {
-                        "hostname": alert.host,
-                        "short_description": analysis["summary"],
-                        "description": analysis["description"],
-                        "urgency": self._map_priority_to_urgency(analysis["priority"]),
-                        "impact": self._map_priority_to_impact(analysis["priority"]),
-                    },
-                ),
+                mcp_manager.call_tool("cmdb", "create_incident", self._incident_payload(alert, analysis)),
                 timeout=20,
             )
 
@@ -277,6 +443,38 @@ class AITTAgent:
             logging.getLogger(__name__).error(f"ServiceNow incident creation failed: {type(e).__name__} - {e}")
             self.log_activity(alert.alert_id, "ServiceNow Incident Creation", f"Failed: {str(e)}", "error")
 
+    async def _create_servicenow_incidents_bulk(self, incident_batch: List[Dict]):
+        """Create the queued ServiceNow incidents with one create_incidents_bulk call"""
+        if not incident_batch:
+            return
+        incidents = [self._incident_payload(item["alert"], item["analysis"]) for item in incident_batch]
+        try:
+            bulk_result = await asyncio.wait_for(
+                mcp_manager.call_tool("cmdb", "create_incidents_bulk", {"incidents": incidents}),
+                timeout=60,
+            )
+            bulk_data = self._parse_tool_response(bulk_result)
+            results = bulk_data.get("results")
+            if results is None:
+                raise RuntimeError(bulk_data.get("error", "Unexpected create_incidents_bulk response"))
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Bulk ServiceNow incident creation failed: {type(e).__name__} - {e}")
+            results = [{"error": str(e)}] * len(incident_batch)
+
+        for position, item in enumerate(incident_batch):
+            result = results[position] if position < len(results) else {"error": "Missing from bulk response"}
+            alert_id = item["alert"].alert_id
+            if result.get("error"):
+                self.log_activity(alert_id, "ServiceNow Incident Creation", f"Failed: {result['error']}", "error")
+            else:
+                self.log_activity(
+                    alert_id,
+                    "ServiceNow Incident Created",
+                    f"Incident {result.get('incident_number', 'SN-XXXX')} created in ServiceNow",
+                    "complete",
+                )
+        await self._flush_audit_events()
+
     def _map_priority_to_urgency(self, priority: str) -> str:
         """Map AITTA priority to ServiceNow urgency"""
         priority_map = {
@@ -297,10 +495,12 @@ class AITTAgent:
         }
         return impact_map.get(priority, "3")
 
-    def _save_ticket_record(self, alert: AlertData, analysis: Dict, ticket: TicketResponse, start_time: datetime):
+    def _save_ticket_record(self, alert: AlertData, analysis: Dict, ticket: TicketResponse, start_time: datetime,
+                            status: str = "created"):
         """Save ticket record to database"""
+        duplicate_of = analysis.get("duplicate_of")
         ticket_record = TicketRecord(
-            ticket_id=ticket.ticket_id,
+            ticket_id=f"{DUPLICATE_TICKET_PREFIX}{alert.alert_id}" if duplicate_of else ticket.ticket_id,
             alert_id=alert.alert_id,
             host=alert.host,
             severity=alert.severity,
@@ -309,7 +509,8 @@ class AITTAgent:
             description=analysis["description"],
             assigned_to=ticket.assigned_to,
             processing_time=ticket.processing_time,
-            status="created",
+            status=status,
+            duplicate_of=duplicate_of,
         )
         self.db.add(ticket_record)
         self.db.commit()
@@ -441,130 +642,185 @@ class AITTAgent:
                     'issue_type': 'Task'
                 }
 
-    async def scan_and_create_alerts(self, time_range: str = "24h") -> Dict[str, Any]:
+    async def _sliced_error_scan(self, time_range: str):
         """
-        Scan Splunk for recent errors and automatically create alerts for affected hosts
-        Returns comprehensive results about the scan and processed alerts
+        Scan Splunk as parallel time slices (optionally per index)
+        Returns the total error event count and per-host aggregates merged by the Splunk server
         """
         logger = logging.getLogger(__name__)
-        logger.info(f"Scanning Splunk for errors in the last {time_range}")
+        indexes = [i.strip() for i in self.config.SPLUNK_SCAN_INDEXES.split(",") if i.strip()]
+
+        scan_result = await asyncio.wait_for(
+            mcp_manager.call_tool(
+                "splunk",
+                "scan_errors",
+                {
+                    "search_term": "(error OR exception OR failed OR fatal OR timeout)",
+                    "time_range": time_range,
+                    "slices": self.config.SPLUNK_SCAN_SLICES,
+                    "indexes": indexes,
+                    "max_parallel": self.config.SPLUNK_SCAN_PARALLELISM,
+                    "max_results_per_slice": 1000
+                }
+            ),
+            timeout=self.config.AGENT_TIMEOUT,
+        )
 
+        scan_data = self._parse_tool_response(scan_result)
+        if "error" in scan_data:
+            raise RuntimeError(scan_data["error"])
+        if scan_data.get("slices_failed"):
+            logger.warning(
+                f"{scan_data['slices_failed']} of {scan_data.get('slices_total')} scan slices failed after retries"
+            )
+
+        affected_hosts = {h["host"]: h for h in scan_data.get("hosts", [])}
+        return scan_data.get("total_error_events", 0), affected_hosts
+
+    async def _fetch_assets_bulk(self, hostnames: List[str]) -> Dict[str, Dict]:
+        """Fetch CMDB data for many hosts in one call; hosts missing from the result fall back to per-alert lookups"""
         try:
-            # Step 1: Search Splunk for recent errors across all hosts
-            search_result = await asyncio.wait_for(
+            bulk_result = await asyncio.wait_for(
                 mcp_manager.call_tool(
-                    "splunk",
-                    "search_recent",
-                    {
-                        "search_term": "index=* (error OR exception OR failed OR fatal OR timeout) | head 1000 | table _time, host, source, _raw",
-                        "time_range": "24h",
-                        "max_results": 1000
-                    }
+                    "cmdb", "get_assets_bulk", {"hostnames": hostnames, "fields": CMDB_ENRICHMENT_FIELDS}
                 ),
-
                 timeout=30,
             )
+            return self._parse_tool_response(bulk_result).get("assets", {})
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Bulk CMDB query failed: {type(e).__name__} - {e}")
+            return {}
 
-            # Parse the search results
-            search_data = self._parse_tool_response(search_result)
-            error_events = search_data.get("results", [])
-
-            # Step 2: Group errors by host and identify unique affected hosts
-            affected_hosts = {}
-            for event in error_events:
-                host = event.get("host", "unknown")
-                raw_message = event.get("_raw", "")
-
-                if host not in affected_hosts:
-                    affected_hosts[host] = {
-                        "host": host,
-                        "error_count": 0,
-                        "messages": [],
-                        "severity": "Medium",  # Default
-                        "latest_timestamp": event.get("_time", datetime.now().isoformat())
-                    }
+    async def _process_affected_hosts(self, affected_hosts: Dict[str, Dict], time_range: str,
+                                      scan_source: str = "splunk_auto_scan") -> List[Dict]:
+        """Create and process an alert for each affected host"""
+        logger = logging.getLogger(__name__)
+        cmdb_assets = await self._fetch_assets_bulk(list(affected_hosts)) if len(affected_hosts) > 1 else {}
+        incident_batch = [] if len(affected_hosts) > 1 else None
+
+        async def process_host(host_data: Dict) -> Dict:
+            # Create alert data
+            alert_id = f"auto-scan-{host_data['host']}-{int(datetime.now().timestamp())}"
+
+            alert_data = {
+                "alert_id": alert_id,
+                "severity": host_data["severity"],
+                "message": f"Multiple errors detected on {host_data['host']}: {host_data['error_count']} errors in {time_range}. Latest: {host_data['messages'][-1][:100]}...",
+                "host": host_data["host"],
+                "timestamp": datetime.now(),
+                "metadata": {
+                    "scan_source": scan_source,
+                    "error_count": host_data["error_count"],
+                    "time_range": time_range,
+                    "error_messages": host_data["messages"][:5]  # Include first 5 error messages
+                }
+            }
 
-                affected_hosts[host]["error_count"] += 1
-                affected_hosts[host]["messages"].append(raw_message[:200])  # Limit message length
+            # A SQLAlchemy session is not safe to share between concurrently running alerts
+            db = SessionLocal()
+            try:
+                logger.info(f"Processing auto-generated alert for {host_data['host']}: {alert_id}")
 
-                # Determine severity based on error patterns
-                if any(keyword in raw_message.lower() for keyword in ["critical", "fatal", "panic", "outage"]):
-                    affected_hosts[host]["severity"] = "Critical"
-                elif any(keyword in raw_message.lower() for keyword in ["high", "severe", "major"]):
-                    affected_hosts[host]["severity"] = "High"
+                # Convert to AlertData model and process
+                alert = AlertData(**alert_data)
+                ticket = await self._with_session(db).process_alert(alert, cmdb_assets.get(host_data["host"]), incident_batch)
 
-            # Step 3: Create alerts for each affected host and process them
-            processed_alerts = []
+                # Get activity log for this alert
+                activities = db.query(AgentActivityRecord)\
+                    .filter(AgentActivityRecord.alert_id == alert_id)\
+                    .order_by(AgentActivityRecord.timestamp.desc())\
+                    .limit(5)\
+                    .all()
 
-            for host_data in affected_hosts.values():
-               
-                # Create alert data
-                alert_id = f"auto-scan-{host_data['host']}-{int(datetime.now().timestamp())}"
+                activity_log = [
+                    {
+                        'time': a.timestamp.strftime('%H:%M'),
+                        'action': a.action,
+                        'detail': a.detail,
+                        'status': a.status
+                    }
+                    for a in activities
+                ]
 
-                alert_data = {
+                return {
                     "alert_id": alert_id,
+                    "host": host_data["host"],
                     "severity": host_data["severity"],
-                    "message": f"Multiple errors detected on {host_data['host']}: {host_data['error_count']} errors in {time_range}. Latest: {host_data['messages'][-1][:100]}...",
+                    "error_count": host_data["error_count"],
+                    "ticket": ticket.dict(),
+                    "activity_log": activity_log,
+                    "status": "processed"
+                }
+
+            except Exception as alert_error:
+                logger.error(f"Failed to process alert for {host_data['host']}: {alert_error}")
+                return {
+                    "alert_id": alert_id,
                     "host": host_data["host"],
-                    "timestamp": datetime.now(),
-                    "metadata": {
-                        "scan_source": "splunk_auto_scan",
-                        "error_count": host_data["error_count"],
-                        "time_range": time_range,
-                        "error_messages": host_data["messages"][:5]  # Include first 5 error messages
-                    }
+                    "severity": host_data["severity"],
+                    "error_count": host_data["error_count"],
+                    "status": "failed",
+                    "error": str(alert_error)
                 }
+            finally:
+                db.close()
+
+        # Hosts are processed concurrently so their Jira tickets coalesce into bulk creates
+        slots = asyncio.Semaphore(max(1, self.config.SCAN_ALERT_CONCURRENCY))
+
+        async def bounded(host_data: Dict) -> Dict:
+            async with slots:
+                return await process_host(host_data)
 
-                try:
-                    logger.info(f"Processing auto-generated alert for {host_data['host']}: {alert_id}")
+        processed_alerts = list(await asyncio.gather(*(bounded(h) for h in affected_hosts.values())))
 
-                    # Convert to AlertData model and process
-                    alert = AlertData(**alert_data)
-                    ticket = await self.process_alert(alert)
+        # ServiceNow incidents for the whole scan go out in one batch
+        if incident_batch:
+            await self._create_servicenow_incidents_bulk(incident_batch)
 
-                    # Get activity log for this alert
-                    from models.database import AgentActivityRecord
-                    activities = self.db.query(AgentActivityRecord)\
-                        .filter(AgentActivityRecord.alert_id == alert_id)\
-                        .order_by(AgentActivityRecord.timestamp.desc())\
-                        .limit(5)\
-                        .all()
+        return processed_alerts
 
-                    activity_log = [
+    async def scan_and_create_alerts(self, time_range: str = "24h") -> Dict[str, Any]:
+        """
+        Scan Splunk for recent errors and automatically create alerts for affected hosts
+        Returns comprehensive results about the scan and processed alerts
+        """
+        logger = logging.getLogger(__name__)
+        logger.info(f"Scanning Splunk for errors in the last {time_range}")
+
+        try:
+            # Step 1: Search Splunk for recent errors and group them by affected host
+            if self.config.SPLUNK_SCAN_SLICES > 1:
+                total_error_events, affected_hosts = await self._sliced_error_scan(time_range)
+            else:
+                search_result = await asyncio.wait_for(
+                    mcp_manager.call_tool(
+                        "splunk",
+                        "search_recent",
                         {
-                            'time': a.timestamp.strftime('%H:%M'),
-                            'action': a.action,
-                            'detail': a.detail,
-                            'status': a.status
+                            "search_term": "index=* (error OR exception OR failed OR fatal OR timeout) | head 1000 | table _time, host, source, _raw",
+                            "time_range": time_range,
+                            "max_results": 1000
                         }
-                        for a in activities
-                    ]
-
-                    processed_alerts.append({
-                        "alert_id": alert_id,
-                        "host": host_data["host"],
-                        "severity": host_data["severity"],
-                        "error_count": host_data["error_count"],
-                        "ticket": ticket.dict(),
-                        "activity_log": activity_log,
-                        "status": "processed"
-                    })
-
-                except Exception as alert_error:
-                    logger.error(f"Failed to process alert for {host_data['host']}: {alert_error}")
-                    processed_alerts.append({
-                        "alert_id": alert_id,
-                        "host": host_data["host"],
-                        "severity": host_data["severity"],
-                        "error_count": host_data["error_count"],
-                        "status": "failed",
-                        "error": str(alert_error)
-                    })
+                    ),
+
+                    timeout=30,
+                )
+
+                # Parse the search results
+                search_data = self._parse_tool_response(search_result)
+                total_error_events = len(search_data.get("results", []))
+
+                # Step 2: Unique affected hosts, grouped and classified by the Splunk server
+                affected_hosts = {h["host"]: h for h in search_data.get("hosts", [])}
+
+            # Step 3: Create alerts for each affected host and process them
+            processed_alerts = await self._process_affected_hosts(affected_hosts, time_range)
 
             return {
                 "status": "completed",
                 "scan_time_range": time_range,
-                "total_error_events": len(error_events),
+                "total_error_events": total_error_events,
                 "affected_hosts": len(affected_hosts),
                 "processed_alerts": len([a for a in processed_alerts if a["status"] == "processed"]),
                 "failed_alerts": len([a for a in processed_alerts if a["status"] == "failed"]),
@@ -578,3 +834,115 @@ class AITTAgent:
                 "error": str(e),
                 "scan_time_range": time_range
             }
+
+    async def incremental_scan(self) -> Dict[str, Any]:
+        """
+        Watermark-based scan: search each index only for events indexed since the last run,
+        fold them into per-host state and alert on hosts outside their re-alert cooldown
+        """
+        logger = logging.getLogger(__name__)
+        indexes = [i.strip() for i in self.config.SPLUNK_SCAN_INDEXES.split(",") if i.strip()] or ["*"]
+        lookback = self.config.CONTINUOUS_SCAN_LOOKBACK
+        total_error_events = 0
+        new_errors: Dict[str, Dict] = {}
+        index_results = []
+
+        for index in indexes:
+            watermark = self.db.query(ScanWatermark).filter(ScanWatermark.index_name == index).first()
+            if watermark is None:
+                watermark = ScanWatermark(index_name=index, last_indextime=0, last_offset=0)
+                self.db.add(watermark)
+
+            try:
+                search_result = await asyncio.wait_for(
+                    mcp_manager.call_tool(
+                        "splunk",
+                        "search_since",
+                        {
+                            "search_term": "(error OR exception OR failed OR fatal OR timeout)",
+                            "index": index,
+                            "index_earliest": watermark.last_indextime or 0,
+                            "index_offset": watermark.last_offset or 0,
+                            "max_lookback": lookback,
+                            "max_results": self.config.CONTINUOUS_SCAN_MAX_EVENTS,
+                        },
+                    ),
+                    timeout=self.config.AGENT_TIMEOUT,
+                )
+                search_data = self._parse_tool_response(search_result)
+                if "error" in search_data:
+                    raise RuntimeError(search_data["error"])
+            except Exception as e:
+                logger.error(f"Incremental scan of index {index} failed: {type(e).__name__} - {e}")
+                index_results.append({"index": index, "status": "failed", "error": str(e)})
+                continue
+
+            events = search_data.get("results", [])
+            total_error_events += len(events)
+            for host_data in search_data.get("hosts", []):
+                self._merge_new_errors(new_errors, host_data)
+
+            watermark.last_indextime = search_data.get("watermark", watermark.last_indextime)
+            watermark.last_offset = search_data.get("offset", 0)
+            if events:
+                watermark.last_event_time = events[-1].get("_time")
+            index_results.append({
+                "index": index,
+                "status": "completed",
+                "new_events": len(events),
+                "watermark": watermark.last_indextime,
+                "offset": watermark.last_offset,
+                "truncated": search_data.get("truncated", False),
+            })
+
+        # Carry per-host state across runs; only hosts past their cooldown get a new alert
+        due_hosts = {}
+        cooldown = timedelta(minutes=self.config.CONTINUOUS_SCAN_REALERT_MINUTES)
+        now = datetime.utcnow()
+        for host, host_data in new_errors.items():
+            state = self.db.query(HostScanState).filter(HostScanState.host == host).first()
+            if state is None:
+                state = HostScanState(host=host, total_errors=0, pending_errors=0)
+                self.db.add(state)
+            state.total_errors = (state.total_errors or 0) + host_data["error_count"]
+            state.pending_errors = (state.pending_errors or 0) + host_data["error_count"]
+            state.last_error_time = host_data["latest_timestamp"]
+            if state.last_alerted_at is None or now - state.last_alerted_at >= cooldown:
+                due_hosts[host] = dict(host_data, error_count=state.pending_errors)
+        self.db.commit()
+
+        processed_alerts = await self._process_affected_hosts(due_hosts, "since last scan", "splunk_continuous_scan")
+
+        for alert in processed_alerts:
+            if alert["status"] != "processed":
+                continue
+            state = self.db.query(HostScanState).filter(HostScanState.host == alert["host"]).first()
+            state.pending_errors = 0
+            state.last_alert_id = alert["alert_id"]
+            state.last_alerted_at = datetime.utcnow()
+        self.db.commit()
+
+        return {
+            "status": "completed",
+            "indexes": index_results,
+            "new_error_events": total_error_events,
+            "affected_hosts": len(new_errors),
+            "suppressed_hosts": len(new_errors) - len(due_hosts),
+            "processed_alerts": len([a for a in processed_alerts if a["status"] == "processed"]),
+            "failed_alerts": len([a for a in processed_alerts if a["status"] == "failed"]),
+            "alerts": processed_alerts,
+        }
+
+    def _merge_new_errors(self, merged: Dict[str, Dict], host_data: Dict):
+        """Combine one index's per-host errors with those already seen this run"""
+        host = host_data["host"]
+        if host not in merged:
+            merged[host] = host_data
+            return
+        target = merged[host]
+        target["error_count"] += host_data["error_count"]
+        target["messages"].extend(host_data["messages"])
+        target["latest_timestamp"] = max(target["latest_timestamp"], host_data["latest_timestamp"])
+        if host_data.get("severity_rank", 0) > target.get("severity_rank", 0):
+            target["severity"] = host_data["severity"]
+            target["severity_rank"] = host_data["severity_rank"]
@@ -0,0 +1,279 @@
+"""
+Ticket outbox for AITTA
+Jira and ServiceNow writes are stored in the database alongside the ticket record and sent
+by a background dispatcher, so alert processing never waits on the ticketing systems
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from config.config import Config
+from db.database import SessionLocal
+from models.database import OutboxRecord, TicketRecord
+
+logger = logging.getLogger(__name__)
+
+# Ticket id recorded until the dispatcher writes back the Jira key
+PENDING_TICKET_PREFIX = "PENDING-"
+
+# Jira ticket payload field holding the comment posted instead when an open duplicate exists
+DUPLICATE_COMMENT_FIELD = "duplicate_comment"
+
+# kind -> (MCP server, tool, list argument, idempotency field understood by the tool);
+# kinds without a list argument are sent one call per row
+OUTBOX_KINDS = {
+    "jira_ticket": ("jira", "create_tickets_bulk", "tickets", "idempotency_key"),
+    "jira_comment": ("jira", "update_ticket", None, None),
+    "servicenow_incident": ("cmdb", "create_incidents_bulk", "incidents", "correlation_id"),
+}
+
+# Created by the dispatcher when it starts, so it belongs to the running event loop
+_wakeup: Optional[asyncio.Event] = None
+
+
+def enqueue(db: Session, kind: str, alert_id: str, payload: Dict[str, Any]) -> OutboxRecord:
+    """Add a pending write to the session; it is committed with the caller's transaction"""
+    record = OutboxRecord(
+        idempotency_key=f"aitta-{kind}-{alert_id}",
+        kind=kind,
+        alert_id=alert_id,
+        payload=json.dumps(payload),
+    )
+    db.add(record)
+    return record
+
+
+def notify():
+    """Wake the dispatcher so newly committed writes go out without waiting for the next poll"""
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def outbox_stats(db: Session) -> Dict[str, Any]:
+    """Outbox row counts per kind and status, plus the age of the oldest pending write"""
+    counts = {}
+    for kind, status, count in db.query(OutboxRecord.kind, OutboxRecord.status, func.count(OutboxRecord.id))\
+            .group_by(OutboxRecord.kind, OutboxRecord.status).all():
+        counts.setdefault(kind, {})[status] = count
+    oldest = db.query(func.min(OutboxRecord.created_at)).filter(OutboxRecord.status == "pending").scalar()
+    return {
+        "counts": counts,
+        "oldest_pending_seconds": round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else None,
+    }
+
+
+class OutboxDispatcher:
+    """Drains pending outbox rows through the bulk MCP tools and records the external ids"""
+
+    def __init__(self, config: Config, mcp_manager, timeout: float = 120):
+        self.config = config
+        self.mcp_manager = mcp_manager
+        self.timeout = timeout
+        self._task: Optional[asyncio.Task] = None
+        self.last_result: Optional[Dict[str, int]] = None
+
+    def start(self):
+        """Start the background dispatch loop"""
+        global _wakeup
+        if self._task is None or self._task.done():
+            _wakeup = asyncio.Event()
+            logger.info(f"Starting outbox dispatcher (poll every {self.config.OUTBOX_POLL_INTERVAL}s)")
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Stop the background dispatch loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self) -> Dict[str, int]:
+        """Send every due write, Jira tickets and comments first; returns rows processed per kind"""
+        db = SessionLocal()
+        try:
+            self.last_result = {kind: await self._drain(db, kind) for kind in OUTBOX_KINDS}
+            return self.last_result
+        finally:
+            db.close()
+
+    async def _loop(self):
+        wakeup = _wakeup
+        while True:
+            wakeup.clear()
+            try:
+                result = await self.run_once()
+                if any(result.values()):
+                    logger.info(f"Outbox dispatched: {result}")
+            except Exception as e:
+                logger.error(f"Outbox dispatch failed: {e}")
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=self.config.OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _drain(self, db: Session, kind: str) -> int:
+        processed = 0
+        while True:
+            rows = db.query(OutboxRecord)\
+                .filter(OutboxRecord.kind == kind)\
+                .filter(OutboxRecord.status == "pending")\
+                .filter(OutboxRecord.next_attempt_at <= datetime.utcnow())\
+                .order_by(OutboxRecord.id)\
+                .limit(self.config.OUTBOX_BATCH_SIZE)\
+                .all()
+            if not rows:
+                return processed
+            await self._dispatch(db, kind, rows)
+            processed += len(rows)
+            # Failed rows are rescheduled into the future, so they are not picked up again here
+            if len(rows) < self.config.OUTBOX_BATCH_SIZE:
+                return processed
+
+    async def _dispatch(self, db: Session, kind: str, rows: List[OutboxRecord]):
+        server, tool, argument, key_field = OUTBOX_KINDS[kind]
+        if kind == "jira_ticket" and self.config.JIRA_DEDUP_ENABLED:
+            rows = await self._divert_duplicates(db, rows)
+            if not rows:
+                db.commit()
+                return
+        try:
+            if argument is None:
+                results = await asyncio.wait_for(
+                    asyncio.gather(*(self._call_one(server, tool, json.loads(row.payload)) for row in rows)),
+                    timeout=self.timeout,
+                )
+            else:
+                items = []
+                for row in rows:
+                    item = {**json.loads(row.payload), key_field: row.idempotency_key}
+                    item.pop(DUPLICATE_COMMENT_FIELD, None)
+                    items.append(item)
+                response = await asyncio.wait_for(
+                    self.mcp_manager.call_tool(server, tool, {argument: items}), timeout=self.timeout
+                )
+                data = json.loads(response) if isinstance(response, str) else (response or {})
+                results = data.get("results")
+                if results is None:
+                    raise RuntimeError(data.get("error", f"Unexpected {tool} response"))
+        except Exception as e:
+            logger.warning(f"{tool} failed for {len(rows)} outbox rows: {type(e).__name__} - {e}")
+            for row in rows:
+                self._reschedule(db, row, f"{type(e).__name__}: {e}")
+            db.commit()
+            return
+
+        for position, row in enumerate(rows):
+            result = results[position] if position < len(results) else {"error": "Missing from bulk response"}
+            if result.get("status") == "failed" or "error" in result:
+                self._reschedule(db, row, result.get("error", "Write failed"))
+            else:
+                row.status = "done"
+                row.external_id = result.get("ticket_id") or result.get("incident_number")
+                row.last_error = None
+                self._write_back(db, row)
+        db.commit()
+
+    async def _call_one(self, server: str, tool: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            response = await self.mcp_manager.call_tool(server, tool, arguments)
+            return json.loads(response) if isinstance(response, str) else (response or {})
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+
+    async def _divert_duplicates(self, db: Session, rows: List[OutboxRecord]) -> List[OutboxRecord]:
+        """
+        Look each new Jira ticket up in the Jira server's issue index. A match is queued as a
+        comment on the open issue and the alert's ServiceNow incident is skipped, as in the
+        direct path; a failed lookup falls through to creating the ticket. Returns the rows
+        still to be created.
+        """
+        payloads = [json.loads(row.payload) for row in rows]
+        matches = await asyncio.gather(*(self._find_duplicate(payload) for payload in payloads))
+        remaining = []
+        for row, payload, duplicate in zip(rows, payloads, matches):
+            if duplicate is None:
+                remaining.append(row)
+                continue
+            enqueue(db, "jira_comment", row.alert_id, {
+                "ticket_id": duplicate["ticket_id"],
+                "comment": payload.get(DUPLICATE_COMMENT_FIELD) or f"Recurring alert {row.alert_id}",
+            })
+            row.status = "done"
+            row.external_id = duplicate["ticket_id"]
+            db.query(OutboxRecord)\
+                .filter(OutboxRecord.kind == "servicenow_incident")\
+                .filter(OutboxRecord.alert_id == row.alert_id)\
+                .filter(OutboxRecord.status == "pending")\
+                .update({"status": "skipped", "last_error": f"Duplicate of {duplicate['ticket_id']}"},
+                        synchronize_session=False)
+            ticket = self._ticket_for(db, row)
+            if ticket is not None:
+                ticket.status = "duplicate"
+                ticket.duplicate_of = duplicate["ticket_id"]
+            logger.info(f"Alert {row.alert_id} matches open {duplicate['ticket_id']}; commenting instead of creating")
+        return remaining
+
+    async def _find_duplicate(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            response = await asyncio.wait_for(
+                self.mcp_manager.call_tool(
+                    "jira",
+                    "find_duplicates",
+                    {
+                        "host": payload.get("host"),
+                        "fingerprint": payload.get("fingerprint"),
+                        "summary": payload.get("summary"),
+                        "limit": 1,
+                        "min_score": self.config.JIRA_DEDUP_MIN_SCORE,
+                    },
+                ),
+                timeout=10,
+            )
+            data = json.loads(response) if isinstance(response, str) else (response or {})
+        except Exception as e:
+            logger.warning(f"Duplicate check failed, creating a new ticket: {type(e).__name__} - {e}")
+            return None
+        duplicates = data.get("duplicates") or []
+        return duplicates[0] if duplicates else None
+
+    def _reschedule(self, db: Session, row: OutboxRecord, error: str):
+        row.attempts = (row.attempts or 0) + 1
+        row.last_error = str(error)[:2000]
+        if row.attempts >= self.config.OUTBOX_MAX_ATTEMPTS:
+            row.status = "failed"
+            logger.error(f"Giving up on {row.idempotency_key} after {row.attempts} attempts: {row.last_error}")
+            if row.kind == "jira_ticket":
+                ticket = self._ticket_for(db, row)
+                if ticket is not None:
+                    ticket.status = "failed"
+            return
+        delay = min(
+            self.config.OUTBOX_RETRY_BACKOFF * (2 ** (row.attempts - 1)), self.config.OUTBOX_RETRY_MAX_WAIT
+        )
+        row.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+
+    def _write_back(self, db: Session, row: OutboxRecord):
+        ticket = self._ticket_for(db, row)
+        if ticket is None:
+            return
+        if row.kind == "jira_ticket":
+            ticket.ticket_id = row.external_id
+            ticket.status = "created"
+        elif row.kind == "servicenow_incident":
+            ticket.incident_number = row.external_id
+
+    @staticmethod
+    def _ticket_for(db: Session, row: OutboxRecord) -> Optional[TicketRecord]:
+        return db.query(TicketRecord)\
+            .filter(TicketRecord.alert_id == row.alert_id)\
+            .order_by(TicketRecord.id.desc())\
+            .first()
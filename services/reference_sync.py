@@ -0,0 +1,75 @@
+"""
+Reference data refresh for AITTA
+Keeps the MCP servers' local lookup stores current from the API process, so lookups made
+while processing alerts only read local data
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ReferenceDataSync:
+    """
+    Calls each enabled sync tool on its own interval. The servers commit page by page and
+    hold a lease in their store while syncing, so a slow first load neither blocks lookups
+    nor runs twice when several API processes share the store.
+    """
+
+    def __init__(self, config: Config, mcp_manager, timeout: float = 600):
+        self.config = config
+        self.mcp_manager = mcp_manager
+        self.timeout = timeout
+        self.jobs: Dict[str, tuple] = {}  # name -> (server, tool, interval seconds)
+        if config.JIRA_INDEX_SYNC_ENABLED:
+            self.jobs["jira_issue_index"] = ("jira", "sync_issue_index", config.JIRA_INDEX_SYNC_INTERVAL)
+        if config.CMDB_SNAPSHOT_ENABLED and not config.USE_MOCK_CMDB:
+            self.jobs["cmdb_snapshot"] = ("cmdb", "sync_snapshot", config.CMDB_SNAPSHOT_SYNC_INTERVAL)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.last_results: Dict[str, Dict[str, Any]] = {}
+
+    def start(self):
+        """Start one background loop per job"""
+        for name, (server, tool, interval) in self.jobs.items():
+            task = self._tasks.get(name)
+            if task is None or task.done():
+                logger.info(f"Starting {name} sync every {interval}s")
+                self._tasks[name] = asyncio.create_task(self._loop(name))
+
+    async def stop(self):
+        """Stop the background loops"""
+        for task in self._tasks.values():
+            task.cancel()
+        for task in self._tasks.values():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks.clear()
+
+    async def run_once(self, name: str) -> Dict[str, Any]:
+        """Run a single sync for one job"""
+        server, tool, _ = self.jobs[name]
+        response = await asyncio.wait_for(self.mcp_manager.call_tool(server, tool, {}), timeout=self.timeout)
+        data = json.loads(response) if isinstance(response, str) else (response or {})
+        if "error" in data and not data.get("mock"):
+            raise RuntimeError(data["error"])
+        self.last_results[name] = data
+        return data
+
+    async def _loop(self, name: str):
+        interval = self.jobs[name][2]
+        while True:
+            try:
+                result = await self.run_once(name)
+                if result.get("mock"):
+                    logger.info(f"{name} sync needs a live connection; stopping its loop")
+                    return
+            except Exception as e:
+                logger.error(f"{name} sync failed: {e}")
+            await asyncio.sleep(interval)
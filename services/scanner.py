@@ -0,0 +1,61 @@
+"""
+Continuous scan scheduler for AITTA
+Runs the agent's watermark-based incremental scan in the background
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from config.config import Config
+from db.database import SessionLocal
+from services.agent import AITTAgent
+
+logger = logging.getLogger(__name__)
+
+
+class ContinuousScanScheduler:
+    """Periodically runs AITTAgent.incremental_scan with a fresh database session"""
+
+    def __init__(self, config: Config):
+        self.config = config
+        self._task: Optional[asyncio.Task] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    def start(self):
+        """Start the background scan loop"""
+        if self._task is None or self._task.done():
+            logger.info(f"Starting continuous scan every {self.config.CONTINUOUS_SCAN_INTERVAL}s")
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Stop the background scan loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Run a single incremental scan"""
+        db = SessionLocal()
+        try:
+            agent = AITTAgent(db, self.config)
+            self.last_result = await agent.incremental_scan()
+            return self.last_result
+        finally:
+            db.close()
+
+    async def _loop(self):
+        while True:
+            try:
+                result = await self.run_once()
+                logger.info(
+                    f"Continuous scan: {result['new_error_events']} new error events, "
+                    f"{result['processed_alerts']} alerts processed"
+                )
+            except Exception as e:
+                logger.error(f"Continuous scan run failed: {e}")
+            await asyncio.sleep(self.config.CONTINUOUS_SCAN_INTERVAL)
@@ -0,0 +1,84 @@
+"""
+Jira ticket batching for AITTA
+Coalesces concurrent ticket creations into create_tickets_bulk calls
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class JiraTicketBatcher:
+    """
+    Collects create_ticket requests for a short window and submits them together.
+    A window holding a single request still goes through create_ticket, so lone
+    alerts see no behaviour change; a full batch is submitted without waiting.
+    """
+
+    def __init__(self, mcp_manager, window_ms: int = 50, max_batch: int = 50, timeout: float = 60):
+        self.mcp_manager = mcp_manager
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._window_open = False
+
+    async def create(self, ticket: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue one ticket and wait for its create_ticket-shaped result"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((ticket, future))
+        if len(self._pending) >= self.max_batch:
+            batch, self._pending = self._pending, []
+            asyncio.create_task(self._submit(batch))
+        elif not self._window_open:
+            self._window_open = True
+            asyncio.create_task(self._close_window())
+        return await future
+
+    async def _close_window(self):
+        await asyncio.sleep(self.window)
+        self._window_open = False
+        batch, self._pending = self._pending, []
+        if batch:
+            await self._submit(batch)
+
+    async def _submit(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        try:
+            if len(batch) == 1:
+                response = await asyncio.wait_for(
+                    self.mcp_manager.call_tool("jira", "create_ticket", batch[0][0]), timeout=self.timeout
+                )
+                results = [self._parse(response)]
+            else:
+                response = await asyncio.wait_for(
+                    self.mcp_manager.call_tool("jira", "create_tickets_bulk", {"tickets": [t for t, _ in batch]}),
+                    timeout=self.timeout,
+                )
+                results = self._parse(response).get("results", [])
+                logger.info(f"Created {len(batch)} Jira tickets in one bulk call")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for position, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            item = results[position] if position < len(results) else {"error": "Ticket missing from bulk response"}
+            if item.get("status") == "failed" or "error" in item:
+                future.set_exception(RuntimeError(item.get("error", "Ticket creation failed")))
+            else:
+                future.set_result(item)
+
+    @staticmethod
+    def _parse(response) -> Dict[str, Any]:
+        if isinstance(response, dict):
+            return response
+        try:
+            return json.loads(response)
+        except (TypeError, ValueError):
+            raise RuntimeError(f"Invalid response from Jira tool: {response!r:.200}")
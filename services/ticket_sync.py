@@ -0,0 +1,134 @@
+"""
+Jira ticket status sync for AITTA
+Mirrors status, assignee and resolution of AITTA tickets from Jira with one search per run
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from config.config import Config
+from db.database import SessionLocal
+from models.database import TicketRecord, TicketSyncState
+
+logger = logging.getLogger(__name__)
+
+SYNC_FIELDS = ["status", "assignee", "resolution", "resolutiondate", "updated"]
+JIRA_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+
+
+def _utc(value: Optional[str]) -> Optional[datetime]:
+    """Jira timestamp -> naive UTC, matching the other DateTime columns"""
+    if not value:
+        return None
+    return datetime.strptime(value, JIRA_TIME_FORMAT).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class TicketStatusSync:
+    """
+    Periodically pulls Jira issues updated since the stored watermark and bulk-updates the
+    matching TicketRecord rows. The first run starts a day before the oldest local ticket.
+    """
+
+    def __init__(self, config: Config, mcp_manager, timeout: float = 120):
+        self.config = config
+        self.mcp_manager = mcp_manager
+        self.timeout = timeout
+        self._task: Optional[asyncio.Task] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    def start(self):
+        """Start the background sync loop"""
+        if self._task is None or self._task.done():
+            logger.info(f"Starting Jira ticket status sync every {self.config.TICKET_SYNC_INTERVAL}s")
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Stop the background sync loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Run a single sync"""
+        db = SessionLocal()
+        try:
+            state = db.query(TicketSyncState).filter(TicketSyncState.source == "jira").first()
+            if state is None:
+                state = TicketSyncState(source="jira")
+                db.add(state)
+
+            since = state.last_updated
+            if not since:
+                oldest = db.query(TicketRecord.created_at).order_by(TicketRecord.created_at).first()
+                if oldest is None or oldest[0] is None:
+                    self.last_result = {"fetched": 0, "updated": 0, "watermark": None}
+                    return self.last_result
+                since = (oldest[0] - timedelta(days=1)).isoformat()
+
+            response = await asyncio.wait_for(
+                self.mcp_manager.call_tool(
+                    "jira",
+                    "search_tickets",
+                    {
+                        "jql": f'project = "{self.config.JIRA_PROJECT_KEY}" ORDER BY updated ASC',
+                        "updated_since": since,
+                        "max_results": self.config.TICKET_SYNC_MAX_RESULTS,
+                        "fields": SYNC_FIELDS,
+                    },
+                ),
+                timeout=self.timeout,
+            )
+            data = json.loads(response) if isinstance(response, str) else (response or {})
+            if "error" in data:
+                raise RuntimeError(data["error"])
+            if data.get("mock"):
+                self.last_result = {"fetched": 0, "updated": 0, "watermark": state.last_updated, "mock": True}
+                return self.last_result
+
+            issues = {issue["key"]: issue for issue in data.get("issues", [])}
+            now = datetime.utcnow()
+            updated = 0
+            keys = list(issues)
+            for start in range(0, len(keys), 500):
+                for record in db.query(TicketRecord).filter(TicketRecord.ticket_id.in_(keys[start:start + 500])):
+                    issue = issues[record.ticket_id]
+                    record.jira_status = issue.get("status")
+                    if issue.get("assignee"):
+                        record.assigned_to = issue["assignee"]
+                    record.resolution = issue.get("resolution")
+                    record.resolved_at = _utc(issue.get("resolutiondate"))
+                    record.status_synced_at = now
+                    updated += 1
+
+            latest = max((issue.get("updated") or "" for issue in issues.values()), default="")
+            if latest and (not state.last_updated or _utc(latest) > _utc(state.last_updated)):
+                state.last_updated = latest
+            state.last_run_at = now
+            db.commit()
+
+            self.last_result = {
+                "fetched": len(issues),
+                "total": data.get("total", len(issues)),
+                "updated": updated,
+                "watermark": state.last_updated,
+            }
+            return self.last_result
+        finally:
+            db.close()
+
+    async def _loop(self):
+        while True:
+            try:
+                result = await self.run_once()
+                if result.get("updated"):
+                    logger.info(f"Ticket status sync: {result['updated']} tickets updated from {result['fetched']} issues")
+            except Exception as e:
+                logger.error(f"Ticket status sync failed: {e}")
+            await asyncio.sleep(self.config.TICKET_SYNC_INTERVAL)
@@ -0,0 +1,118 @@
+"""
+Shared pytest fixtures. The MCP servers read their configuration at import, so the environment
+points them at free local ports before any test module imports them; the `fakes` fixture then
+starts the stand-ins from fake_servers.py on those ports inside the test's event loop.
+"""
+
+import os
+import socket
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+
+from fake_servers import FaultProfile, start_fake_servers
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "aitta_mcp" / "mcp_servers"))
+sys.path.insert(0, str(ROOT))
+
+
+def _free_ports(count: int) -> list:
+    sockets = [socket.socket() for _ in range(count)]
+    try:
+        for s in sockets:
+            s.bind(("127.0.0.1", 0))
+        return [s.getsockname()[1] for s in sockets]
+    finally:
+        for s in sockets:
+            s.close()
+
+
+PORTS = dict(zip(("jira", "servicenow", "splunk", "hec"), _free_ports(4)))
+STATE_DIR = tempfile.mkdtemp(prefix="aitta-test-")
+
+os.environ.update({
+    "JIRA_URL": f"http://127.0.0.1:{PORTS['jira']}",
+    "JIRA_TOKEN": "fake",
+    "JIRA_PROJECT_KEY": "KAG",
+    "USE_MOCK_JIRA": "false",
+    "JIRA_RETRY_BACKOFF": "0.01",
+    "JIRA_METADATA_CACHE_FILE": "",
+    "JIRA_INDEX_PATH": os.path.join(STATE_DIR, "jira_issue_index.db"),
+    "CMDB_API_URL": f"http://127.0.0.1:{PORTS['servicenow']}",
+    "CMDB_USERNAME": "fake",
+    "CMDB_PASSWORD": "fake",
+    "USE_MOCK_CMDB": "false",
+    "CMDB_SNAPSHOT_ENABLED": "false",
+    "CMDB_SNAPSHOT_PATH": os.path.join(STATE_DIR, "cmdb_snapshot.db"),
+    "SPLUNK_HOST": f"http://127.0.0.1:{PORTS['splunk']}",
+    "SPLUNK_HEC_URL": f"http://127.0.0.1:{PORTS['hec']}",
+    "SPLUNK_TOKEN": "fake-hec-token",
+    "SPLUNK_USERNAME": "fake",
+    "SPLUNK_PASSWORD": "fake",
+    "USE_MOCK_SPLUNK": "false",
+    "DATABASE_URL": "sqlite://",
+    "GEMINI_API_KEY": "",
+    "ANTHROPIC_API_KEY": "",
+})
+
+
+class InProcessMCP:
+    """
+    Stands in for MCPClientManager: call_tool runs the named server's tool method in this
+    process and returns its text, as the stdio client would. Calls are kept in `calls`.
+    """
+
+    METHODS = {"sync_issue_index": "handle_sync_issue_index"}
+
+    def __init__(self, **servers):
+        self.servers = servers
+        self.calls = []
+
+    async def call_tool(self, server_name: str, tool_name: str, arguments: dict):
+        self.calls.append((server_name, tool_name, arguments))
+        method = getattr(self.servers[server_name], self.METHODS.get(tool_name, tool_name))
+        response = await method(arguments)
+        return "\n".join(block.text for block in response) if response else None
+
+    def tools_called(self, server_name: str) -> list:
+        return [tool for server, tool, _ in self.calls if server == server_name]
+
+
+@pytest.fixture
+def db():
+    """A session on fresh tables in the in-memory database the app modules share"""
+    from db.database import SessionLocal, engine
+    from models.database import Base
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest_asyncio.fixture
+async def fakes():
+    """
+    Factory for the fake backends: `apps = await fakes(cis=50)` starts them with those
+    start_fake_servers options and returns their aiohttp apps by name ("jira", "servicenow",
+    "splunk", "hec"); app["fake"] is the fake and app["stats"] its request counts.
+    """
+    runners = []
+
+    async def start(profile: FaultProfile = None, **options) -> dict:
+        started = await start_fake_servers(
+            profile or FaultProfile(seed=7), jira_port=PORTS["jira"], servicenow_port=PORTS["servicenow"],
+            splunk_port=PORTS["splunk"], hec_port=PORTS["hec"], **options,
+        )
+        runners.extend(started)
+        by_port = {runner.addresses[0][1]: runner.app for runner in started}
+        return {name: by_port[port] for name, port in PORTS.items()}
+
+    yield start
+    for runner in runners:
+        await runner.cleanup()
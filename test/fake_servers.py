@@ -0,0 +1,699 @@
+"""
+Local stand-ins for Splunk (REST search jobs + HEC), Jira REST v2 and the ServiceNow Table API
+Serves the endpoints the MCP servers call, with injectable latency, errors, rate limits and
+payload sizes, so pooling, retries and timeouts can be exercised and benchmarked offline.
+
+Run all three:
+    python test/fake_servers.py --latency lognormal:40,0.6 --error-rate 0.02 --rate-limit 50
+
+then point the MCP servers at them (printed on startup), e.g.
+    JIRA_URL=http://127.0.0.1:8090 JIRA_TOKEN=fake USE_MOCK_JIRA=false
+
+Every app also answers GET /_fake/stats with request, throttle and injected-error counts.
+"""
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import math
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+
+# ==================== Fault injection ====================
+
+@dataclass
+class FaultProfile:
+    """
+    Latency distribution, error rate, rate limit and payload padding applied to every request.
+    The token bucket lives on the instance; start_fake_servers gives each app its own copy.
+    latency: "none", "fixed:MS", "uniform:LO,HI", "lognormal:MEDIAN_MS,SIGMA" or "exp:MEAN_MS"
+    """
+    latency: str = "none"
+    error_rate: float = 0.0  # Fraction of requests answered with 503
+    rate_limit: float = 0.0  # Requests per second before 429s (0 = unlimited)
+    burst: int = 10
+    payload_bytes: int = 0  # Padding added to descriptions / raw events
+    seed: Optional[int] = None
+    rng: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.rng = random.Random(self.seed)
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        kind, _, params = self.latency.partition(":")
+        self._kind = kind
+        self._params = [float(p) for p in params.split(",")] if params else []
+
+    def delay(self) -> float:
+        """Seconds to wait before answering"""
+        p = self._params
+        if self._kind == "fixed":
+            ms = p[0]
+        elif self._kind == "uniform":
+            ms = self.rng.uniform(p[0], p[1])
+        elif self._kind == "lognormal":
+            ms = self.rng.lognormvariate(math.log(p[0]), p[1] if len(p) > 1 else 0.5)
+        elif self._kind == "exp":
+            ms = self.rng.expovariate(1 / p[0])
+        else:
+            ms = 0.0
+        return ms / 1000
+
+    def throttled(self) -> bool:
+        """Token bucket: True when this request is over the rate limit"""
+        if self.rate_limit <= 0:
+            return False
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate_limit)
+        self._refilled = now
+        if self._tokens < 1:
+            return True
+        self._tokens -= 1
+        return False
+
+    def failed(self) -> bool:
+        return self.error_rate > 0 and self.rng.random() < self.error_rate
+
+    def padding(self) -> str:
+        return "x" * self.payload_bytes
+
+
+def _fault_middleware(profile: FaultProfile, stats: Dict):
+    @web.middleware
+    async def middleware(request: web.Request, handler):
+        if request.path.startswith("/_fake/"):
+            return await handler(request)
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        name = f"{request.method} {route}"
+        stats["requests"][name] = stats["requests"].get(name, 0) + 1
+        if profile.throttled():
+            stats["throttled"] += 1
+            return web.json_response({"error": "rate limited"}, status=429, headers={"Retry-After": "1"})
+        delay = profile.delay()
+        stats["injected_latency_seconds"] += delay
+        if delay:
+            await asyncio.sleep(delay)
+        if profile.failed():
+            stats["errors"] += 1
+            return web.json_response({"error": "injected failure"}, status=503)
+        return await handler(request)
+    return middleware
+
+
+def _make_app(profile: FaultProfile) -> web.Application:
+    stats = {"requests": {}, "throttled": 0, "errors": 0, "injected_latency_seconds": 0.0}
+    app = web.Application(middlewares=[_fault_middleware(profile, stats)], client_max_size=64 * 1024 * 1024)
+    app["profile"] = profile
+    app["stats"] = stats
+
+    async def fake_stats(request):
+        return web.json_response({**stats, "injected_latency_seconds": round(stats["injected_latency_seconds"], 3)})
+
+    app.router.add_get("/_fake/stats", fake_stats)
+    return app
+
+
+def _jira_time(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.000%z")
+
+
+# ==================== Jira REST v2 ====================
+
+JIRA_TRANSITIONS = {
+    "Open": [("11", "Start Progress", "In Progress"), ("31", "Resolve", "Done")],
+    "In Progress": [("21", "Stop Progress", "Open"), ("31", "Resolve", "Done")],
+    "Done": [("41", "Reopen", "Open")],
+}
+JIRA_SEARCH_CAP = 100  # Like Jira Cloud, maxResults above this is silently lowered
+
+
+class FakeJira:
+    def __init__(self, profile: FaultProfile, projects: List[str], issues: int):
+        self.profile = profile
+        self.projects = projects
+        self.issue_types = ["Bug", "Task", "Story", "Epic"]
+        self.priorities = ["Highest", "High", "Medium", "Low", "Lowest"]
+        self.issues: Dict[str, Dict] = {}
+        self.counters = {p: 0 for p in projects}
+        for n in range(issues):
+            self._create({
+                "project": {"key": projects[n % len(projects)]},
+                "summary": f"Seeded incident {n} on host-{n % 50:02d}",
+                "description": f"Seeded issue {n} {profile.padding()}",
+                "issuetype": {"name": "Task"},
+                "priority": {"name": self.priorities[n % 5]},
+                "labels": [f"aitta-host-host-{n % 50:02d}"],
+            })
+
+    def _create(self, fields: Dict) -> Dict:
+        project = fields["project"]["key"]
+        self.counters[project] += 1
+        key = f"{project}-{self.counters[project]}"
+        now = datetime.now(timezone.utc)
+        self.issues[key] = {
+            "id": str(len(self.issues) + 10000),
+            "key": key,
+            "fields": {
+                **fields,
+                "status": {"name": "Open", "statusCategory": {"key": "new"}},
+                "assignee": None,
+                "resolution": None,
+                "resolutiondate": None,
+                "created": _jira_time(now),
+                "updated": _jira_time(now),
+                "comment": {"comments": []},
+            },
+        }
+        return self.issues[key]
+
+    def _validate(self, fields: Dict) -> Optional[Dict]:
+        errors = {}
+        if (fields.get("project") or {}).get("key") not in self.projects:
+            errors["project"] = "valid project is required"
+        if (fields.get("issuetype") or {}).get("name") not in self.issue_types:
+            errors["issuetype"] = "valid issue type is required"
+        if fields.get("priority") and fields["priority"].get("name") not in self.priorities:
+            errors["priority"] = "Priority name is not valid"
+        if not fields.get("summary"):
+            errors["summary"] = "You must specify a summary of the issue."
+        return errors or None
+
+    def _touch(self, issue: Dict):
+        issue["fields"]["updated"] = _jira_time(datetime.now(timezone.utc))
+
+    def _issue_view(self, issue: Dict, fields: Optional[str]) -> Dict:
+        if not fields or fields in ("*all", "*navigable"):
+            return issue
+        wanted = fields.split(",")
+        return {"id": issue["id"], "key": issue["key"], "fields": {f: issue["fields"].get(f) for f in wanted}}
+
+    def _matches(self, issue: Dict, jql: str) -> bool:
+        """Small JQL subset: project, key, labels, status / statusCategory and updated comparisons joined by AND"""
+        f = issue["fields"]
+        for clause in re.split(r"\s+AND\s+", re.sub(r"\s+ORDER BY.*$", "", jql, flags=re.I), flags=re.I):
+            m = re.match(r'\s*\(?\s*(\w+)\s*(=|!=|>=|<=|in|not in)\s*(.+?)\s*$', clause, re.I)
+            if not m:
+                continue
+            name, op, raw = m.group(1).lower(), m.group(2).lower(), m.group(3)
+            values = [v.strip().strip('"\'') for v in raw.rstrip(")").lstrip("(").split(",")]
+            if name == "project":
+                actual = [f["project"]["key"]]
+            elif name in ("key", "issuekey"):
+                actual = [issue["key"]]
+            elif name == "labels":
+                actual = f.get("labels") or []
+            elif name == "status":
+                actual = [f["status"]["name"]]
+            elif name == "statuscategory":
+                actual = ["Done" if f["status"]["statusCategory"]["key"] == "done" else "To Do"]
+            elif name in ("updated", "created"):
+                stamp = datetime.strptime(f[name], "%Y-%m-%dT%H:%M:%S.%f%z")
+                if values[0].isdigit():  # epoch milliseconds
+                    bound = datetime.fromtimestamp(int(values[0]) / 1000, timezone.utc)
+                else:  # date literal in the user's time zone, UTC here
+                    bound = datetime.strptime(values[0], "%Y/%m/%d %H:%M").replace(tzinfo=timezone.utc)
+                if (op == ">=" and stamp < bound) or (op == "<=" and stamp > bound):
+                    return False
+                continue
+            else:
+                continue
+            hit = any(v in actual for v in values)
+            if (op in ("=", "in") and not hit) or (op in ("!=", "not in") and hit):
+                return False
+        return True
+
+    def routes(self, app: web.Application):
+        r = app.router
+        r.add_get("/rest/api/2/myself", self.myself)
+        r.add_get("/rest/api/2/project", self.list_projects)
+        r.add_get("/rest/api/2/project/{key}", self.get_project)
+        r.add_get("/rest/api/2/priority", self.list_priorities)
+        r.add_post("/rest/api/2/issue", self.create_issue)
+        r.add_post("/rest/api/2/issue/bulk", self.create_bulk)
+        r.add_get("/rest/api/2/search", self.search)
+        r.add_get("/rest/api/2/issue/{key}", self.get_issue)
+        r.add_put("/rest/api/2/issue/{key}", self.edit_issue)
+        r.add_post("/rest/api/2/issue/{key}/comment", self.add_comment)
+        r.add_get("/rest/api/2/issue/{key}/transitions", self.get_transitions)
+        r.add_post("/rest/api/2/issue/{key}/transitions", self.do_transition)
+
+    async def myself(self, request):
+        return web.json_response({"name": "aitta", "displayName": "AITTA Agent", "emailAddress": "aitta@example.com"})
+
+    async def list_projects(self, request):
+        return web.json_response([{"id": str(i), "key": p, "name": f"{p} Project"} for i, p in enumerate(self.projects)])
+
+    async def get_project(self, request):
+        key = request.match_info["key"]
+        if key not in self.projects:
+            return web.json_response({"errorMessages": [f"No project could be found with key '{key}'."]}, status=404)
+        return web.json_response({"key": key, "name": f"{key} Project", "issueTypes": [{"name": t} for t in self.issue_types]})
+
+    async def list_priorities(self, request):
+        return web.json_response([{"id": str(i), "name": p} for i, p in enumerate(self.priorities)])
+
+    async def create_issue(self, request):
+        fields = (await request.json()).get("fields", {})
+        errors = self._validate(fields)
+        if errors:
+            return web.json_response({"errorMessages": [], "errors": errors}, status=400)
+        issue = self._create(fields)
+        return web.json_response({"id": issue["id"], "key": issue["key"], "self": f"/rest/api/2/issue/{issue['id']}"}, status=201)
+
+    async def create_bulk(self, request):
+        updates = (await request.json()).get("issueUpdates", [])
+        issues, errors = [], []
+        for n, update in enumerate(updates):
+            problem = self._validate(update.get("fields", {}))
+            if problem:
+                errors.append({"status": 400, "failedElementNumber": n, "elementErrors": {"errorMessages": [], "errors": problem}})
+            else:
+                issue = self._create(update["fields"])
+                issues.append({"id": issue["id"], "key": issue["key"]})
+        return web.json_response({"issues": issues, "errors": errors}, status=201 if issues else 400)
+
+    async def search(self, request):
+        q = request.query
+        start_at = int(q.get("startAt", 0))
+        max_results = min(int(q.get("maxResults", 50)), JIRA_SEARCH_CAP)
+        matches = [i for i in self.issues.values() if self._matches(i, q.get("jql", ""))]
+        if re.search(r"ORDER BY\s+updated", q.get("jql", ""), re.I):
+            matches.sort(key=lambda i: i["fields"]["updated"])
+        page = matches[start_at:start_at + max_results]
+        return web.json_response({
+            "startAt": start_at,
+            "maxResults": max_results,
+            "total": len(matches),
+            "issues": [self._issue_view(i, q.get("fields")) for i in page],
+        })
+
+    async def get_issue(self, request):
+        issue = self.issues.get(request.match_info["key"])
+        if issue is None:
+            return web.json_response({"errorMessages": ["Issue does not exist"]}, status=404)
+        return web.json_response(self._issue_view(issue, request.query.get("fields")))
+
+    async def edit_issue(self, request):
+        issue = self.issues.get(request.match_info["key"])
+        if issue is None:
+            return web.json_response({"errorMessages": ["Issue does not exist"]}, status=404)
+        body = await request.json()
+        issue["fields"].update(body.get("fields", {}))
+        for add in body.get("update", {}).get("comment", []):
+            issue["fields"]["comment"]["comments"].append(add.get("add", {}))
+        self._touch(issue)
+        return web.Response(status=204)
+
+    async def add_comment(self, request):
+        issue = self.issues.get(request.match_info["key"])
+        if issue is None:
+            return web.json_response({"errorMessages": ["Issue does not exist"]}, status=404)
+        comment = {"id": str(uuid.uuid4().int % 10 ** 6), "body": (await request.json()).get("body", "")}
+        issue["fields"]["comment"]["comments"].append(comment)
+        self._touch(issue)
+        return web.json_response(comment, status=201)
+
+    async def get_transitions(self, request):
+        issue = self.issues.get(request.match_info["key"])
+        if issue is None:
+            return web.json_response({"errorMessages": ["Issue does not exist"]}, status=404)
+        options = JIRA_TRANSITIONS[issue["fields"]["status"]["name"]]
+        return web.json_response({"transitions": [{"id": i, "name": n, "to": {"name": to}} for i, n, to in options]})
+
+    async def do_transition(self, request):
+        issue = self.issues.get(request.match_info["key"])
+        if issue is None:
+            return web.json_response({"errorMessages": ["Issue does not exist"]}, status=404)
+        body = await request.json()
+        options = {i: to for i, _, to in JIRA_TRANSITIONS[issue["fields"]["status"]["name"]]}
+        target = options.get(body.get("transition", {}).get("id"))
+        if target is None:
+            return web.json_response({"errorMessages": ["Transition is not valid"]}, status=400)
+        f = issue["fields"]
+        f["status"] = {"name": target, "statusCategory": {"key": "done" if target == "Done" else "indeterminate"}}
+        f["resolution"] = {"name": "Done"} if target == "Done" else None
+        f["resolutiondate"] = _jira_time(datetime.now(timezone.utc)) if target == "Done" else None
+        f.update(body.get("fields", {}))
+        for add in body.get("update", {}).get("comment", []):
+            f["comment"]["comments"].append(add.get("add", {}))
+        self._touch(issue)
+        return web.Response(status=204)
+
+
+# ==================== ServiceNow Table API ====================
+
+class FakeServiceNow:
+    def __init__(self, profile: FaultProfile, cis: int):
+        self.profile = profile
+        self.tables: Dict[str, List[Dict]] = {"cmdb_ci_server": [], "cmdb_rel_ci": [], "incident": []}
+        services = ["Payments", "Checkout", "Search", "Identity", "Reporting"]
+        teams = ["Platform", "Database", "Web", "Network", "SRE"]
+        stamp = (datetime.utcnow() - timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+        for n in range(cis):
+            self.tables["cmdb_ci_server"].append({
+                "sys_id": f"ci{n:08d}",
+                "name": f"srv-{n:05d}",
+                "fqdn": f"srv-{n:05d}.corp.example.com",
+                "ip_address": f"10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}",
+                "u_owner_team": teams[n % len(teams)],
+                "u_environment": "Production" if n % 3 else "Staging",
+                "u_criticality": ["High", "Medium", "Low"][n % 3],
+                "operational_status": "Operational",
+                "business_service": {"display_value": services[n % len(services)], "value": f"svc{n % len(services)}"},
+                "location": {"display_value": "DC-1", "value": "loc1"},
+                "short_description": f"Server {n} {profile.padding()}",
+                "sys_updated_on": stamp,
+            })
+            for dep in (n + 1, n + 7):
+                if dep < cis:
+                    self.tables["cmdb_rel_ci"].append({
+                        "sys_id": f"rel{n:08d}{dep % 10}",
+                        "parent": {"display_value": f"srv-{dep:05d}", "value": f"ci{dep:08d}"},
+                        "child": {"display_value": f"srv-{n:05d}", "value": f"ci{n:08d}"},
+                        "type": "Depends on::Used by",
+                        "sys_updated_on": stamp,
+                    })
+        self.incident_seq = itertools.count(10001)
+
+    @classmethod
+    def _match(cls, row: Dict, query: str) -> bool:
+        """
+        Encoded query subset: field=, fieldIN, fieldLIKE, field>, field>= (also against
+        javascript:gs.daysAgoStart(n)), joined by ^ and OR-ed by ^NQ; ORDERBY is applied by _order
+        """
+        return any(cls._match_all(row, group) for group in query.split("^NQ"))
+
+    @staticmethod
+    def _order(rows: List[Dict], query: str) -> List[Dict]:
+        """Sort by the query's ORDERBY / ORDERBYDESC terms, first term most significant"""
+        for term in reversed([t for t in query.split("^") if t.startswith("ORDERBY")]):
+            desc = term.startswith("ORDERBYDESC")
+            name = term[len("ORDERBYDESC" if desc else "ORDERBY"):]
+            rows = sorted(rows, key=lambda r: FakeServiceNow._value(r, name), reverse=desc)
+        return rows
+
+    @staticmethod
+    def _value(row: Dict, path: str) -> str:
+        actual = row.get(path.split(".")[0])
+        if isinstance(actual, dict):
+            # Dot-walking (business_service.name) matches the display value, a bare reference the sys_id
+            actual = actual.get("display_value") if "." in path else actual.get("value")
+        return "" if actual is None else str(actual)
+
+    @staticmethod
+    def _match_all(row: Dict, query: str) -> bool:
+        for term in query.split("^"):
+            if not term or term.startswith("ORDERBY"):
+                continue
+            m = re.match(r"([\w.]+?)(IN|LIKE|>=|>|=)(.*)$", term)
+            if not m:
+                continue
+            path, op, value = m.groups()
+            actual = FakeServiceNow._value(row, path)
+            days_ago = re.fullmatch(r"javascript:gs\.daysAgoStart\((\d+)\)", value)
+            if days_ago:
+                start = datetime.utcnow() - timedelta(days=int(days_ago.group(1)))
+                value = start.strftime("%Y-%m-%d 00:00:00")
+            if op == "IN" and actual.lower() not in {v.lower() for v in value.split(",")}:
+                return False
+            if op == "LIKE" and value.lower() not in actual.lower():
+                return False
+            if op == "=" and actual.lower() != value.lower():
+                return False
+            if op in (">", ">=") and not (actual > value or (op == ">=" and actual == value)):
+                return False
+        return True
+
+    @staticmethod
+    def _project(row: Dict, fields: Optional[str], display: str) -> Dict:
+        out = {k: row[k] for k in fields.split(",") if k in row} if fields else dict(row)
+        if display == "all":
+            out = {k: v if isinstance(v, dict) else {"display_value": v, "value": v} for k, v in out.items()}
+        else:
+            out = {
+                k: (v.get("display_value") if display == "true" else v.get("value")) if isinstance(v, dict) else v
+                for k, v in out.items()
+            }
+        return out
+
+    def routes(self, app: web.Application):
+        app.router.add_get("/api/now/table/{table}", self.list_rows)
+        app.router.add_post("/api/now/table/incident", self.create_incident)
+        app.router.add_get("/api/now/stats/incident", self.incident_stats)
+        app.router.add_post("/api/now/v1/batch", self.batch)
+
+    async def list_rows(self, request):
+        q = request.query
+        rows = self.tables.get(request.match_info["table"])
+        if rows is None:
+            return web.json_response({"error": {"message": "Invalid table"}}, status=400)
+        query = q.get("sysparm_query", "")
+        if q.get("name"):
+            query = f"name={q['name']}^{query}"
+        matches = self._order([r for r in rows if self._match(r, query)], query.split("^NQ")[-1])
+        offset = int(q.get("sysparm_offset", 0))
+        limit = int(q.get("sysparm_limit", 10000))
+        page = matches[offset:offset + limit]
+        display = q.get("sysparm_display_value", "false")
+        return web.json_response(
+            {"result": [self._project(r, q.get("sysparm_fields"), display) for r in page]},
+            headers={"X-Total-Count": str(len(matches))},
+        )
+
+    def _insert_incident(self, body: Dict) -> Dict:
+        number = f"INC{next(self.incident_seq):07d}"
+        row = {
+            **body,
+            "sys_id": uuid.uuid4().hex,
+            "number": number,
+            "category": body.get("category", "software"),
+            "state": "New",
+            "opened_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self.tables["incident"].append(row)
+        return row
+
+    async def create_incident(self, request):
+        return web.json_response({"result": self._insert_incident(await request.json())}, status=201)
+
+    async def incident_stats(self, request):
+        rows = [r for r in self.tables["incident"] if self._match(r, request.query.get("sysparm_query", ""))]
+        counts: Dict[str, int] = {}
+        for r in rows:
+            counts[r.get("category", "")] = counts.get(r.get("category", ""), 0) + 1
+        return web.json_response({"result": [
+            {"groupby_fields": [{"field": "category", "value": k}], "stats": {"count": str(v)}} for k, v in counts.items()
+        ]})
+
+    async def batch(self, request):
+        body = await request.json()
+        served = []
+        for req in body.get("rest_requests", []):
+            if req.get("method") != "POST" or not req.get("url", "").endswith("/table/incident"):
+                served.append({"id": req["id"], "status_code": 400, "status_text": "Bad Request",
+                               "body": base64.b64encode(b'{"error":{"message":"unsupported"}}').decode()})
+                continue
+            payload = json.loads(base64.b64decode(req.get("body") or b"e30="))
+            result = json.dumps({"result": self._insert_incident(payload)}).encode()
+            served.append({"id": req["id"], "status_code": 201, "status_text": "Created",
+                           "body": base64.b64encode(result).decode()})
+        return web.json_response({"batch_request_id": body.get("batch_request_id"), "serviced_requests": served,
+                                  "unserviced_requests": []})
+
+
+# ==================== Splunk REST + HEC ====================
+
+class FakeSplunk:
+    LEVELS = ["INFO", "INFO", "INFO", "WARN", "ERROR"]
+    MESSAGES = ["OutOfMemoryError in worker pool", "Connection pool exhausted", "Disk usage above 95%",
+                "Gateway timeout calling upstream", "Request completed"]
+
+    def __init__(self, profile: FaultProfile, job_seconds: float, hosts: int, events: int, ack_drop_rate: float = 0.0):
+        self.profile = profile
+        self.ack_drop_rate = ack_drop_rate  # Fraction of HEC batches whose ackId is never acknowledged
+        self.job_seconds = job_seconds
+        self.hosts = hosts
+        self.events = events
+        self.jobs: Dict[str, Dict] = {}
+        self.hec_events = 0
+        self.hec_bytes = 0
+        self.ack_seq = itertools.count(1)
+        self.dropped_acks: set = set()
+
+    def _results(self, count: int) -> List[Dict]:
+        now = time.time()
+        rng = self.profile.rng
+        out = []
+        for n in range(min(count, self.events)):
+            level = rng.choice(self.LEVELS)
+            host = f"srv-{rng.randrange(self.hosts):05d}"
+            ts = now - rng.uniform(0, 3600)
+            out.append({
+                "_time": datetime.fromtimestamp(ts).isoformat(),
+                "_indextime": str(int(ts) + 1),
+                "indextime": str(int(ts) + 1),
+                "host": host,
+                "source": "/var/log/app.log",
+                "sourcetype": "app:log",
+                "log_level": level,
+                "_raw": f"{level} {rng.choice(self.MESSAGES)} on {host} {self.profile.padding()}",
+            })
+        return sorted(out, key=lambda e: e["indextime"])
+
+    def routes(self, app: web.Application):
+        r = app.router
+        r.add_post("/services/search/jobs", self.create_job)
+        r.add_get("/services/search/jobs/{sid}", self.job_status)
+        r.add_get("/services/search/jobs/{sid}/results", self.job_results)
+        r.add_post("/services/search/jobs/{sid}/control", self.job_control)
+        r.add_delete("/services/search/jobs/{sid}", self.delete_job)
+        r.add_post("/services/collector/event", self.hec_event)
+        r.add_post("/services/collector/ack", self.hec_ack)
+
+    async def create_job(self, request):
+        form = await request.post()
+        sid = f"fake_{uuid.uuid4().hex[:12]}"
+        self.jobs[sid] = {"search": form.get("search", ""), "created": time.monotonic(), "cancelled": False}
+        return web.json_response({"sid": sid}, status=201)
+
+    async def job_status(self, request):
+        job = self.jobs.get(request.match_info["sid"])
+        if job is None:
+            return web.json_response({"messages": [{"type": "FATAL", "text": "Unknown sid"}]}, status=404)
+        elapsed = time.monotonic() - job["created"]
+        done = elapsed >= self.job_seconds
+        state = "FAILED" if job["cancelled"] else "DONE" if done else "QUEUED" if elapsed < self.job_seconds / 4 else "RUNNING"
+        return web.json_response({"entry": [{"content": {"dispatchState": state, "isDone": done or job["cancelled"]}}]})
+
+    async def job_results(self, request):
+        if request.match_info["sid"] not in self.jobs:
+            return web.json_response({"messages": [{"type": "FATAL", "text": "Unknown sid"}]}, status=404)
+        return web.json_response({"results": self._results(int(request.query.get("count", 100)))})
+
+    async def job_control(self, request):
+        job = self.jobs.get(request.match_info["sid"])
+        if job is not None:
+            job["cancelled"] = True
+        return web.json_response({"messages": [{"type": "INFO", "text": "Search job cancelled."}]})
+
+    async def delete_job(self, request):
+        self.jobs.pop(request.match_info["sid"], None)
+        return web.json_response({"messages": []})
+
+    async def hec_event(self, request):
+        body = (await request.read()).decode()
+        decoder, pos, events = json.JSONDecoder(), 0, 0
+        while pos < len(body):
+            while pos < len(body) and body[pos].isspace():
+                pos += 1
+            if pos >= len(body):
+                break
+            try:
+                _, pos = decoder.raw_decode(body, pos)
+            except ValueError:
+                return web.json_response({"text": "Invalid data format", "code": 6}, status=400)
+            events += 1
+        self.hec_events += events
+        self.hec_bytes += len(body)
+        ack_id = next(self.ack_seq)
+        if self.ack_drop_rate > 0 and self.profile.rng.random() < self.ack_drop_rate:
+            self.dropped_acks.add(ack_id)
+        return web.json_response({"text": "Success", "code": 0, "ackId": ack_id})
+
+    async def hec_ack(self, request):
+        acks = (await request.json()).get("acks", [])
+        return web.json_response({"acks": {str(a): a not in self.dropped_acks for a in acks}})
+
+
+# ==================== Runner ====================
+
+async def start_fake_servers(profile: FaultProfile, host: str = "127.0.0.1", jira_port: int = 8090,
+                             servicenow_port: int = 8091, splunk_port: int = 8089, hec_port: int = 8088,
+                             projects: List[str] = None, jira_issues: int = 0, cis: int = 1000,
+                             splunk_job_seconds: float = 0.5, splunk_hosts: int = 100,
+                             splunk_events: int = 1000, hec_ack_drop_rate: float = 0.0) -> List[web.AppRunner]:
+    """Start the enabled fakes (port 0 disables one) and return their runners for cleanup()"""
+    runners = []
+    fakes = {
+        jira_port: FakeJira(profile, projects or ["KAG"], jira_issues),
+        servicenow_port: FakeServiceNow(profile, cis),
+    }
+    splunk = FakeSplunk(profile, splunk_job_seconds, splunk_hosts, splunk_events, hec_ack_drop_rate)
+    if splunk_port == hec_port:
+        fakes[splunk_port] = splunk
+    else:
+        fakes[splunk_port] = splunk
+        fakes[hec_port] = splunk
+    for port, fake in fakes.items():
+        if not port:
+            continue
+        # Each app gets its own copy so the rate limit (token bucket) and error draws are per server
+        app = _make_app(replace(profile))
+        app["fake"] = fake
+        fake.routes(app)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        runners.append(runner)
+    return runners
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake Splunk / Jira / ServiceNow servers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--jira-port", type=int, default=8090)
+    parser.add_argument("--servicenow-port", type=int, default=8091)
+    parser.add_argument("--splunk-port", type=int, default=8089)
+    parser.add_argument("--hec-port", type=int, default=8088)
+    parser.add_argument("--latency", default="none", help="none | fixed:MS | uniform:LO,HI | lognormal:MEDIAN_MS,SIGMA | exp:MEAN_MS")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second per server before 429 (0 = off)")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--payload-bytes", type=int, default=0, help="Padding added to descriptions and raw events")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--projects", default="KAG", help="Comma-separated Jira project keys")
+    parser.add_argument("--jira-issues", type=int, default=0, help="Issues to seed")
+    parser.add_argument("--cis", type=int, default=1000, help="cmdb_ci_server rows to generate")
+    parser.add_argument("--splunk-job-seconds", type=float, default=0.5)
+    parser.add_argument("--splunk-hosts", type=int, default=100)
+    parser.add_argument("--splunk-events", type=int, default=1000, help="Maximum results per search job")
+    parser.add_argument("--hec-ack-drop-rate", type=float, default=0.0, help="Fraction of HEC batches never acknowledged")
+    args = parser.parse_args()
+
+    async def serve():
+        profile = FaultProfile(args.latency, args.error_rate, args.rate_limit, args.burst, args.payload_bytes, args.seed)
+        runners = await start_fake_servers(
+            profile, args.host, args.jira_port, args.servicenow_port, args.splunk_port, args.hec_port,
+            [p.strip() for p in args.projects.split(",") if p.strip()], args.jira_issues, args.cis,
+            args.splunk_job_seconds, args.splunk_hosts, args.splunk_events, args.hec_ack_drop_rate,
+        )
+        base = f"http://{args.host}"
+        print("Fake servers running; export:")
+        print(f"  JIRA_URL={base}:{args.jira_port} JIRA_TOKEN=fake USE_MOCK_JIRA=false")
+        print(f"  CMDB_API_URL={base}:{args.servicenow_port} CMDB_USERNAME=fake CMDB_PASSWORD=fake USE_MOCK_CMDB=false")
+        print(f"  SPLUNK_HOST={base}:{args.splunk_port} SPLUNK_HEC_URL={base}:{args.hec_port} SPLUNK_TOKEN=fake USE_MOCK_SPLUNK=false")
+        print("Stats: GET /_fake/stats on any port")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            for runner in runners:
+                await runner.cleanup()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+AITTAgent flows with the MCP servers running in-process (InProcessMCP) on the fake backends
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("google.generativeai")
+
+import splunk_server
+from config.config import Config
+from conftest import InProcessMCP
+from models.database import HostScanState, ScanWatermark
+from services import agent as agent_module
+from services.agent import AITTAgent
+from splunk_server import SplunkMCPServer
+
+NOW = 1_760_000_000
+
+
+# ---------------- user-027: watermark-based continuous scan ----------------
+
+class ScanConfig(Config):
+    SPLUNK_SCAN_INDEXES = "main"
+    CONTINUOUS_SCAN_MAX_EVENTS = 5
+    CONTINUOUS_SCAN_REALERT_MINUTES = 60
+
+
+@pytest.mark.asyncio
+async def test_incremental_scan_resumes_from_the_stored_watermark(db, monkeypatch):
+    monkeypatch.setattr(splunk_server, "USE_MOCK", True)
+    monkeypatch.setattr(splunk_server.time, "time", lambda: NOW)
+    mcp = InProcessMCP(splunk=SplunkMCPServer())
+    monkeypatch.setattr(agent_module.mcp_manager, "call_tool", mcp.call_tool)
+    agent = AITTAgent(db, ScanConfig)
+    alerted = []
+
+    async def process_affected_hosts(affected_hosts, time_range, source):
+        alerted.append(dict(affected_hosts))
+        return [{"host": host, "alert_id": f"scan-{host}", "status": "processed"} for host in affected_hosts]
+
+    monkeypatch.setattr(agent, "_process_affected_hosts", process_affected_hosts)
+
+    first = await agent.incremental_scan()
+    second = await agent.incremental_scan()
+
+    searches = [args for server, tool, args in mcp.calls if tool == "search_since"]
+    assert [s["index"] for s in searches] == ["main", "main"]
+    assert (searches[0]["index_earliest"], searches[0]["index_offset"]) == (0, 0)
+    assert first["indexes"][0]["truncated"] is True
+    assert (searches[1]["index_earliest"], searches[1]["index_offset"]) == \
+        (first["indexes"][0]["watermark"], first["indexes"][0]["offset"])
+    stored = db.query(ScanWatermark).filter(ScanWatermark.index_name == "main").one()
+    assert (stored.last_indextime, stored.last_offset) == (second["indexes"][0]["watermark"], second["indexes"][0]["offset"])
+
+    # Hosts alerted on by the first run are inside their cooldown on the second and only accumulate errors
+    assert first["new_error_events"] == second["new_error_events"] == 5
+    assert first["suppressed_hosts"] == 0
+    assert second["suppressed_hosts"] == second["affected_hosts"] - len(alerted[1]) > 0
+    assert set(alerted[1]).isdisjoint(alerted[0])
+    states = {state.host: state for state in db.query(HostScanState).all()}
+    for host, host_data in alerted[0].items():
+        state = states[host]
+        assert state.last_alert_id == f"scan-{host}"
+        assert state.pending_errors == state.total_errors - host_data["error_count"]
+    assert sum(states[host].pending_errors for host in alerted[0]) > 0
+    assert all(states[host].pending_errors == 0 for host in alerted[1])
@@ -0,0 +1,521 @@
+"""
+CMDB MCP server against the fake ServiceNow Table API
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+
+import cmdb_server
+from cmdb_server import AssetCache, CMDBMCPServer, CMDBSnapshot
+from fake_servers import FaultProfile
+
+TABLE_GETS = "GET /api/now/table/{table}"
+
+
+def _payload(response) -> dict:
+    return json.loads(response[0].text)
+
+
+def _requests(app, route: str = TABLE_GETS) -> int:
+    return app["stats"]["requests"].get(route, 0)
+
+
+def _ci(app, name: str) -> dict:
+    return next(row for row in app["fake"].tables["cmdb_ci_server"] if row["name"] == name)
+
+
+@pytest_asyncio.fixture
+async def server():
+    server = CMDBMCPServer()
+    yield server
+    await server.close()
+
+
+# ---------------- user-031: asset cache ----------------
+
+@pytest.mark.asyncio
+async def test_repeat_lookups_are_served_from_the_cache(fakes, server):
+    apps = await fakes(cis=20)
+    sn = apps["servicenow"]
+
+    first = _payload(await server.get_asset_info({"hostname": "srv-00003"}))
+    calls = _requests(sn)
+    again = _payload(await server.get_asset_info({"hostname": "SRV-00003"}))
+
+    assert first["owner_team"] == "Network"
+    assert again == first
+    assert _requests(sn) == calls
+    assert server.asset_cache.stats["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_hosts_are_cached_until_the_negative_ttl(fakes, server):
+    apps = await fakes(cis=20)
+    sn = apps["servicenow"]
+    server.asset_cache = AssetCache(ttl=60, negative_ttl=0.1, stale_ttl=0)
+
+    for _ in range(3):
+        assert _payload(await server.get_asset_info({"hostname": "ghost-01"}))["status"] == "Not found"
+    assert _requests(sn) == 1
+    assert server.asset_cache.stats["negative_hits"] == 2
+
+    await asyncio.sleep(0.15)
+    await server.get_asset_info({"hostname": "ghost-01"})
+    assert _requests(sn) == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_served_while_a_background_refresh_runs(fakes, server):
+    apps = await fakes(cis=20)
+    sn = apps["servicenow"]
+    server.asset_cache = AssetCache(ttl=0.05, negative_ttl=60, stale_ttl=60)
+
+    assert _payload(await server.get_asset_info({"hostname": "srv-00004"}))["owner_team"] == "SRE"
+    _ci(sn, "srv-00004")["u_owner_team"] = "Storage"
+    await asyncio.sleep(0.1)
+
+    stale = _payload(await server.get_asset_info({"hostname": "srv-00004"}))
+    assert stale["owner_team"] == "SRE"
+    await asyncio.gather(*server.asset_cache._refreshing.values())
+
+    assert _payload(await server.get_asset_info({"hostname": "srv-00004"}))["owner_team"] == "Storage"
+    stats = server.asset_cache.stats
+    assert (stats["stale_hits"], stats["refreshes"], stats["hits"]) == (1, 1, 1)
+    assert _requests(sn) == 2
+
+
+@pytest.mark.asyncio
+async def test_entries_past_the_stale_window_are_reloaded_before_answering(fakes, server):
+    apps = await fakes(cis=20)
+    sn = apps["servicenow"]
+    server.asset_cache = AssetCache(ttl=0.02, negative_ttl=60, stale_ttl=0.02)
+
+    await server.get_asset_info({"hostname": "srv-00004"})
+    _ci(sn, "srv-00004")["u_owner_team"] = "Storage"
+    await asyncio.sleep(0.06)
+
+    assert _payload(await server.get_asset_info({"hostname": "srv-00004"}))["owner_team"] == "Storage"
+    assert server.asset_cache.stats["stale_hits"] == 0
+    assert _requests(sn) == 2
+
+
+def test_the_least_recently_used_entry_is_evicted_first():
+    cache = AssetCache(ttl=60, negative_ttl=60, stale_ttl=0, max_entries=2)
+    cache.put("a", {"hostname": "a"})
+    cache.put("b", {"hostname": "b"})
+    cache.get("a")
+    cache.put("c", None)
+
+    assert cache.get("b") == (None, "miss")
+    assert cache.get("a")[1] == cache.get("c")[1] == "fresh"
+    assert cache.stats["evictions"] == 1
+
+
+# ---------------- user-032: pooled ServiceNow session ----------------
+
+@pytest.mark.asyncio
+async def test_calls_share_one_session_whose_pool_caps_connections_per_host(fakes, server, monkeypatch):
+    monkeypatch.setattr(cmdb_server, "CMDB_POOL_PER_HOST", 2)
+    await fakes(FaultProfile(latency="fixed:50"), cis=20)
+
+    session = server._session()
+    started = time.monotonic()
+    results = await asyncio.gather(*(server.get_asset_info({"hostname": f"srv-{n:05d}"}) for n in range(10)))
+    elapsed = time.monotonic() - started
+
+    assert all(_payload(r)["hostname"] == f"srv-{n:05d}" for n, r in enumerate(results))
+    assert server._session() is session and not session.closed
+    assert elapsed >= 5 * 0.05  # Ten 50 ms requests over two connections
+
+    await server.close()
+    assert session.closed
+    assert _payload(await server.get_asset_info({"hostname": "srv-00011"}))["hostname"] == "srv-00011"
+    assert server._session() is not session
+
+
+# ---------------- user-033: bulk asset lookup ----------------
+
+@pytest.mark.asyncio
+async def test_bulk_lookup_chunks_names_into_few_queries_and_reports_misses(fakes, server, monkeypatch):
+    monkeypatch.setattr(cmdb_server, "CMDB_BULK_QUERY_MAX_CHARS", 40)  # Four 9-character names per query
+    apps = await fakes(cis=50)
+    sn = apps["servicenow"]
+    hostnames = [f"srv-{n:05d}" for n in range(0, 30, 2)] + ["ghost-01", "srv-00004"]
+
+    result = _payload(await server.get_assets_bulk({"hostnames": hostnames}))
+
+    assert result["requested"] == 16
+    assert (result["found"], result["missing"]) == (15, ["ghost-01"])
+    assert result["servicenow_queries"] == _requests(sn) == 4
+    assert list(result["assets"]) == list(dict.fromkeys(hostnames))
+    assert result["assets"]["srv-00010"]["owner_team"] == "Platform"
+    assert result["assets"]["ghost-01"]["status"] == "Not found"
+
+    again = _payload(await server.get_assets_bulk({"hostnames": hostnames + ["srv-00001"]}))
+    assert again["servicenow_queries"] == 1
+    assert again["assets"]["srv-00010"] == result["assets"]["srv-00010"]
+    assert again["missing"] == ["ghost-01"]
+    assert _requests(sn) == 5
+
+
+@pytest.mark.asyncio
+async def test_bulk_lookup_queries_names_that_cannot_be_encoded_one_by_one(fakes, server):
+    apps = await fakes(cis=5)
+    sn = apps["servicenow"]
+    _ci(sn, "srv-00002")["name"] = "srv-00002,old"
+
+    result = _payload(await server.get_assets_bulk({"hostnames": ["srv-00001", "srv-00002,old", "srv-00003"]}))
+
+    assert result["found"] == 3
+    assert result["servicenow_queries"] == 2
+    assert result["assets"]["srv-00002,old"]["hostname"] == "srv-00002,old"
+
+
+# ---------------- user-034: local snapshot with delta sync ----------------
+
+@pytest_asyncio.fixture
+async def snapshot_server(tmp_path, monkeypatch):
+    monkeypatch.setattr(cmdb_server, "CMDB_SNAPSHOT_PAGE_SIZE", 7)
+    server = CMDBMCPServer()
+    server.snapshot = CMDBSnapshot(str(tmp_path / "cmdb_snapshot.db"))
+    yield server
+    await server.close()
+
+
+def _touch(row: dict, **changes):
+    row.update(changes, sys_updated_on=datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
+
+
+@pytest.mark.asyncio
+async def test_full_sync_pages_every_row_once_and_serves_lookups_locally(fakes, snapshot_server):
+    apps = await fakes(cis=30)
+    sn = apps["servicenow"]
+
+    result = await snapshot_server.sync_snapshot()
+
+    assert result["mode"] == "full"
+    assert (result["ci_rows"], result["cis"]) == (30, 30)  # Every row shares one sys_updated_on
+    assert result["relationship_rows"] == result["relationships"] == len(sn["fake"].tables["cmdb_rel_ci"])
+    calls = _requests(sn)
+    asset = _payload(await snapshot_server.get_asset_info({"hostname": "srv-00012.corp.example.com"}))
+    missing = _payload(await snapshot_server.get_asset_info({"hostname": "ghost-01"}))
+    bulk = _payload(await snapshot_server.get_assets_bulk({"hostnames": ["srv-00001", "10.0.0.2", "SRV-00003"]}))
+
+    assert (asset["hostname"], asset["owner_team"]) == ("srv-00012", "Web")
+    assert missing["status"] == "Not found"
+    assert (bulk["found"], bulk["servicenow_queries"]) == (3, 0)
+    assert _requests(sn) == calls
+
+
+@pytest.mark.asyncio
+async def test_delta_sync_reads_only_changed_rows(fakes, snapshot_server):
+    apps = await fakes(cis=30)
+    table = apps["servicenow"]["fake"].tables["cmdb_ci_server"]
+    await snapshot_server.sync_snapshot()
+    await snapshot_server.get_asset_info({"hostname": "srv-00003"})
+
+    _touch(table[3], u_owner_team="Storage")
+    table.append(dict(table[29], sys_id="ci00000030", name="srv-00030", fqdn="srv-00030.corp.example.com",
+                      ip_address="10.0.0.30"))
+    _touch(table[-1])
+    result = await snapshot_server.sync_snapshot()
+
+    assert (result["mode"], result["ci_rows"], result["cis"]) == ("delta", 2, 31)
+    assert _payload(await snapshot_server.get_asset_info({"hostname": "srv-00003"}))["owner_team"] == "Storage"
+    assert _payload(await snapshot_server.get_asset_info({"hostname": "srv-00030"}))["hostname"] == "srv-00030"
+    assert (await snapshot_server.sync_snapshot())["ci_rows"] == 0
+
+
+@pytest.mark.asyncio
+async def test_full_reload_drops_cis_deleted_in_servicenow(fakes, snapshot_server):
+    apps = await fakes(cis=30)
+    table = apps["servicenow"]["fake"].tables["cmdb_ci_server"]
+    await snapshot_server.sync_snapshot()
+
+    del table[5]
+    result = await snapshot_server.sync_snapshot(full=True)
+
+    assert (result["mode"], result["cis"]) == ("full", 29)
+    assert _payload(await snapshot_server.get_asset_info({"hostname": "srv-00005"}))["status"] == "Not found"
+    assert _payload(await snapshot_server.get_asset_info({"hostname": "10.0.0.5"}))["status"] == "Not found"
+
+
+@pytest.mark.asyncio
+async def test_sync_is_skipped_while_another_process_holds_the_lease(fakes, snapshot_server):
+    apps = await fakes(cis=10)
+    snapshot_server.snapshot.acquire_lease("another-process", 60)
+
+    result = await snapshot_server.sync_snapshot()
+
+    assert result["mode"] == "skipped"
+    assert _requests(apps["servicenow"]) == 0
+    assert not snapshot_server.snapshot.loaded
+
+
+# ---------------- user-035: transitive dependencies and paths ----------------
+
+@pytest.mark.asyncio
+async def test_transitive_dependencies_take_one_query_per_level_and_match_the_snapshot(fakes, server, tmp_path):
+    apps = await fakes(cis=30)
+    sn = apps["servicenow"]
+    args = {"hostname": "srv-00000", "direction": "upstream", "max_depth": 3}
+
+    live = _payload(await server.get_transitive_dependencies(args))
+
+    assert _requests(sn) == 1 + 3  # The CI, then one cmdb_rel_ci query per level
+    assert [(ci["hostname"], ci["depth"]) for ci in live["cis"]][:5] == [
+        ("srv-00001", 1), ("srv-00007", 1), ("srv-00002", 2), ("srv-00008", 2), ("srv-00014", 2),
+    ]
+    assert {ci["hostname"]: ci["via"] for ci in live["cis"]}["srv-00021"] == "srv-00014"
+    assert live["total"] == 9
+
+    server.snapshot = CMDBSnapshot(str(tmp_path / "cmdb_snapshot.db"))
+    await server.sync_snapshot()
+    calls = _requests(sn)
+    local = _payload(await server.get_transitive_dependencies(args))
+    downstream = _payload(await server.get_transitive_dependencies({"hostname": "srv-00010", "direction": "downstream", "max_depth": 1}))
+
+    assert local["cis"] == live["cis"]
+    assert [ci["hostname"] for ci in downstream["cis"]] == ["srv-00003", "srv-00009"]
+    assert _requests(sn) == calls
+
+
+@pytest.mark.asyncio
+async def test_relationship_results_are_memoized_until_the_cache_is_invalidated(fakes, server):
+    apps = await fakes(cis=30)
+    sn = apps["servicenow"]
+    args = {"hostname": "srv-00000", "direction": "upstream", "max_depth": 2}
+
+    first = _payload(await server.get_transitive_dependencies(args))
+    path = _payload(await server.get_dependency_path({"source": "srv-00000", "target": "srv-00015"}))
+    calls = _requests(sn)
+
+    assert _payload(await server.get_transitive_dependencies(args)) == first
+    assert _payload(await server.get_dependency_path({"source": "srv-00000", "target": "srv-00015"})) == path
+    assert _requests(sn) == calls
+    assert server.asset_cache.stats["related_hits"] == 2
+
+    server.asset_cache.invalidate("srv-00029")
+    await server.get_transitive_dependencies(args)
+    assert _requests(sn) == calls + 2  # srv-00000 is still cached; only the memoized walk is redone
+    assert server.asset_cache.stats["related_hits"] == 2
+
+
+# ---------------- user-036: service search ----------------
+
+async def _search_pages(server, service_name: str, limit: int) -> list:
+    pages, offset = [], 0
+    while offset is not None:
+        pages.append(_payload(await server.search_by_service({"service_name": service_name, "offset": offset, "limit": limit})))
+        offset = pages[-1]["next_offset"]
+    return pages
+
+
+@pytest.mark.asyncio
+async def test_snapshot_search_pages_matching_services_without_servicenow(fakes, server, tmp_path):
+    apps = await fakes(cis=30)
+    server.snapshot = CMDBSnapshot(str(tmp_path / "cmdb_snapshot.db"))
+    await server.sync_snapshot()
+    calls = _requests(apps["servicenow"])
+
+    pages = await _search_pages(server, "CH", limit=5)  # Checkout and Search
+    hosts = [asset["hostname"] for page in pages for asset in page["assets"]]
+
+    assert [page["total"] for page in pages] == [12, 12, 12]
+    assert hosts == [f"srv-{n:05d}" for n in range(1, 30, 5)] + [f"srv-{n:05d}" for n in range(2, 30, 5)]
+    assert _payload(await server.search_by_service({"service_name": "ayment"}))["total"] == 6
+    assert _payload(await server.search_by_service({"service_name": "paymentsx"}))["total"] == 0
+    assert _requests(apps["servicenow"]) == calls
+
+
+@pytest.mark.asyncio
+async def test_live_search_pages_with_one_query_each_and_learns_the_total_on_the_last(fakes, server):
+    apps = await fakes(cis=30)
+
+    pages = await _search_pages(server, "search", limit=4)
+
+    assert [page["total"] for page in pages] == [None, 6]
+    assert [a["hostname"] for page in pages for a in page["assets"]] == [f"srv-{n:05d}" for n in range(2, 30, 5)]
+    assert _requests(apps["servicenow"]) == 2
+
+
+def test_service_index_matches_normalized_substrings():
+    index = cmdb_server.ServiceIndex()
+    for n, service in enumerate(["Order  Management", "Orders API", "Reporting", "Order Management"]):
+        index.add({"hostname": f"host-{n}", "service": service})
+
+    assert index.match_services("ORDER man") == ["order management"]
+    assert index.match_services("rd") == ["order management", "orders api"]
+    assert index.match_services("porting") == ["reporting"]
+    assert index.search("order", 1, 2) == (3, [index.assets["host-3"], index.assets["host-1"]])
+
+
+# ---------------- user-037: incident history aggregation ----------------
+
+@pytest.mark.asyncio
+async def test_incident_history_counts_via_the_stats_api_and_pulls_only_recent_rows(fakes, server, monkeypatch):
+    monkeypatch.setattr(cmdb_server, "CMDB_INCIDENT_RECENT_LIMIT", 3)
+    apps = await fakes(cis=10)
+    sn = apps["servicenow"]
+    now = datetime.utcnow()
+    for day, category in enumerate(["hardware", "network", "hardware", "hardware", "network", "hardware"]):
+        sn["fake"].tables["incident"].append({
+            "number": f"INC{day:07d}", "cmdb_ci": "ci00000003", "category": category,
+            "opened_at": (now - timedelta(days=day)).strftime("%Y-%m-%d %H:%M:%S"),
+        })
+    sn["fake"].tables["incident"] += [
+        {"number": "INC0000100", "cmdb_ci": "ci00000003", "category": "network",
+         "opened_at": (now - timedelta(days=60)).strftime("%Y-%m-%d %H:%M:%S")},
+        {"number": "INC0000101", "cmdb_ci": "ci00000004", "category": "network",
+         "opened_at": now.strftime("%Y-%m-%d %H:%M:%S")},
+    ]
+
+    history = _payload(await server.get_incident_history({"hostname": "srv-00003", "days": 30}))
+
+    assert history["total_incidents"] == 6
+    assert [inc["number"] for inc in history["incidents"]] == ["INC0000000", "INC0000001", "INC0000002"]
+    assert history["patterns"]["common_type"] == "hardware"
+    assert history["patterns"]["by_type"] == {"hardware": 4, "network": 2}
+    assert _requests(sn, "GET /api/now/stats/incident") == 1
+    assert _requests(sn) == 2  # The CI and the recent incidents
+
+    again = _payload(await server.get_incident_history({"hostname": "srv-00003", "days": 30, "fields": "number"}))
+    assert again["incidents"] == [{"number": inc["number"]} for inc in history["incidents"]]
+    assert _payload(await server.get_incident_history({"hostname": "srv-00003", "days": 90}))["total_incidents"] == 7
+    assert _requests(sn, "GET /api/now/stats/incident") == 2
+
+
+# ---------------- user-038: field projection ----------------
+
+@pytest.mark.asyncio
+async def test_projected_lookups_return_only_the_requested_fields_and_cache_the_full_asset(fakes, server):
+    apps = await fakes(cis=20)
+    sn = apps["servicenow"]
+
+    projected = _payload(await server.get_asset_info({"hostname": "srv-00003", "fields": "owner_team,criticality"}))
+    full = _payload(await server.get_asset_info({"hostname": "srv-00003"}))
+
+    assert projected == {"hostname": "srv-00003", "owner_team": "Network", "criticality": "High"}
+    assert full["service"] == "Identity" and full["ip"] == "10.0.0.3"
+    assert _requests(sn) == 1
+
+    with_deps = _payload(await server.get_asset_info({"hostname": "srv-00003", "fields": ["dependencies"]}))
+    again = _payload(await server.get_asset_info({"hostname": "srv-00003", "fields": ["dependencies"]}))
+    assert with_deps == again == {"hostname": "srv-00003", "dependencies": ["srv-00004", "srv-00010"]}
+    assert _requests(sn) == 2  # One cmdb_rel_ci query, then kept on the cache entry
+
+
+def test_sysparm_fields_asks_only_for_the_columns_behind_the_requested_fields():
+    assert CMDBMCPServer._sysparm_fields(["owner_team", "ip"]) == \
+        "ip_address,managed_by_group,name,owned_by,sys_id,u_owner_team"
+    assert set(CMDBMCPServer._sysparm_fields(None).split(",")) >= {"name", "sys_id", "u_criticality", "business_service"}
+
+
+# ---------------- user-039: bulk incident creation ----------------
+
+def _incidents(count: int) -> list:
+    return [
+        {"hostname": f"srv-{n:05d}", "short_description": f"Disk full on srv-{n:05d}", "correlation_id": f"alert-{n}"}
+        for n in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_incidents_go_through_the_batch_api_in_input_order(fakes, server, monkeypatch):
+    monkeypatch.setattr(cmdb_server, "CMDB_BATCH_MAX_REQUESTS", 2)
+    apps = await fakes(cis=10)
+    sn = apps["servicenow"]
+    items = _incidents(4) + [{"hostname": "srv-00005"}]
+
+    result = _payload(await server.create_incidents_bulk({"incidents": items}))
+
+    assert (result["requested"], result["created"], result["failed"]) == (5, 4, 1)
+    assert [r["index"] for r in result["results"]] == [0, 1, 2, 3, 4]
+    assert "error" in result["results"][4]
+    rows = {row["number"]: row for row in sn["fake"].tables["incident"]}
+    for n, created in enumerate(result["results"][:4]):
+        row = rows[created["incident_number"]]
+        assert (row["cmdb_ci"], row["correlation_id"], row["sys_id"]) == (f"ci{n:08d}", f"alert-{n}", created["sys_id"])
+    # Existing-incident check, one nameIN lookup, two batches of two
+    assert result["servicenow_requests"] == 4
+    assert _requests(sn, "POST /api/now/v1/batch") == 2
+    assert _requests(sn, "POST /api/now/table/incident") == 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_incidents_are_not_recreated_for_known_correlation_ids(fakes, server):
+    apps = await fakes(cis=10)
+    sn = apps["servicenow"]
+    first = _payload(await server.create_incidents_bulk({"incidents": _incidents(3)}))
+
+    again = _payload(await server.create_incidents_bulk({"incidents": _incidents(4)}))
+
+    assert [r.get("existing", False) for r in again["results"]] == [True, True, True, False]
+    assert [r["incident_number"] for r in again["results"][:3]] == [r["incident_number"] for r in first["results"]]
+    assert len(sn["fake"].tables["incident"]) == 4
+    assert again["servicenow_requests"] == 3  # The existing-incident check, srv-00003's lookup and one batch
+
+
+@pytest.mark.asyncio
+async def test_bulk_incidents_fall_back_to_single_posts_when_the_batch_api_is_refused(fakes, server, monkeypatch):
+    apps = await fakes(cis=10)
+    sn = apps["servicenow"]
+    post = server._sn_post
+
+    async def no_batch_api(path, payload):
+        if path == "/api/now/v1/batch":
+            raise cmdb_server.ServiceNowError("POST", path, 403, "User Not Authorized")
+        return await post(path, payload)
+
+    monkeypatch.setattr(server, "_sn_post", no_batch_api)
+    result = _payload(await server.create_incidents_bulk({"incidents": _incidents(3)}))
+
+    assert (result["created"], result["failed"]) == (3, 0)
+    assert _requests(sn, "POST /api/now/table/incident") == 3
+    assert [row["correlation_id"] for row in sn["fake"].tables["incident"]] == ["alert-0", "alert-1", "alert-2"]
+
+
+# ---------------- user-040: alias routing ----------------
+
+@pytest.mark.asyncio
+async def test_live_routing_maps_every_alias_to_one_ci_and_skips_unknown_hosts(fakes, server, monkeypatch):
+    monkeypatch.setattr(cmdb_server, "CMDB_SNAPSHOT_PAGE_SIZE", 7)
+    apps = await fakes(cis=20)
+    sn = apps["servicenow"]
+
+    server.routing = await server._load_routing_live()
+    assert _requests(sn) == 3  # Pages of 7, 7 and 6 CIs
+    assert server.routing.stats()["cis"] == 20
+
+    for alias in ("srv-00004", "SRV-00004.corp.example.com.", "10.0.0.4", "srv-00004.other.example.com"):
+        assert _payload(await server.get_asset_info({"hostname": alias}))["owner_team"] == "SRE"
+    for unknown in ("ghost-01", "ghost-01.corp.example.com", "10.9.9.9"):
+        assert _payload(await server.get_asset_info({"hostname": unknown}))["status"] == "Not found"
+
+    assert _requests(sn) == 3 + 1  # One load for srv-00004, under its CI name
+    stats = server.routing.stats()
+    assert (stats["hits_by_alias"], stats["misses"]) == ({"name": 1, "fqdn": 1, "short_name": 1, "ip": 1}, 3)
+
+
+@pytest.mark.asyncio
+async def test_short_names_shared_by_several_cis_are_left_unrouted(fakes, server, tmp_path):
+    apps = await fakes(cis=4)
+    table = apps["servicenow"]["fake"].tables["cmdb_ci_server"]
+    table[1].update(name="web-01.dc1.example.com", fqdn="web-01.dc1.example.com")
+    table[2].update(name="web-01.dc2.example.com", fqdn="web-01.dc2.example.com")
+    table[3].update(name="db-01.dc1.example.com", fqdn="db-01.dc1.example.com")
+
+    routing = await server._load_routing_live()
+    server.snapshot = CMDBSnapshot(str(tmp_path / "cmdb_snapshot.db"))
+    await server.sync_snapshot()
+
+    assert routing.resolve("web-01") is server.snapshot.resolve_alias("web-01") is None
+    assert routing.resolve("web-01.dc2.example.com")["hostname"] == "web-01.dc2.example.com"
+    assert server.snapshot.resolve_alias("web-01.dc2.example.com")["name"] == "web-01.dc2.example.com"
+    assert routing.resolve("db-01")["hostname"] == server.snapshot.resolve_alias("db-01")["name"] == "db-01.dc1.example.com"
+    assert routing.stats()["ambiguous_aliases"] == server.snapshot.alias_stats()["ambiguous_aliases"] == 1
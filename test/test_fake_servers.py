@@ -0,0 +1,59 @@
+"""
+Fault injection and request accounting of the fake backends
+"""
+
+import aiohttp
+import pytest
+
+from conftest import PORTS
+from fake_servers import FaultProfile
+
+JIRA = f"http://127.0.0.1:{PORTS['jira']}"
+SERVICENOW = f"http://127.0.0.1:{PORTS['servicenow']}"
+
+
+async def _statuses(url: str, count: int) -> list:
+    async with aiohttp.ClientSession() as session:
+        statuses = []
+        for _ in range(count):
+            async with session.get(url) as r:
+                statuses.append((r.status, r.headers.get("Retry-After")))
+        return statuses
+
+
+# ---------------- user-049: fake backends ----------------
+
+def test_latency_distributions_are_reproducible_from_the_seed():
+    assert FaultProfile(latency="fixed:50").delay() == 0.05
+    assert FaultProfile().delay() == 0.0
+    for latency in ("uniform:10,20", "lognormal:40,0.6", "exp:30"):
+        a, b = FaultProfile(latency=latency, seed=1), FaultProfile(latency=latency, seed=1)
+        assert [a.delay() for _ in range(20)] == [b.delay() for _ in range(20)]
+    assert all(0.01 <= d <= 0.02 for d in (FaultProfile(latency="uniform:10,20").delay() for _ in range(100)))
+
+
+@pytest.mark.asyncio
+async def test_requests_over_the_rate_limit_get_429_with_retry_after(fakes):
+    apps = await fakes(FaultProfile(rate_limit=0.1, burst=2))
+
+    statuses = await _statuses(f"{JIRA}/rest/api/2/myself", 4)
+
+    assert statuses == [(200, None), (200, None), (429, "1"), (429, "1")]
+    assert apps["jira"]["stats"]["throttled"] == 2
+    assert apps["jira"]["stats"]["requests"]["GET /rest/api/2/myself"] == 4
+    # Each server has its own token bucket
+    assert [s for s, _ in await _statuses(f"{SERVICENOW}/api/now/table/cmdb_ci_server?sysparm_limit=1", 2)] == [200, 200]
+
+
+@pytest.mark.asyncio
+async def test_injected_errors_are_503s_counted_per_route_but_stats_are_not(fakes):
+    apps = await fakes(FaultProfile(error_rate=1.0))
+
+    assert await _statuses(f"{JIRA}/rest/api/2/priority", 3) == [(503, None)] * 3
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{JIRA}/_fake/stats") as r:
+            stats = await r.json()
+
+    assert stats["errors"] == 3
+    assert stats["requests"] == {"GET /rest/api/2/priority": 3}
+    assert apps["servicenow"]["stats"]["errors"] == 0
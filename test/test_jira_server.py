@@ -0,0 +1,343 @@
+"""
+Jira MCP server against the fake Jira REST v2 API
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import pytest_asyncio
+
+import jira_server
+from fake_servers import FaultProfile
+from jira_server import JiraIssueIndex, JiraMCPServer
+
+ISSUE_GETS = "GET /rest/api/2/issue/{key}"
+
+
+def _payload(response) -> dict:
+    return json.loads(response[0].text)
+
+
+def _requests(app, route: str) -> int:
+    return app["stats"]["requests"].get(route, 0)
+
+
+@pytest_asyncio.fixture
+async def server(tmp_path):
+    server = JiraMCPServer()
+    server.issue_index = JiraIssueIndex(str(tmp_path / "jira_issue_index.db"))
+    yield server
+    await server.close()
+
+
+# ---------------- user-041: pooled client with retries ----------------
+
+@pytest.mark.asyncio
+async def test_injected_503s_are_retried_until_each_read_succeeds(fakes, server):
+    apps = await fakes(FaultProfile(error_rate=0.3, seed=3), jira_issues=5)
+    jira = apps["jira"]
+
+    tickets = await asyncio.gather(*(server.get_ticket({"ticket_id": f"KAG-{n % 5 + 1}"}) for n in range(20)))
+
+    assert all(_payload(t)["summary"].startswith("Seeded incident") for t in tickets)
+    assert jira["stats"]["errors"] > 0
+    assert _requests(jira, ISSUE_GETS) == 20 + jira["stats"]["errors"]
+
+
+@pytest.mark.asyncio
+async def test_writes_rejected_with_503_are_resent_without_duplicating_issues(fakes, server):
+    apps = await fakes(FaultProfile(error_rate=0.3, seed=5))
+    jira = apps["jira"]
+
+    for n in range(8):
+        created = _payload(await server.create_ticket({"summary": f"Disk full {n}", "description": "x"}))
+        assert created["status"] == "created"
+
+    assert _requests(jira, "POST /rest/api/2/issue") > 8
+    assert [i["fields"]["summary"] for i in jira["fake"].issues.values()] == [f"Disk full {n}" for n in range(8)]
+
+
+@pytest.mark.asyncio
+async def test_calls_share_one_session_whose_pool_caps_connections_per_host(fakes, server, monkeypatch):
+    monkeypatch.setattr(jira_server, "JIRA_POOL_PER_HOST", 2)
+    await fakes(FaultProfile(latency="fixed:50"), jira_issues=3)
+
+    session = server._session()
+    started = time.monotonic()
+    tickets = await asyncio.gather(*(server.get_ticket({"ticket_id": f"KAG-{n % 3 + 1}"}) for n in range(6)))
+    elapsed = time.monotonic() - started
+
+    assert all("error" not in _payload(t) for t in tickets)
+    assert server._session() is session
+    assert elapsed >= 3 * 0.05  # Six 50 ms requests over two connections
+
+    await server.close()
+    assert session.closed
+    assert "error" not in _payload(await server.get_ticket({"ticket_id": "KAG-1"}))
+    assert server._session() is not session
+
+
+def test_retry_delay_honours_retry_after_and_caps_it(monkeypatch):
+    monkeypatch.setattr(jira_server, "JIRA_RETRY_MAX_WAIT", 30)
+    monkeypatch.setattr(jira_server, "JIRA_RETRY_BACKOFF", 0.5)
+    in_ten_seconds = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=10), usegmt=True)
+
+    assert JiraMCPServer._retry_delay(0, "2") == 2.0
+    assert JiraMCPServer._retry_delay(0, "120") == 30
+    assert 8 <= JiraMCPServer._retry_delay(0, in_ten_seconds) <= 10
+    assert all(0 <= JiraMCPServer._retry_delay(2, None) <= 2.0 for _ in range(50))
+
+
+# ---------------- user-042: bulk issue creation ----------------
+
+def _tickets(count: int, **extra) -> list:
+    return [{"summary": f"Disk full on host-{n:02d}", "description": f"Alert {n}", "host": f"host-{n:02d}", **extra}
+            for n in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_bulk_results_follow_input_order_through_chunks_and_element_errors(fakes, server, monkeypatch):
+    monkeypatch.setattr(jira_server, "JIRA_BULK_MAX_ISSUES", 2)
+    apps = await fakes()
+    jira = apps["jira"]
+    tickets = _tickets(5)
+    tickets[1]["description"] = ""
+    tickets[3]["issue_type"] = "bug"
+    await server._issue_types("KAG")
+    jira["fake"].issue_types.remove("Bug")  # Valid by the cached metadata, rejected by Jira
+
+    result = _payload(await server.create_tickets_bulk({"tickets": tickets}))
+
+    assert (result["requested"], result["created"], result["failed"]) == (5, 3, 2)
+    assert [r["index"] for r in result["results"]] == [0, 1, 2, 3, 4]
+    assert [r["status"] for r in result["results"]] == ["created", "failed", "created", "failed", "created"]
+    assert "issuetype" in result["results"][3]["error"]
+    for n in (0, 2, 4):
+        issue = jira["fake"].issues[result["results"][n]["ticket_id"]]
+        assert issue["fields"]["summary"] == tickets[n]["summary"]
+    assert _requests(jira, "POST /rest/api/2/issue/bulk") == 2
+
+
+@pytest.mark.asyncio
+async def test_bulk_retries_with_idempotency_keys_return_the_issues_already_created(fakes, server):
+    apps = await fakes()
+    jira = apps["jira"]
+    first = _payload(await server.create_tickets_bulk({"tickets": [
+        dict(t, idempotency_key=f"alert {n}") for n, t in enumerate(_tickets(3))
+    ]}))
+
+    again = _payload(await server.create_tickets_bulk({"tickets": [
+        dict(t, idempotency_key=f"alert {n}") for n, t in enumerate(_tickets(4))
+    ]}))
+
+    assert [r.get("existing", False) for r in again["results"]] == [True, True, True, False]
+    assert [r["ticket_id"] for r in again["results"][:3]] == [r["ticket_id"] for r in first["results"]]
+    assert len(jira["fake"].issues) == 4
+    assert "aitta-key-alert_3" in jira["fake"].issues[again["results"][3]["ticket_id"]]["fields"]["labels"]
+
+
+@pytest.mark.asyncio
+async def test_keyed_tickets_fail_when_the_idempotency_lookup_does(fakes, server, monkeypatch):
+    apps = await fakes()
+
+    async def lookup_down(keys):
+        raise RuntimeError("GET /rest/api/2/search failed: 503")
+
+    monkeypatch.setattr(server, "_existing_issues", lookup_down)
+    tickets = _tickets(3)
+    tickets[1]["idempotency_key"] = "alert 1"
+
+    result = _payload(await server.create_tickets_bulk({"tickets": tickets}))
+
+    assert [r["status"] for r in result["results"]] == ["created", "failed", "created"]
+    assert "Idempotency lookup failed" in result["results"][1]["error"]
+    assert len(apps["jira"]["fake"].issues) == 2
+
+
+# ---------------- user-043: cached metadata ----------------
+
+METADATA_GETS = ("GET /rest/api/2/project", "GET /rest/api/2/project/{key}", "GET /rest/api/2/priority")
+
+
+@pytest.mark.asyncio
+async def test_tickets_are_validated_against_metadata_loaded_once(fakes, server):
+    apps = await fakes()
+    jira = apps["jira"]
+
+    for n in range(3):
+        assert _payload(await server.create_ticket({"summary": f"s{n}", "description": "d", "issue_type": "bug"}))["status"] == "created"
+    unknown_project = _payload(await server.create_ticket({"summary": "s", "description": "d", "project": "NOPE"}))
+    unknown_type = _payload(await server.create_ticket({"summary": "s", "description": "d", "issue_type": "Incident"}))
+
+    assert [_requests(jira, route) for route in METADATA_GETS] == [1, 1, 1]
+    assert (server.metadata.misses, server.metadata.hits) == (3, 2 * 3 + 1 + 2)
+    assert "Unknown project 'NOPE'" in unknown_project["error"]
+    assert "Issue type 'Incident' is not valid" in unknown_type["error"]
+    assert _requests(jira, "POST /rest/api/2/issue") == 3
+    assert {i["fields"]["issuetype"]["name"] for i in jira["fake"].issues.values()} == {"Bug"}
+
+
+@pytest.mark.asyncio
+async def test_metadata_persists_across_restarts_until_it_expires_or_is_refreshed(fakes, tmp_path):
+    apps = await fakes()
+    jira = apps["jira"]
+    path = str(tmp_path / "jira_metadata_cache.json")
+    servers = [JiraMCPServer(), JiraMCPServer()]
+    try:
+        servers[0].metadata = jira_server.MetadataCache(path=path)
+        await servers[0].get_priorities({})
+        servers[1].metadata = jira_server.MetadataCache(path=path)  # A restart reads the file warm
+        assert _payload(await servers[1].get_priorities({}))["priorities"][0] == "Highest"
+        assert _requests(jira, "GET /rest/api/2/priority") == 1
+
+        refreshed = _payload(await servers[1].refresh_metadata({}))
+        assert (refreshed["projects"], refreshed["issue_types"]) == (1, {"KAG": ["Bug", "Task", "Story", "Epic"]})
+        assert [_requests(jira, route) for route in METADATA_GETS] == [1, 1, 2]
+
+        servers[1].metadata.ttl = 0.05
+        await asyncio.sleep(0.06)
+        await servers[1].get_priorities({})
+        assert _requests(jira, "GET /rest/api/2/priority") == 3
+    finally:
+        for s in servers:
+            await s.close()
+
+
+# ---------------- user-044: transition caching in update_ticket ----------------
+
+TRANSITION_POSTS = "POST /rest/api/2/issue/{key}/transitions"
+
+
+def _set_status(apps, key: str, status: str):
+    category = "done" if status == "Done" else "new" if status == "Open" else "indeterminate"
+    apps["jira"]["fake"].issues[key]["fields"]["status"] = {"name": status, "statusCategory": {"key": category}}
+
+
+@pytest.mark.asyncio
+async def test_a_warm_transition_cache_updates_a_ticket_in_one_request(fakes, server):
+    apps = await fakes(jira_issues=2)
+    jira = apps["jira"]
+    args = {"status": "In Progress", "comment": "Investigating", "assignee": "oncall"}
+
+    cold = _payload(await server.update_ticket({"ticket_id": "KAG-1", **args}))
+    calls = sum(jira["stats"]["requests"].values())
+    warm = _payload(await server.update_ticket({"ticket_id": "KAG-2", **args}))
+
+    assert cold["status"] == warm["status"] == "updated"
+    assert sorted(warm["updates"]) == ["Added comment", "Assigned to: oncall", "Changed status to: In Progress"]
+    assert sum(jira["stats"]["requests"].values()) == calls + 1
+    assert (_requests(jira, ISSUE_GETS), _requests(jira, TRANSITION_POSTS)) == (1, 2)
+    for key in ("KAG-1", "KAG-2"):
+        fields = jira["fake"].issues[key]["fields"]
+        assert (fields["status"]["name"], fields["assignee"], fields["comment"]["comments"]) == \
+            ("In Progress", {"name": "oncall"}, [{"body": "Investigating"}])
+
+
+@pytest.mark.asyncio
+async def test_a_cached_transition_rejected_for_the_issue_falls_back_to_a_lookup(fakes, server):
+    apps = await fakes(jira_issues=3)
+    jira = apps["jira"]
+    _set_status(apps, "KAG-1", "In Progress")
+    await server.update_ticket({"ticket_id": "KAG-1", "status": "Open"})  # Caches "Stop Progress" (21)
+    _set_status(apps, "KAG-2", "Done")
+
+    reopened = _payload(await server.update_ticket({"ticket_id": "KAG-2", "status": "Open", "comment": "Recurred"}))
+
+    assert reopened["status"] == "updated"
+    assert jira["fake"].issues["KAG-2"]["fields"]["status"]["name"] == "Open"
+    assert jira["fake"].issues["KAG-2"]["fields"]["comment"]["comments"] == [{"body": "Recurred"}]
+    assert server.metadata.peek(server._transition_key("KAG-2", "Open"))["id"] == "41"
+
+    already = _payload(await server.update_ticket({"ticket_id": "KAG-2", "status": "Open", "comment": "Again"}))
+    assert already["updates"] == ["Status already Open", "Added comment"]
+    assert _requests(jira, "POST /rest/api/2/issue/{key}/comment") == 1
+
+
+# ---------------- user-045: local issue index ----------------
+
+SEARCHES = "GET /rest/api/2/search"
+
+
+@pytest.mark.asyncio
+async def test_full_sync_pages_issues_sharing_an_updated_second_exactly_once(fakes, server, monkeypatch):
+    monkeypatch.setattr(jira_server, "JIRA_INDEX_PAGE_SIZE", 7)
+    apps = await fakes(jira_issues=30)
+    jira = apps["jira"]
+
+    result = await server.sync_issue_index()
+    calls = _requests(jira, SEARCHES)
+    found = _payload(await server.find_duplicates({"host": "host-03", "summary": "Seeded incident 3 on host-03"}))
+
+    assert (result["mode"], result["fetched"], result["indexed"]) == ("full", 30, 30)
+    assert result["pages"] == calls == 5
+    assert [(d["ticket_id"], d["score"], d["matched_on"]) for d in found["duplicates"]] == \
+        [("KAG-4", 1.0, ["host", "summary"])]
+    assert found["index_ready"] is True
+    assert _requests(jira, SEARCHES) == calls
+
+
+@pytest.mark.asyncio
+async def test_delta_sync_drops_issues_that_were_resolved(fakes, server):
+    apps = await fakes(jira_issues=10)
+    await server.sync_issue_index()
+
+    await server.update_ticket({"ticket_id": "KAG-4", "status": "Done"})
+    result = await server.sync_issue_index()
+
+    assert (result["mode"], result["closed_removed"], result["indexed"]) == ("delta", 1, 9)
+    assert _payload(await server.find_duplicates({"host": "host-03"}))["duplicates"] == []
+    assert "KAG-4" not in server.issue_index.keys()
+
+
+@pytest.mark.asyncio
+async def test_created_tickets_are_found_as_duplicates_before_the_next_sync(fakes, server):
+    apps = await fakes()
+    created = _payload(await server.create_ticket({
+        "summary": "OutOfMemoryError on db-01", "description": "d", "host": "db-01", "fingerprint": "OOM worker",
+    }))
+
+    by_fingerprint = _payload(await server.find_duplicates({"fingerprint": "oom_worker"}))
+    by_summary = _payload(await server.find_duplicates({"host": "db-01", "summary": "OutOfMemoryError detected on db-01"}))
+
+    assert [d["ticket_id"] for d in by_fingerprint["duplicates"]] == [created["ticket_id"]]
+    assert by_fingerprint["duplicates"][0]["matched_on"] == ["fingerprint"]
+    assert by_summary["duplicates"][0]["score"] == 1.0
+    assert _requests(apps["jira"], SEARCHES) == 0
+
+
+# ---------------- user-046: paginated search ----------------
+
+@pytest.mark.asyncio
+async def test_search_pages_past_the_server_cap_with_only_the_requested_fields(fakes, server):
+    apps = await fakes(jira_issues=250)
+
+    result = _payload(await server.search_tickets({
+        "jql": "project = KAG", "max_results": 230, "page_size": 150, "fields": ["summary"],
+    }))
+
+    assert result["total"] == 250
+    assert [i["key"] for i in result["issues"]] == [f"KAG-{n}" for n in range(1, 231)]
+    assert result["issues"][9] == {"key": "KAG-10", "summary": "Seeded incident 9 on host-09"}
+    assert _requests(apps["jira"], SEARCHES) == 3  # 100 (capped), then 100 and 30 concurrently
+
+    tail = _payload(await server.search_tickets({"jql": "project = KAG", "start_at": 240, "max_results": 50}))
+    assert [i["key"] for i in tail["issues"]] == [f"KAG-{n}" for n in range(241, 251)]
+    assert set(tail["issues"][0]) == {"key", "summary", "status", "priority"}
+    assert _requests(apps["jira"], SEARCHES) == 4
+
+
+@pytest.mark.asyncio
+async def test_updated_since_is_added_to_the_jql_before_its_order_by(fakes, server):
+    apps = await fakes(jira_issues=5)
+    apps["jira"]["fake"].issues["KAG-2"]["fields"]["updated"] = "2020-01-01T00:00:00.000+0000"
+    since = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+
+    result = _payload(await server.search_tickets({"jql": "project = KAG ORDER BY updated DESC", "updated_since": since}))
+
+    assert result["jql"].startswith("(project = KAG) AND updated >= ")
+    assert result["jql"].endswith(" ORDER BY updated DESC")
+    assert [i["key"] for i in result["issues"]] == ["KAG-1", "KAG-3", "KAG-4", "KAG-5"]
@@ -0,0 +1,105 @@
+"""
+MCP cassette record/replay around the CMDB MCP server (in-process) on the fake ServiceNow
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+import pytest_asyncio
+
+from aitta_mcp.mcp_client_manager import MCPCassette, MCPClientManager
+from cmdb_server import CMDBMCPServer
+from config.config import Config
+from conftest import InProcessMCP
+
+TABLE_GETS = "GET /api/now/table/{table}"
+
+
+def _manager(path, mode: str, latency_scale: float = 0.0) -> MCPClientManager:
+    class CassetteConfig(Config):
+        MCP_CASSETTE_MODE = mode
+        MCP_CASSETTE_PATH = str(path)
+        MCP_CASSETTE_LATENCY_SCALE = latency_scale
+    return MCPClientManager(CassetteConfig)
+
+
+@pytest_asyncio.fixture
+async def cmdb():
+    server = CMDBMCPServer()
+    yield server
+    await server.close()
+
+
+@pytest_asyncio.fixture
+async def recorded(tmp_path, fakes, cmdb):
+    """A cassette of two lookups, a failed call and one the caller timed out, recorded through the manager"""
+    apps = await fakes(cis=10)
+    path = tmp_path / "mcp_cassette.jsonl"
+    manager = _manager(path, "record")
+    in_process = InProcessMCP(cmdb=cmdb)
+
+    async def call_tool(server_name, tool_name, arguments):
+        if tool_name == "create_incident":
+            raise RuntimeError("MCP error -32603: ServiceNow unavailable")
+        if tool_name == "search_by_service":
+            await asyncio.sleep(1)
+        return await in_process.call_tool(server_name, tool_name, arguments)
+
+    manager._call_tool = call_tool
+    responses = [
+        await manager.call_tool("cmdb", "get_asset_info", {"hostname": f"srv-{n:05d}"}) for n in (1, 2)
+    ]
+    with pytest.raises(RuntimeError):
+        await manager.call_tool("cmdb", "create_incident", {"hostname": "srv-00001", "short_description": "x"})
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(manager.call_tool("cmdb", "search_by_service", {"service_name": "Search"}), 0.05)
+    return path, responses, apps["servicenow"]
+
+
+# ---------------- user-050: record/replay cassettes ----------------
+
+@pytest.mark.asyncio
+async def test_every_call_outcome_is_recorded_as_one_line(recorded):
+    path, responses, _ = recorded
+
+    entries = [json.loads(line) for line in path.read_text().splitlines()]
+
+    assert [(e["tool"], e["args"].get("hostname")) for e in entries[:2]] == \
+        [("get_asset_info", "srv-00001"), ("get_asset_info", "srv-00002")]
+    assert [e["response"] for e in entries[:2]] == responses
+    assert entries[2]["error"] == "RuntimeError: MCP error -32603: ServiceNow unavailable"
+    assert entries[3]["cancelled"] is True and entries[3]["ms"] >= 50
+
+
+@pytest.mark.asyncio
+async def test_replay_serves_recorded_outcomes_without_touching_the_backends(recorded):
+    path, responses, servicenow = recorded
+    calls = servicenow["stats"]["requests"][TABLE_GETS]
+    manager = _manager(path, "replay")
+
+    assert await manager.call_tool("cmdb", "get_asset_info", {"hostname": "srv-00002"}) == responses[1]
+    # Different arguments take the next unused recording of the same tool
+    assert await manager.call_tool("cmdb", "get_asset_info", {"hostname": "srv-00009"}) == responses[0]
+    with pytest.raises(LookupError):
+        await manager.call_tool("cmdb", "get_asset_info", {"hostname": "srv-00001"})
+    with pytest.raises(RuntimeError, match="ServiceNow unavailable"):
+        await manager.call_tool("cmdb", "create_incident", {"hostname": "srv-00001", "short_description": "x"})
+    with pytest.raises(asyncio.TimeoutError):
+        await manager.call_tool("cmdb", "search_by_service", {"service_name": "Search"})
+
+    assert manager.cassette.stats == {"recorded": 0, "exact": 3, "fallback": 1, "missing": 1}
+    assert servicenow["stats"]["requests"][TABLE_GETS] == calls
+    assert manager.sessions == {}
+
+
+@pytest.mark.asyncio
+async def test_replay_latency_is_scaled_from_the_recording(tmp_path):
+    path = tmp_path / "mcp_cassette.jsonl"
+    MCPCassette(path, "record").record("jira", "get_ticket", {"ticket_id": "KAG-1"}, time.time(), 0.1, response="{}")
+
+    started = time.monotonic()
+    await MCPCassette(path, "replay", latency_scale=0.5).replay("jira", "get_ticket", {"ticket_id": "KAG-1"})
+
+    assert 0.05 <= time.monotonic() - started < 0.5
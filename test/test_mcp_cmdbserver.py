@@ -89,5 +89,70 @@ async def main():
             req_id=5,
         )
 
+        # 5) get_cache_stats
+        await call_tool(read_stream, write_stream, "get_cache_stats", {}, req_id=6)
+
+        # 6) get_assets_bulk
+        await call_tool(
+            read_stream,
+            write_stream,
+            "get_assets_bulk",
+            {"hostnames": ["prod-web-01", "prod-web-02", "unknown-host"]},
+            req_id=7,
+        )
+
+        # 7) get_transitive_dependencies (blast radius)
+        await call_tool(
+            read_stream,
+            write_stream,
+            "get_transitive_dependencies",
+            {"hostname": "prod-db-01", "direction": "downstream", "max_depth": 3},
+            req_id=8,
+        )
+
+        # 8) get_dependency_path
+        await call_tool(
+            read_stream,
+            write_stream,
+            "get_dependency_path",
+            {"source": "prod-web-01", "target": "prod-web-03"},
+            req_id=9,
+        )
+
+        # 9) search_by_service (paginated)
+        await call_tool(
+            read_stream,
+            write_stream,
+            "search_by_service",
+            {"service_name": "payment", "offset": 0, "limit": 10},
+            req_id=10,
+        )
+
+        # 10) get_incident_history
+        await call_tool(
+            read_stream,
+            write_stream,
+            "get_incident_history",
+            {"hostname": "prod-web-01", "days": 30},
+            req_id=11,
+        )
+
+        # 11) create_incidents_bulk
+        await call_tool(
+            read_stream,
+            write_stream,
+            "create_incidents_bulk",
+            {
+                "incidents": [
+                    {"hostname": "prod-web-01", "short_description": "Bulk test 1", "urgency": "3", "impact": "3"},
+                    {"hostname": "prod-web-02", "short_description": "Bulk test 2", "urgency": "2", "impact": "2"},
+                ]
+            },
+            req_id=12,
+        )
+
+        # 12) get_owner_team by alias (FQDN, upper case) resolves through the routing table
+        await call_tool(read_stream, write_stream, "get_owner_team", {"hostname": "PROD-WEB-01.corp.example.com"}, req_id=13)
+
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -98,6 +98,63 @@ async def main():
         print("Raw create_ticket response:", call_resp)
         print("Parsed:", extract_text_content(call_resp))
 
+        # 5. Call tool: create_tickets_bulk (results in input order, per-item errors)
+        bulk_args = {
+            "tickets": [
+                {"project": "KAG", "summary": f"Bulk issue {i} from MCP client", "description": "Bulk test", "priority": "Medium"}
+                for i in range(3)
+            ]
+        }
+        call_params = CallToolRequestParams(name="create_tickets_bulk", arguments=bulk_args)
+        call_msg = JSONRPCRequest(
+            jsonrpc="2.0",
+            id=5,
+            method="tools/call",
+            params=call_params.model_dump()
+        )
+        await write_stream.send(Outbound(message=call_msg))
+        call_resp = await read_stream.receive()
+        print("Parsed create_tickets_bulk:", extract_text_content(call_resp))
+
+        call_params = CallToolRequestParams(name="refresh_metadata", arguments={})
+        call_msg = JSONRPCRequest(
+            jsonrpc="2.0",
+            id=6,
+            method="tools/call",
+            params=call_params.model_dump()
+        )
+        await write_stream.send(Outbound(message=call_msg))
+        call_resp = await read_stream.receive()
+        print("Parsed refresh_metadata:", extract_text_content(call_resp))
+
+        call_params = CallToolRequestParams(
+            name="find_duplicates",
+            arguments={"host": "prod-web-03", "summary": "Memory leak detected on prod-web-03"}
+        )
+        call_msg = JSONRPCRequest(
+            jsonrpc="2.0",
+            id=7,
+            method="tools/call",
+            params=call_params.model_dump()
+        )
+        await write_stream.send(Outbound(message=call_msg))
+        call_resp = await read_stream.receive()
+        print("Parsed find_duplicates:", extract_text_content(call_resp))
+
+        call_params = CallToolRequestParams(
+            name="search_tickets",
+            arguments={"jql": "project = KAG ORDER BY created DESC", "max_results": 200, "fields": ["summary", "status", "assignee"]}
+        )
+        call_msg = JSONRPCRequest(
+            jsonrpc="2.0",
+            id=8,
+            method="tools/call",
+            params=call_params.model_dump()
+        )
+        await write_stream.send(Outbound(message=call_msg))
+        call_resp = await read_stream.receive()
+        print("Parsed search_tickets:", extract_text_content(call_resp))
+
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -95,6 +95,15 @@ async def main():
         await call_tool(write_stream, read_stream, "send_event",
                         {"event": "Test event from client", "sourcetype": "aitta:test", "host": "aitta-agent"}, 7)
 
+        await call_tool(write_stream, read_stream, "scan_errors",
+                        {"time_range": "24h", "slices": 4, "indexes": ["main"], "max_parallel": 2}, 8)
+
+        await call_tool(write_stream, read_stream, "send_events",
+                        {"events": ["Batched event 1", {"event": "Batched event 2", "host": "prod-web-01"}],
+                         "sourcetype": "aitta:test"}, 9)
+
+        await call_tool(write_stream, read_stream, "get_search_metrics", {}, 10)
+
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
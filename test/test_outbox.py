@@ -0,0 +1,117 @@
+"""
+Outbox dispatch through the Jira and CMDB MCP servers (in-process) on the fake backends
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+
+from cmdb_server import CMDBMCPServer
+from config.config import Config
+from conftest import InProcessMCP
+from fake_servers import FaultProfile
+from jira_server import JiraIssueIndex, JiraMCPServer
+from models.database import OutboxRecord, TicketRecord
+from services.outbox import OutboxDispatcher, enqueue
+
+
+class OutboxConfig(Config):
+    OUTBOX_BATCH_SIZE = 2
+    OUTBOX_MAX_ATTEMPTS = 2
+    OUTBOX_RETRY_BACKOFF = 60
+    JIRA_DEDUP_ENABLED = True
+
+
+@pytest_asyncio.fixture
+async def mcp(tmp_path):
+    jira = JiraMCPServer()
+    jira.issue_index = JiraIssueIndex(str(tmp_path / "jira_issue_index.db"))
+    cmdb = CMDBMCPServer()
+    yield InProcessMCP(jira=jira, cmdb=cmdb)
+    await jira.close()
+    await cmdb.close()
+
+
+def _queue_alert(db, n: int, **ticket):
+    alert_id = f"alert-{n}"
+    db.add(TicketRecord(ticket_id=f"PENDING-{alert_id}", alert_id=alert_id, host=f"srv-{n:05d}", status="pending"))
+    enqueue(db, "jira_ticket", alert_id, {
+        "summary": f"Disk full on srv-{n:05d}", "description": "Disk above 95%", "host": f"srv-{n:05d}", **ticket,
+    })
+    enqueue(db, "servicenow_incident", alert_id, {"hostname": f"srv-{n:05d}", "short_description": "Disk full"})
+
+
+def _rows(db, kind: str) -> list:
+    db.expire_all()
+    return db.query(OutboxRecord).filter(OutboxRecord.kind == kind).order_by(OutboxRecord.id).all()
+
+
+# ---------------- user-047: durable outbox ----------------
+
+@pytest.mark.asyncio
+async def test_queued_writes_are_sent_in_bulk_and_written_back_to_the_tickets(db, fakes, mcp):
+    apps = await fakes(cis=10)
+    for n in range(3):
+        _queue_alert(db, n)
+    db.commit()
+
+    result = await OutboxDispatcher(OutboxConfig, mcp).run_once()
+
+    assert result == {"jira_ticket": 3, "jira_comment": 0, "servicenow_incident": 3}
+    assert mcp.tools_called("jira").count("create_tickets_bulk") == 2  # Batches of two
+    tickets = {t.alert_id: t for t in db.query(TicketRecord).all()}
+    issues = apps["jira"]["fake"].issues
+    for n, row in enumerate(_rows(db, "jira_ticket")):
+        ticket = tickets[f"alert-{n}"]
+        assert (row.status, ticket.ticket_id, ticket.status) == ("done", row.external_id, "created")
+        assert issues[ticket.ticket_id]["fields"]["summary"] == f"Disk full on srv-{n:05d}"
+        assert f"aitta-key-{row.idempotency_key}" in issues[ticket.ticket_id]["fields"]["labels"]
+    incidents = {row["correlation_id"]: row for row in apps["servicenow"]["fake"].tables["incident"]}
+    for n, row in enumerate(_rows(db, "servicenow_incident")):
+        assert tickets[f"alert-{n}"].incident_number == row.external_id == incidents[row.idempotency_key]["number"]
+        assert incidents[row.idempotency_key]["cmdb_ci"] == f"ci{n:08d}"
+
+
+@pytest.mark.asyncio
+async def test_a_ticket_duplicating_an_open_issue_becomes_a_comment_and_skips_its_incident(db, fakes, mcp):
+    apps = await fakes(cis=10)
+    existing = json.loads(await mcp.call_tool("jira", "create_ticket", {
+        "summary": "Disk full on srv-00001", "description": "d", "host": "srv-00001",
+    }))["ticket_id"]
+    _queue_alert(db, 1, duplicate_comment="Disk full again")
+    db.commit()
+
+    result = await OutboxDispatcher(OutboxConfig, mcp).run_once()
+
+    assert result == {"jira_ticket": 1, "jira_comment": 1, "servicenow_incident": 0}
+    assert [(r.status, r.external_id) for r in _rows(db, "jira_ticket")] == [("done", existing)]
+    assert [r.status for r in _rows(db, "servicenow_incident")] == ["skipped"]
+    ticket = db.query(TicketRecord).filter(TicketRecord.alert_id == "alert-1").one()
+    assert (ticket.status, ticket.duplicate_of) == ("duplicate", existing)
+    assert apps["jira"]["fake"].issues[existing]["fields"]["comment"]["comments"][0]["body"] == "Disk full again"
+    assert len(apps["jira"]["fake"].issues) == 1
+    assert apps["servicenow"]["fake"].tables["incident"] == []
+
+
+@pytest.mark.asyncio
+async def test_failed_writes_are_rescheduled_with_backoff_then_given_up(db, fakes, mcp):
+    await fakes(FaultProfile(error_rate=1.0), cis=10)
+    _queue_alert(db, 0)
+    db.commit()
+    dispatcher = OutboxDispatcher(OutboxConfig, mcp)
+
+    await dispatcher.run_once()
+    [row] = _rows(db, "jira_ticket")
+    assert (row.status, row.attempts) == ("pending", 1)
+    assert "503" in row.last_error
+    assert row.next_attempt_at > datetime.utcnow() + timedelta(seconds=50)
+    assert (await dispatcher.run_once())["jira_ticket"] == 0  # Not due yet
+
+    row.next_attempt_at = datetime.utcnow()
+    db.commit()
+    await dispatcher.run_once()
+    [row] = _rows(db, "jira_ticket")
+    assert (row.status, row.attempts) == ("failed", 2)
+    assert db.query(TicketRecord).filter(TicketRecord.alert_id == "alert-0").one().status == "failed"
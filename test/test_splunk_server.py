@@ -0,0 +1,384 @@
+"""
+Splunk MCP server against the fake Splunk REST and HEC endpoints (and the synthetic mock path)
+"""
+
+import asyncio
+import json
+from collections import Counter
+
+import pytest
+
+import splunk_server
+from fake_servers import FaultProfile
+from splunk_server import SplunkMCPServer
+
+NOW = 1_760_000_000
+
+
+def _payload(response) -> dict:
+    return json.loads(response[0].text)
+
+
+async def _until(condition):
+    while not condition():
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def fast_jobs(monkeypatch):
+    monkeypatch.setattr(splunk_server, "SPLUNK_JOB_POLL_INTERVAL", 0.01)
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch):
+    monkeypatch.setattr(splunk_server.time, "time", lambda: NOW)
+
+
+# ---------------- user-026: time-sliced scan ----------------
+
+@pytest.mark.asyncio
+async def test_scan_errors_runs_one_job_per_slice_and_releases_them(fakes, fast_jobs):
+    apps = await fakes(splunk_job_seconds=0.05, splunk_events=1000)
+    server = SplunkMCPServer()
+
+    result = _payload(await server.scan_errors({"time_range": "1h", "slices": 4, "indexes": ["main", "app"],
+                                                "max_results_per_slice": 25, "max_parallel": 3}))
+
+    assert result["mock"] is False
+    assert (result["slices_total"], result["slices_failed"]) == (8, 0)
+    assert result["total_error_events"] == 8 * 25
+    assert sum(h["error_count"] for h in result["hosts"]) == result["total_error_events"]
+    stats = apps["splunk"]["stats"]["requests"]
+    assert stats["POST /services/search/jobs"] == 8
+    assert stats["DELETE /services/search/jobs/{sid}"] == 8
+    assert apps["splunk"]["fake"].jobs == {}
+    assert server.search_metrics["jobs_created"] == server.search_metrics["jobs_deleted"] == 8
+
+
+@pytest.mark.asyncio
+async def test_scan_errors_slicing_does_not_change_mock_totals(monkeypatch, frozen_clock):
+    monkeypatch.setattr(splunk_server, "USE_MOCK", True)
+    server = SplunkMCPServer()
+
+    whole = _payload(await server.scan_errors({"time_range": "6h", "slices": 1, "max_results_per_slice": 100000}))
+    sliced = _payload(await server.scan_errors({"time_range": "6h", "slices": 7, "max_results_per_slice": 100000}))
+
+    assert whole["total_error_events"] > 0
+    assert sliced["slices_total"] == 7
+    assert {h["host"]: h["error_count"] for h in sliced["hosts"]} == {h["host"]: h["error_count"] for h in whole["hosts"]}
+    assert {h["host"]: h["severity"] for h in sliced["hosts"]} == {h["host"]: h["severity"] for h in whole["hosts"]}
+
+
+@pytest.mark.asyncio
+async def test_scan_errors_reports_a_failed_slice_and_keeps_the_others(monkeypatch, frozen_clock):
+    monkeypatch.setattr(splunk_server, "USE_MOCK", True)
+    monkeypatch.setattr(splunk_server, "SPLUNK_SCAN_RETRIES", 0)
+    server = SplunkMCPServer()
+    search = server._mock_search_slice
+    bounds = server._slice_bounds(NOW - 3600, NOW, 4)
+
+    async def flaky(search_term, index, earliest, latest, max_results):
+        if earliest == bounds[1][0]:
+            raise RuntimeError("search head unavailable")
+        return await search(search_term, index, earliest, latest, max_results)
+
+    monkeypatch.setattr(server, "_mock_search_slice", flaky)
+    result = _payload(await server.scan_errors({"time_range": "1h", "slices": 4, "max_results_per_slice": 100000}))
+
+    assert result["slices_failed"] == 1
+    assert result["failed_slices"][0]["earliest"] == bounds[1][0]
+    assert "search head unavailable" in result["failed_slices"][0]["error"]
+    expected = sum(1 for lo, hi in bounds if lo != bounds[1][0]
+                   for _ in server.synthetic.events(lo, hi, errors_only=True))
+    assert result["total_error_events"] == expected
+
+
+# ---------------- user-027: watermark paging ----------------
+
+@pytest.mark.asyncio
+async def test_search_since_pages_every_event_once_across_crowded_seconds(monkeypatch, frozen_clock):
+    monkeypatch.setattr(splunk_server, "USE_MOCK", True)
+    server = SplunkMCPServer()
+    server.synthetic = splunk_server.SyntheticEventGenerator(events_per_minute=600, error_rate=0.5, burst_every_minutes=0)
+    start = NOW - 120
+    expected = [server.synthetic.to_result(e, index="main")
+                for e in server.synthetic.events(start - 1, NOW, errors_only=True) if start < e["indextime"] <= NOW]
+    per_second = Counter(e["indextime"] for e in expected)
+    page_size = 4
+    assert max(per_second.values()) > page_size  # Some second has to span several pages
+
+    seen, watermark, offset, offsets_carried = [], start, 0, 0
+    for _ in range(len(expected)):
+        page = _payload(await server.search_since({"index": "main", "index_earliest": watermark,
+                                                   "index_offset": offset, "max_results": page_size}))
+        seen.extend(page["results"])
+        assert page["watermark"] >= watermark
+        watermark, offset = page["watermark"], page["offset"]
+        offsets_carried += offset > 0
+        if not page["truncated"]:
+            break
+
+    assert seen == expected
+    assert offsets_carried > 0
+    assert watermark == max(per_second)
+    caught_up = _payload(await server.search_since({"index": "main", "index_earliest": watermark, "index_offset": offset}))
+    assert caught_up["results_count"] == 0
+    assert caught_up["watermark"] == watermark
+
+
+@pytest.mark.asyncio
+async def test_search_since_holds_the_watermark_on_a_truncated_page(fakes, fast_jobs):
+    await fakes(splunk_job_seconds=0.01, splunk_events=50)
+    server = SplunkMCPServer()
+    queries = []
+    run_search_job = server._run_search_job
+
+    async def spy(spl_query, time_bounds, max_results):
+        queries.append(spl_query)
+        return await run_search_job(spl_query, time_bounds, max_results)
+
+    server._run_search_job = spy
+
+    full = _payload(await server.search_since({"index": "main", "index_earliest": 100, "max_results": 80}))
+    assert (full["truncated"], full["results_count"]) == (False, 50)
+    assert full["watermark"] == max(int(e["indextime"]) for e in full["results"])
+    assert full["offset"] == 0
+
+    page = _payload(await server.search_since({"index": "main", "index_earliest": 100, "index_offset": 3, "max_results": 20}))
+    last = int(page["results"][-1]["indextime"])
+    assert page["truncated"] is True
+    assert page["watermark"] == last - 1
+    assert page["offset"] == sum(1 for e in page["results"] if int(e["indextime"]) == last)
+    assert "_index_earliest=101 " in queries[1]
+    assert "where indextime > 101 OR boundary_pos > 3" in queries[1]
+    assert "boundary_pos" not in queries[0]
+
+
+# ---------------- user-028: batched HEC submission ----------------
+
+@pytest.fixture
+def hec_limits(monkeypatch):
+    monkeypatch.setattr(splunk_server, "SPLUNK_HEC_BATCH_MAX_EVENTS", 10)
+    monkeypatch.setattr(splunk_server, "SPLUNK_HEC_FLUSH_INTERVAL", 0.05)
+    monkeypatch.setattr(splunk_server, "SPLUNK_HEC_ACK_INTERVAL", 0.02)
+
+
+def _events(count: int) -> list:
+    return [{"event": {"message": f"error {n} " + "payload " * 20, "n": n}, "host": f"web-{n % 3}"} for n in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_send_events_posts_gzip_batches_at_the_event_limit(fakes, hec_limits):
+    apps = await fakes()
+    server = SplunkMCPServer()
+
+    result = _payload(await server.send_events({"events": _events(95)}))
+
+    assert result["status"] == "success"
+    assert [b["events"] for b in result["batches"]] == [10] * 9 + [5]
+    assert apps["hec"]["fake"].hec_events == 95
+    assert apps["hec"]["stats"]["requests"]["POST /services/collector/event"] == 10
+    stats = server.hec.stats
+    assert (stats["events_sent"], stats["batches_sent"], stats["failed_batches"]) == (95, 10, 0)
+    assert stats["bytes_sent"] < stats["bytes_raw"] / 3
+
+
+@pytest.mark.asyncio
+async def test_send_events_without_flush_is_sent_by_the_interval_timer(fakes, hec_limits):
+    apps = await fakes()
+    server = SplunkMCPServer()
+
+    result = _payload(await server.send_events({"events": _events(4), "flush": False}))
+    assert (result["batches"], result["buffered"]) == ([], 4)
+    assert apps["hec"]["fake"].hec_events == 0
+
+    await asyncio.wait_for(server.hec._timer, 5)
+    assert apps["hec"]["fake"].hec_events == 4
+    assert server.hec.stats["batches_sent"] == 1
+
+
+@pytest.mark.asyncio
+async def test_acknowledged_batches_leave_the_pending_set(fakes, hec_limits, monkeypatch):
+    monkeypatch.setattr(splunk_server, "SPLUNK_HEC_ACK", True)
+    apps = await fakes()
+    server = SplunkMCPServer()
+
+    result = _payload(await server.send_events({"events": _events(25)}))
+    assert result["pending_acks"] == 3
+
+    await asyncio.wait_for(server.hec._ack_task, 5)
+    stats = server.hec.stats
+    assert server.hec.pending_acks == {}
+    assert (stats["acked_batches"], stats["acked_events"]) == (3, 25)
+    assert (stats["resent_batches"], stats["unacked_batches"]) == (0, 0)
+    assert apps["hec"]["fake"].hec_events == 25
+
+
+@pytest.mark.asyncio
+async def test_unacknowledged_batches_are_resent_then_given_up(fakes, hec_limits, monkeypatch):
+    monkeypatch.setattr(splunk_server, "SPLUNK_HEC_ACK", True)
+    monkeypatch.setattr(splunk_server, "SPLUNK_HEC_ACK_TIMEOUT", 0.05)
+    monkeypatch.setattr(splunk_server, "SPLUNK_HEC_ACK_RESENDS", 2)
+    apps = await fakes(hec_ack_drop_rate=1.0)
+    server = SplunkMCPServer()
+
+    await server.send_events({"events": _events(25)})
+    await asyncio.wait_for(server.hec._ack_task, 5)
+
+    stats = server.hec.stats
+    assert server.hec.pending_acks == {}
+    assert (stats["acked_batches"], stats["resent_batches"], stats["unacked_batches"]) == (0, 6, 3)
+    assert apps["hec"]["stats"]["requests"]["POST /services/collector/event"] == 9
+    assert apps["hec"]["fake"].hec_events == 3 * 25
+
+
+@pytest.mark.asyncio
+async def test_a_resent_batch_that_is_then_acknowledged_counts_once(fakes, hec_limits, monkeypatch):
+    monkeypatch.setattr(splunk_server, "SPLUNK_HEC_ACK", True)
+    monkeypatch.setattr(splunk_server, "SPLUNK_HEC_ACK_TIMEOUT", 0.05)
+    apps = await fakes()
+    hec = apps["hec"]["fake"]
+    hec.dropped_acks.add(1)  # The first batch's ackId never comes back; its re-send gets a fresh one
+    server = SplunkMCPServer()
+
+    await server.send_events({"events": _events(15)})
+    await asyncio.wait_for(server.hec._ack_task, 5)
+
+    stats = server.hec.stats
+    assert (stats["acked_batches"], stats["acked_events"]) == (2, 15)
+    assert (stats["resent_batches"], stats["unacked_batches"]) == (1, 0)
+    assert hec.hec_events == 25
+
+
+@pytest.mark.asyncio
+async def test_send_event_posts_off_the_event_loop(fakes):
+    # The fake HEC answers on this test's event loop, so a blocking POST would stall until its timeout
+    apps = await fakes(FaultProfile(latency="fixed:100"))
+    server = SplunkMCPServer()
+
+    results = await asyncio.wait_for(asyncio.gather(
+        *(server.send_event({"event": {"message": f"probe {n}"}}) for n in range(5))
+    ), 2)
+
+    assert [_payload(r)["status"] for r in results] == ["success"] * 5
+    assert apps["hec"]["fake"].hec_events == 5
+
+
+# ---------------- user-029: search job lifecycle ----------------
+
+@pytest.mark.asyncio
+async def test_search_jobs_never_exceed_the_concurrency_cap(fakes, fast_jobs, monkeypatch):
+    monkeypatch.setattr(splunk_server, "SPLUNK_MAX_CONCURRENT_SEARCHES", 2)
+    apps = await fakes(splunk_job_seconds=0.1, splunk_events=10)
+    fake = apps["splunk"]["fake"]
+    server = SplunkMCPServer()
+    peak = 0
+
+    async def sample():
+        nonlocal peak
+        while True:
+            peak = max(peak, len(fake.jobs))
+            await asyncio.sleep(0.005)
+
+    sampler = asyncio.create_task(sample())
+    try:
+        result = _payload(await server.scan_errors({"time_range": "1h", "slices": 6, "max_parallel": 6}))
+    finally:
+        sampler.cancel()
+
+    assert result["slices_failed"] == 0
+    assert peak == 2
+    assert fake.jobs == {}
+    metrics = server.search_metrics
+    assert (metrics["jobs_created"], metrics["jobs_deleted"], metrics["jobs_cancelled"]) == (6, 6, 0)
+    assert metrics["slot_wait_seconds_max"] > 0.1
+    assert metrics["waiting_for_slot"] == 0
+
+
+@pytest.mark.asyncio
+async def test_a_search_past_its_timeout_is_cancelled_on_the_server(fakes, fast_jobs, monkeypatch):
+    monkeypatch.setattr(splunk_server, "SPLUNK_SEARCH_TIMEOUT", 0.1)
+    apps = await fakes(splunk_job_seconds=30)
+    fake = apps["splunk"]["fake"]
+    server = SplunkMCPServer()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await server._run_search_job("search index=main error", {"earliest_time": "-1h", "latest_time": "now"}, 10)
+
+    assert [job["cancelled"] for job in fake.jobs.values()] == [True]
+    assert server.jobs == {}
+    assert (server.search_metrics["jobs_cancelled"], server.search_metrics["jobs_deleted"]) == (1, 0)
+    assert server._search_slots._value == splunk_server.SPLUNK_MAX_CONCURRENT_SEARCHES
+
+
+@pytest.mark.asyncio
+async def test_cancelling_the_caller_cancels_its_search_job(fakes, fast_jobs):
+    apps = await fakes(splunk_job_seconds=30)
+    fake = apps["splunk"]["fake"]
+    server = SplunkMCPServer()
+
+    task = asyncio.create_task(server._run_search_job("search index=main", {"earliest_time": "-1h"}, 10))
+    await asyncio.wait_for(_until(lambda: fake.jobs), 5)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    # The shielded release finishes after the caller has been cancelled
+    await asyncio.wait_for(_until(lambda: server.search_metrics["jobs_cancelled"]), 5)
+
+    assert [job["cancelled"] for job in fake.jobs.values()] == [True]
+    assert server.search_metrics["jobs_cancelled"] == 1
+    assert server.jobs == {}
+
+
+# ---------------- user-030: synthetic mock events ----------------
+
+def _raws(events) -> list:
+    return [(e["_epoch"], e["_raw"]) for e in events]
+
+
+def test_synthetic_events_are_deterministic_and_slice_consistently():
+    a = splunk_server.SyntheticEventGenerator(seed=11, hosts=4)
+    b = splunk_server.SyntheticEventGenerator(seed=11, hosts=4)
+    start, end, cut = NOW - 7200, NOW, NOW - 3333
+
+    whole = _raws(a.events(start, end))
+    assert whole == _raws(b.events(start, end))
+    assert whole == _raws(a.events(start, cut)) + _raws(a.events(cut, end))
+    assert whole != _raws(splunk_server.SyntheticEventGenerator(seed=12, hosts=4).events(start, end))
+    assert all(start <= epoch < end for epoch, _ in whole)
+    assert [epoch for epoch, _ in whole] == sorted(epoch for epoch, _ in whole)
+    assert _raws(a.events(start, end, newest_first=True)) == whole[::-1]
+
+
+def test_synthetic_filters_select_a_subset_of_the_same_stream():
+    generator = splunk_server.SyntheticEventGenerator(seed=3, hosts=3, error_rate=0.4)
+    events = list(generator.events(NOW - 3600, NOW))
+
+    errors = [e for e in events if e["_error"]]
+    assert _raws(generator.events(NOW - 3600, NOW, errors_only=True)) == _raws(errors)
+    host_errors = [e for e in errors if e["host"] == "prod-web-02"]
+    assert host_errors
+    assert _raws(generator.events(NOW - 3600, NOW, host="prod-web-02", errors_only=True)) == _raws(host_errors)
+
+
+def test_synthetic_bursts_raise_the_rate_and_concentrate_errors_on_one_host():
+    generator = splunk_server.SyntheticEventGenerator(seed=5, hosts=5, events_per_minute=10, error_rate=0.1,
+                                                      burst_every_minutes=60, burst_minutes=10, burst_multiplier=20)
+    hour = (NOW // 3600) * 3600
+    burst = list(generator.events(hour, hour + 600))
+    calm = list(generator.events(hour + 1200, hour + 1800))
+
+    assert len(burst) > 10 * len(calm)
+    burst_errors = Counter(e["host"] for e in burst if e["_error"])
+    assert burst_errors.most_common(1)[0][1] > 0.6 * sum(burst_errors.values())
+
+
+def test_hosts_outside_the_fleet_get_their_own_stable_stream():
+    generator = splunk_server.SyntheticEventGenerator(seed=9, hosts=3, events_per_minute=30)
+    db_events = _raws(generator.events(NOW - 3600, NOW, host="prod-db-01"))
+
+    assert db_events
+    assert all("[prod-db-01]" in raw for _, raw in db_events)
+    assert db_events == _raws(splunk_server.SyntheticEventGenerator(seed=9, hosts=3, events_per_minute=30)
+                              .events(NOW - 3600, NOW, host="prod-db-01"))
+    assert db_events != _raws(generator.events(NOW - 3600, NOW, host="prod-db-02"))
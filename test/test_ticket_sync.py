@@ -0,0 +1,85 @@
+"""
+Jira-to-local ticket status sync through the Jira MCP server (in-process) on the fake Jira
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+
+from config.config import Config
+from conftest import InProcessMCP
+from fake_servers import _jira_time
+from jira_server import JiraIssueIndex, JiraMCPServer
+from models.database import TicketRecord, TicketSyncState
+from services.ticket_sync import TicketStatusSync
+
+SEARCHES = "GET /rest/api/2/search"
+
+
+@pytest_asyncio.fixture
+async def mcp(tmp_path):
+    jira = JiraMCPServer()
+    jira.issue_index = JiraIssueIndex(str(tmp_path / "jira_issue_index.db"))
+    yield InProcessMCP(jira=jira)
+    await jira.close()
+
+
+def _tickets(db) -> dict:
+    db.expire_all()
+    return {t.ticket_id: t for t in db.query(TicketRecord).all()}
+
+
+# ---------------- user-048: incremental ticket status sync ----------------
+
+@pytest.mark.asyncio
+async def test_sync_mirrors_status_assignee_and_resolution_of_local_tickets(db, fakes, mcp):
+    apps = await fakes(jira_issues=5)
+    for key in ("KAG-1", "KAG-2", "KAG-3"):
+        db.add(TicketRecord(ticket_id=key, alert_id=f"alert-{key}", status="created"))
+    db.commit()
+    await mcp.call_tool("jira", "update_ticket", {"ticket_id": "KAG-2", "status": "Done", "assignee": "oncall"})
+
+    result = await TicketStatusSync(Config, mcp).run_once()
+
+    assert (result["fetched"], result["updated"]) == (5, 3)
+    tickets = _tickets(db)
+    done = tickets["KAG-2"]
+    assert (done.jira_status, done.assigned_to, done.resolution) == ("Done", "oncall", "Done")
+    assert abs(done.resolved_at - datetime.utcnow()) < timedelta(minutes=1)
+    assert (tickets["KAG-1"].jira_status, tickets["KAG-1"].resolved_at) == ("Open", None)
+    assert all(t.status_synced_at is not None for t in tickets.values())
+    state = db.query(TicketSyncState).filter(TicketSyncState.source == "jira").one()
+    assert state.last_updated == result["watermark"] == apps["jira"]["fake"].issues["KAG-2"]["fields"]["updated"]
+
+
+@pytest.mark.asyncio
+async def test_later_runs_only_fetch_issues_updated_since_the_watermark(db, fakes, mcp):
+    apps = await fakes(jira_issues=5)
+    issues = apps["jira"]["fake"].issues
+    db.add(TicketRecord(ticket_id="KAG-3", alert_id="alert-3", status="created"))
+    db.commit()
+    sync = TicketStatusSync(Config, mcp)
+    first = await sync.run_once()
+
+    for issue in issues.values():
+        issue["fields"]["updated"] = "2020-01-01T00:00:00.000+0000"
+    issues["KAG-3"]["fields"]["status"] = {"name": "In Progress", "statusCategory": {"key": "indeterminate"}}
+    issues["KAG-3"]["fields"]["updated"] = _jira_time(datetime.now(timezone.utc) + timedelta(minutes=1))
+    second = await sync.run_once()
+
+    assert (first["fetched"], second["fetched"], second["updated"]) == (5, 1, 1)
+    assert second["watermark"] == issues["KAG-3"]["fields"]["updated"]
+    assert _tickets(db)["KAG-3"].jira_status == "In Progress"
+    assert [args["updated_since"] for _, tool, args in mcp.calls if tool == "search_tickets"][1] == first["watermark"]
+
+
+@pytest.mark.asyncio
+async def test_nothing_is_fetched_before_any_ticket_exists(db, fakes, mcp):
+    apps = await fakes(jira_issues=5)
+
+    result = await TicketStatusSync(Config, mcp).run_once()
+
+    assert result == {"fetched": 0, "updated": 0, "watermark": None}
+    assert mcp.calls == []
+    assert apps["jira"]["stats"]["requests"].get(SEARCHES, 0) == 0